@@ -67,6 +67,60 @@ class APIClient {
     return response.data;
   }
 
+  /**
+   * Analiza el boletín y busca opiniones de expertos en una sola petición
+   * @param {string} date - Fecha en formato YYYY-MM-DD
+   * @param {boolean} forceReanalysis - Forzar reanálisis
+   * @returns {Promise<Object>} Análisis del boletín con opiniones de expertos
+   */
+  async analyzeAll(date, forceReanalysis = false) {
+    console.log('🔍 APIClient.analyzeAll called with:', { date, forceReanalysis });
+
+    const payload = {
+      action: 'analyze_all',
+      fecha: date,
+      forzar_reanalisis: forceReanalysis
+    };
+
+    console.log('📤 Sending payload:', JSON.stringify(payload, null, 2));
+
+    const response = await this.makeRequest('', {
+      method: 'POST',
+      body: JSON.stringify(payload)
+    });
+
+    if (!response.success) {
+      throw new Error(response.message || 'Error en el análisis completo');
+    }
+
+    return response.data;
+  }
+
+  /**
+   * Obtiene el calendario de disponibilidad (bitsets por mes: bit d-1 = día d)
+   * @param {string} month - Último mes en formato YYYY-MM
+   * @param {number} months - Cantidad de meses hacia atrás
+   * @returns {Promise<Object>} { meses: [{ mes, dias, analizadas, con_opiniones, sin_edicion }] }
+   */
+  async getCalendar(month, months = 1) {
+    const payload = {
+      action: 'get_calendar',
+      mes: month,
+      meses: months
+    };
+
+    const response = await this.makeRequest('', {
+      method: 'POST',
+      body: JSON.stringify(payload)
+    });
+
+    if (!response.success) {
+      throw new Error(response.message || 'Error obteniendo el calendario');
+    }
+
+    return response.data;
+  }
+
   /**
    * Analiza el boletín para una fecha específica (método legacy - mantener compatibilidad)
    * @param {string} date - Fecha en formato YYYY-MM-DD
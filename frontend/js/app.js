@@ -7,6 +7,7 @@ class BoletinApp {
     this.currentAnalysis = null;
     this.isLoading = false;
     this.lastAction = null; // Para rastrear la última acción realizada
+    this.calendar = {}; // Bitsets de disponibilidad por mes (YYYY-MM)
 
     this.init();
   }
@@ -100,9 +101,57 @@ class BoletinApp {
     // Validar fecha inicial
     this.handleDateChange();
 
+    // Estado de los últimos meses (analizado / sin edición) para orientar la elección
+    this.loadCalendar(today.slice(0, 7), 3);
+
     console.log('Date picker configurado para:', today);
   }
 
+  /**
+   * Carga el calendario de disponibilidad (no bloquea la app si falla)
+   * @param {string} month - Último mes (YYYY-MM)
+   * @param {number} months - Cantidad de meses
+   */
+  async loadCalendar(month, months) {
+    try {
+      const data = await this.api.getCalendar(month, months);
+      data.meses.forEach((entry) => {
+        this.calendar[entry.mes] = entry;
+      });
+      this.updateDateStatus();
+    } catch (error) {
+      console.warn('No se pudo cargar el calendario:', error);
+    }
+  }
+
+  /**
+   * Muestra si la fecha elegida ya está analizada o no tiene edición
+   */
+  updateDateStatus() {
+    const status = document.getElementById('date-status');
+    const date = document.getElementById('date-picker').value;
+    const entry = date ? this.calendar[date.slice(0, 7)] : null;
+
+    if (!status) return;
+    if (!entry) {
+      status.textContent = '';
+      return;
+    }
+
+    const bit = 2 ** (Number(date.slice(8, 10)) - 1);
+    const isSet = (bits) => Math.floor(bits / bit) % 2 === 1;
+
+    if (isSet(entry.sin_edicion)) {
+      status.textContent = 'Sin edición del Boletín Oficial en esta fecha';
+    } else if (isSet(entry.con_opiniones)) {
+      status.textContent = 'Análisis y opiniones disponibles (respuesta inmediata)';
+    } else if (isSet(entry.analizadas)) {
+      status.textContent = 'Análisis disponible (respuesta inmediata)';
+    } else {
+      status.textContent = 'Todavía no analizado';
+    }
+  }
+
   /**
    * Maneja el cambio de fecha
    */
@@ -124,6 +173,8 @@ class BoletinApp {
       analyzeExpertsBtn.classList.remove('update-mode');
     }
 
+    this.updateDateStatus();
+
     // Solo actualizar estado de botones si no hay operación en curso
     if (!this.isLoading) {
       this.setButtonsState('idle');
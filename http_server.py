@@ -0,0 +1,224 @@
+"""
+HTTP entry point for container deployment.
+An ASGI application that turns plain HTTP requests into API Gateway events and
+serves them with lambda_handler, so the service runs unchanged on a container
+host behind any ASGI server. Each worker process imports lambda_function once,
+so its MongoDB pool, Gemini client and caches are shared by every request the
+worker serves; at most SERVER_MAX_CONCURRENCY requests run at a time per worker
+(in threads, lambda_handler is blocking) and the rest wait their turn for up to
+SERVER_QUEUE_TIMEOUT_SECONDS before getting a 503.
+
+Usage:
+    python http_server.py --workers 4 --port 8080
+    uvicorn http_server:app --workers 4 --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import lambda_function
+from utils import memory
+from utils.error_handler import error_handler, ErrorCode
+
+
+class HttpRequestContext:
+    """Lambda context of a request served over HTTP (the deadline is SERVER_REQUEST_TIMEOUT_SECONDS)."""
+
+    def __init__(self, request_id: str, timeout_seconds: float):
+        self.aws_request_id = request_id
+        self.function_name = os.getenv('SERVER_FUNCTION_NAME', 'boletin-oficial-analyzer-http')
+        self.memory_limit_in_mb = os.getenv('MEMORY_LIMIT_MB')
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def build_event(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """
+    API Gateway (REST) event equivalent to an ASGI HTTP request
+
+    Args:
+        scope: ASGI connection scope
+        body: Request body
+
+    Returns:
+        dict: Event accepted by parse_api_gateway_event / lambda_handler
+    """
+    headers = {}
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').title()
+        headers[key] = f"{headers[key]},{value.decode('latin-1')}" if key in headers else value.decode('latin-1')
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+    client = scope.get('client')
+
+    return {
+        'resource': scope.get('path', '/'),
+        'path': scope.get('path', '/'),
+        'httpMethod': scope.get('method', 'GET').upper(),
+        'headers': headers,
+        'queryStringParameters': query or None,
+        'pathParameters': None,
+        'body': body.decode('utf-8', errors='replace') if body else None,
+        'isBase64Encoded': False,
+        'requestContext': {
+            'identity': {'sourceIp': client[0] if client else None},
+        }
+    }
+
+
+def response_parts(response: Dict[str, Any]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Status, headers and body of a lambda_handler response."""
+    body = response.get('body') or ''
+    if not isinstance(body, str):
+        body = json.dumps(body, ensure_ascii=False, default=str)
+    payload = body.encode('utf-8')
+    headers = [(str(name).lower().encode('latin-1'), str(value).encode('latin-1'))
+               for name, value in (response.get('headers') or {}).items()
+               if str(name).lower() != 'content-length']
+    headers.append((b'content-length', str(len(payload)).encode('latin-1')))
+    return response.get('statusCode', 200), headers, payload
+
+
+def _error_response(status_code: int, code: str, message: str) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'success': False, 'error': {'code': code, 'message': message}, 'message': message},
+                           ensure_ascii=False)
+    }
+
+
+class LambdaHttpApp:
+    """ASGI application serving lambda_handler with a per-worker concurrency limit."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, queue_timeout: Optional[float] = None,
+                 request_timeout: Optional[float] = None):
+        """
+        Args:
+            max_concurrency: Requests handled at once by this worker (SERVER_MAX_CONCURRENCY)
+            queue_timeout: Seconds a request waits for a slot before a 503 (SERVER_QUEUE_TIMEOUT_SECONDS)
+            request_timeout: Deadline reported by the Lambda context (SERVER_REQUEST_TIMEOUT_SECONDS)
+        """
+        self.max_concurrency = (int(os.getenv('SERVER_MAX_CONCURRENCY', '4'))
+                                if max_concurrency is None else max_concurrency)
+        self.queue_timeout = (float(os.getenv('SERVER_QUEUE_TIMEOUT_SECONDS', '30'))
+                              if queue_timeout is None else queue_timeout)
+        self.request_timeout = (float(os.getenv('SERVER_REQUEST_TIMEOUT_SECONDS', '300'))
+                                if request_timeout is None else request_timeout)
+        self.health_path = os.getenv('SERVER_HEALTH_PATH', '/health')
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='handler')
+        # Created on first use: it must belong to the worker's event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """Create the worker's services (MongoDB pool, Gemini client) before the first request."""
+        if self.max_concurrency > 1:
+            # Concurrent requests share the process: per-request RSS peaks cannot be isolated
+            memory.disable_peak_reset()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, lambda_function.initialize_services)
+            error_handler.log_info('http_worker_started', {
+                'pid': os.getpid(),
+                'max_concurrency': self.max_concurrency
+            })
+        except Exception as e:
+            # Requests retry the initialization; the worker still starts and answers health checks
+            error_handler.log_error(ErrorCode.CONFIG_MISSING_ERROR, e, {'action': 'http_worker_startup'})
+
+    async def shutdown(self):
+        self._executor.shutdown(wait=True)
+        if lambda_function.database_service is not None:
+            lambda_function.database_service.close_connection()
+        error_handler.log_info('http_worker_stopped', {'pid': os.getpid()})
+
+    async def _http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        if scope['method'] == 'GET' and scope['path'] == self.health_path:
+            response = {'statusCode': 200, 'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'status': 'ok', 'pid': os.getpid()})}
+        else:
+            response = await self.handle(scope, body)
+
+        status, headers, payload = response_parts(response)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def handle(self, scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """Run lambda_handler for one request once a concurrency slot is free."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            error_handler.log_warning('http_request_rejected', {
+                'path': scope.get('path'),
+                'max_concurrency': self.max_concurrency,
+                'queue_timeout_seconds': self.queue_timeout
+            })
+            return _error_response(503, 'SERVER_BUSY', 'Servidor ocupado, reintentar más tarde')
+
+        try:
+            event = build_event(scope, body)
+            context = HttpRequestContext(
+                event['headers'].get('X-Request-Id') or str(uuid.uuid4()), self.request_timeout
+            )
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda_function.lambda_handler, event, context
+            )
+        finally:
+            self._slots.release()
+
+
+app = LambdaHttpApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve lambda_handler over HTTP with several worker processes')
+    parser.add_argument('--host', default=os.getenv('SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SERVER_PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 1))),
+                        help='Worker processes (each with its own MongoDB pool and Gemini client)')
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('http_server needs uvicorn (pip install uvicorn)')
+
+    uvicorn.run('http_server:app', host=args.host, port=args.port, workers=args.workers,
+                lifespan='on', log_level=os.getenv('LOG_LEVEL', 'INFO').lower())
+
+
+if __name__ == '__main__':
+    main()
@@ -3,18 +3,36 @@ Main Lambda handler for Boletin Oficial Telegram App
 Handles HTTP requests from API Gateway and coordinates all services
 """
 
+import asyncio
 import json
 import logging
 import os
+import threading
+import time
  
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 
 # Import services
+from services.backfill_service import BackfillService
+from services.calendar_index import dates_to_bits, format_month, month_dates, month_key, no_edition_bits
 from services.database_service import MongoDBService
-from services.llm_service_direct import LLMAnalysisServiceDirect as LLMAnalysisService
+from services.local_cache import DiskCacheTier, MemoryCacheTier, TieredCache, analysis_key
+from services.llm_service_direct import (
+    EditionNotAvailableError,
+    LLMAnalysisServiceDirect as LLMAnalysisService,
+    summarize_call_metrics
+)
 from services.config_service import config_service
+from services.negative_cache import NegativeResultCache, NO_EDITION
+from services import profiler
+from services.rate_limiter import GeminiRateLimiter
+from services.redis_cache import RedisCacheTier, RedisWindowCounter, create_redis_client
+from services.write_behind import WriteBehindQueue
+from utils.edition_calendar import has_edition
 from utils.error_handler import error_handler, ErrorCode
+from utils import memory, metrics, timing
 
 # Configure logging
 logger = logging.getLogger()
@@ -23,6 +41,28 @@ logger.setLevel(logging.INFO)
 # Global service instances (reused across Lambda invocations)
 database_service = None
 llm_service = None
+negative_cache = None
+write_behind = None
+tiered_cache = None
+shared_cache = None
+profile_store = None
+
+# Asyncio services and the event loop they are bound to (also reused across invocations)
+async_database_service = None
+async_llm_service = None
+_event_loop = None
+
+# Time an invocation needs left to start the analysis and the expert opinions
+ANALYSIS_MIN_REMAINING_MS = 60000
+EXPERT_OPINIONS_MIN_REMAINING_MS = 50000
+# A scheduled pre-warm stops polling while both fit, plus the download and the save,
+# well below the deployed timeout (lambda_timeout, 360 s)
+PREWARM_MIN_REMAINING_MS = ANALYSIS_MIN_REMAINING_MS + EXPERT_OPINIONS_MIN_REMAINING_MS + 40000
+
+# Requests served concurrently by http_server share the globals above
+_services_lock = threading.Lock()
+_async_services_lock = threading.Lock()
+_event_loop_lock = threading.Lock()
 
 
 def lambda_handler(event, context):
@@ -36,8 +76,83 @@ def lambda_handler(event, context):
     Returns:
         dict: Respuesta HTTP estructurada
     """
+    # EventBridge schedule: analyse today's edition before users ask for it
+    if is_scheduled_event(event):
+        return process_scheduled_prewarm(event, context)
+    
+    # cProfile + tracemalloc capture on demand (X-Debug-Profile) or sampled, see services/profiler.py
+    reason = profiler.profile_reason(event.get('headers'))
+    if reason is not None and event_body(event).get('action') not in profiler.PROFILE_ACTIONS:
+        return profile_request(event, context, reason)
+    
+    return handle_request(event, context)
+
+
+def profile_request(event: Dict[str, Any], context, reason: str) -> Dict[str, Any]:
+    """
+    Handle a request under cProfile and tracemalloc and store the capture by request id
+    
+    Args:
+        event: HTTP event
+        context: Lambda context
+        reason: Why the request is profiled ('header' or 'muestreo')
+        
+    Returns:
+        dict: HTTP response, with the X-Profile-Id header when the capture was stored
+    """
+    with profiler.ProfileCapture() as capture:
+        response = handle_request(event, context)
+    
+    body = event_body(event)
+    metadata = {
+        'motivo': reason,
+        'action': body.get('action'),
+        'fecha': body.get('fecha'),
+        'status_code': response.get('statusCode')
+    }
+    if profiler.save_capture(get_profile_store(), capture, context.aws_request_id, metadata):
+        response.setdefault('headers', {})['X-Profile-Id'] = context.aws_request_id
+    return response
+
+
+def event_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Request body of an HTTP event, empty if missing or not valid JSON."""
+    body = event.get('body') or {}
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except json.JSONDecodeError:
+            return {}
+    return body if isinstance(body, dict) else {}
+
+
+def get_profile_store():
+    """Profile store of the container (PROFILING_STORAGE), created on first use."""
+    global profile_store
+    if profile_store is None:
+        profile_store = profiler.create_profile_store(database_service)
+    return profile_store
+
+
+def handle_request(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Serve one HTTP request (parse, validate, process and format the response)
+    
+    Args:
+        event: HTTP event from API Gateway or Lambda Function URL
+        context: Lambda context
+        
+    Returns:
+        dict: HTTP response
+    """
     start_time = datetime.utcnow()
     
+    # Time spent in each stage of this invocation (see log_stage_timings) and its EMF metrics
+    timer = timing.start_timer()
+    metrics.start_metrics()
+    memory.start_invocation()
+    validated_params = {}
+    
     try:
         # Log request start
         error_handler.log_info('lambda_request_start', {
@@ -47,17 +162,20 @@ def lambda_handler(event, context):
         })
         
         # Parse HTTP event from API Gateway or Lambda Function URL
-        parsed_request = parse_api_gateway_event(event)
+        with timer.span('parseo_request'):
+            parsed_request = parse_api_gateway_event(event)
         
         # Handle OPTIONS request for CORS preflight
         if parsed_request['method'] == 'OPTIONS':
             return format_options_response()
         
         # Validate input parameters
-        validated_params = validate_request_parameters(parsed_request)
+        with timer.span('validacion'):
+            validated_params = validate_request_parameters(parsed_request)
         
         # Initialize services if needed
-        initialize_services()
+        with timer.span('inicializacion'):
+            initialize_services()
         
         # Process analysis request
         result = process_analysis_request(validated_params, context)
@@ -65,16 +183,24 @@ def lambda_handler(event, context):
         # Calculate processing time
         processing_time = (datetime.utcnow() - start_time).total_seconds()
         
+        # Stage breakdown in the response (serialization is only in the log record)
+        if os.getenv('RESPONSE_TIMINGS_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on') and 'metadatos' in result:
+            result['metadatos']['tiempos'] = timer.as_dict()
+        
         # Format successful HTTP response
-        response = format_success_response(result, processing_time)
+        with timer.span('serializacion'):
+            response = format_success_response(result, processing_time)
         
         # Log successful completion
         error_handler.log_info('lambda_request_completed', {
             'request_id': context.aws_request_id,
             'processing_time_seconds': processing_time,
             'fecha': validated_params.get('fecha'),
-            'from_cache': result.get('metadatos', {}).get('desde_cache', False)
+            'from_cache': result.get('metadatos', {}).get('desde_cache', False),
+            'cache_hit_ratio': tiered_cache.hit_ratio() if tiered_cache is not None else None
         })
+        log_stage_timings(timer, context, validated_params, 200)
+        flush_request_metrics(timer, context, validated_params, 200, result)
         
         return response
         
@@ -84,8 +210,70 @@ def lambda_handler(event, context):
         
         # Handle and format error response
         error_response = handle_lambda_error(e, event, context, processing_time)
+        log_stage_timings(timer, context, validated_params, error_response.get('statusCode'))
+        flush_request_metrics(timer, context, validated_params, error_response.get('statusCode'))
         
         return error_response
+    
+    finally:
+        timing.stop_timer()
+        metrics.stop_metrics()
+        memory.stop_invocation()
+
+
+def log_stage_timings(timer: timing.StageTimer, context, params: Dict[str, Any], status_code: Optional[int]):
+    """
+    Emit one structured record with the time spent in each stage of the invocation
+    
+    Stages that run concurrently (the expert opinions search overlaps the analysis)
+    are timed separately, so the stages may add up to more than the total.
+    
+    Args:
+        timer: Stage timer of the invocation
+        context: Lambda context
+        params: Validated request parameters (empty if validation failed)
+        status_code: HTTP status code of the response
+    """
+    error_handler.log_info('request_stage_timings', {
+        'request_id': context.aws_request_id,
+        'action': params.get('action'),
+        'fecha': params.get('fecha'),
+        'status_code': status_code,
+        'total_ms': round(timer.elapsed() * 1000, 1),
+        'tiempos_ms': timer.as_dict(),
+        'memoria': memory.invocation_usage()
+    })
+
+
+def flush_request_metrics(timer: timing.StageTimer, context, params: Dict[str, Any], status_code: Optional[int],
+                          result: Optional[Dict[str, Any]] = None):
+    """
+    Write the invocation's metrics as one EMF record (METRICS_ENABLED)
+    
+    Args:
+        timer: Stage timer of the invocation
+        context: Lambda context
+        params: Validated request parameters (empty if validation failed)
+        status_code: HTTP status code of the response
+        result: Result returned to the client (None on errors)
+    """
+    metrics.observe('RequestLatency', round(timer.elapsed() * 1000, 1))
+    usage = memory.invocation_usage()
+    if usage is not None:
+        metrics.observe('MemoryPeak', usage['rss_pico_mb'], 'Megabytes')
+    if status_code != 200:
+        metrics.increment('Errors')
+    elif (result or {}).get('metadatos', {}).get('desde_cache'):
+        metrics.increment('ResponsesFromCache')
+    else:
+        metrics.increment('ResponsesComputed')
+    
+    metrics.flush_metrics({'Action': params.get('action') or 'desconocida'}, {
+        'request_id': context.aws_request_id,
+        'fecha': params.get('fecha'),
+        'status_code': status_code,
+        'tiempos_ms': timer.as_dict()
+    })
 
 
 def parse_api_gateway_event(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -216,16 +404,8 @@ def validate_request_parameters(request: Dict[str, Any]) -> Dict[str, Any]:
             # Use current date if not provided
             fecha = datetime.now().strftime('%Y-%m-%d')
         
-        # Validate fecha format
-        try:
-            datetime.strptime(fecha, '%Y-%m-%d')
-        except ValueError:
-            raise ValueError(f"Invalid date format: {fecha}. Use YYYY-MM-DD format.")
-        
-        # Validate fecha is not in the future
-        fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
-        if fecha_obj.date() > datetime.now().date():
-            raise ValueError(f"Date {fecha} is in the future. No data available.")
+        # Validate fecha format and that it is not in the future
+        validate_fecha(fecha)
         
         # Get forzar_reanalisis parameter (optional)
         forzar_reanalisis = body.get('forzar_reanalisis', False)
@@ -246,10 +426,15 @@ def validate_request_parameters(request: Dict[str, Any]) -> Dict[str, Any]:
                 forzar_actualizacion = bool(forzar_actualizacion)
         
         # Validate action parameter
-        valid_actions = ['analyze_boletin', 'get_expert_opinions']
+        valid_actions = ['analyze_boletin', 'get_expert_opinions', 'analyze_all', 'analyze_dates', 'analyze_range',
+                         'get_calendar', 'list_profiles', 'get_profile']
         if action not in valid_actions:
             raise ValueError(f"Invalid action: {action}. Must be one of: {valid_actions}")
         
+        # Stored profiles are only readable with profiling enabled and the X-Debug-Profile token
+        if action in profiler.PROFILE_ACTIONS and not profiler.authorized(request.get('headers')):
+            raise ValueError(f"Invalid action: {action} requires PROFILING_ENABLED and the {profiler.PROFILE_HEADER} token")
+        
         validated_params = {
             'action': action,
             'fecha': fecha,
@@ -258,6 +443,52 @@ def validate_request_parameters(request: Dict[str, Any]) -> Dict[str, Any]:
             'seccion': 'legislacion_avisos_oficiales'  # Fixed section for now
         }
         
+        # Multi-date requests (served by the asyncio path)
+        if action == 'analyze_dates':
+            fechas = body.get('fechas')
+            if not isinstance(fechas, list) or not fechas:
+                raise ValueError("Invalid fechas: must be a non-empty list of YYYY-MM-DD dates")
+            max_fechas = int(os.getenv('MAX_FECHAS_POR_SOLICITUD', '10'))
+            if len(fechas) > max_fechas:
+                raise ValueError(f"Invalid fechas: at most {max_fechas} dates per request")
+            for item in fechas:
+                validate_fecha(item)
+            validated_params['fechas'] = list(dict.fromkeys(fechas))
+        
+        # Date range backfill (resumable, see process_range_analysis)
+        if action == 'analyze_range':
+            fecha_desde = body.get('fecha_desde')
+            fecha_hasta = body.get('fecha_hasta')
+            validate_fecha(fecha_desde)
+            validate_fecha(fecha_hasta)
+            if fecha_desde > fecha_hasta:
+                raise ValueError("Invalid range: fecha_desde must not be after fecha_hasta")
+            max_dias = int(os.getenv('MAX_DIAS_POR_RANGO', '92'))
+            dias = (datetime.strptime(fecha_hasta, '%Y-%m-%d') - datetime.strptime(fecha_desde, '%Y-%m-%d')).days + 1
+            if dias > max_dias:
+                raise ValueError(f"Invalid range: at most {max_dias} days per request")
+            validated_params['fecha_desde'] = fecha_desde
+            validated_params['fecha_hasta'] = fecha_hasta
+        
+        # Month bitmaps for the date picker (the last `meses` months up to `mes`)
+        if action == 'get_calendar':
+            mes = body.get('mes') or fecha[:7]
+            if not isinstance(mes, str) or len(mes) != 7:
+                raise ValueError(f"Invalid mes: {mes}. Use YYYY-MM format.")
+            validate_fecha(f'{mes}-01')
+            meses = body.get('meses', 1)
+            max_meses = int(os.getenv('MAX_MESES_CALENDARIO', '12'))
+            if not isinstance(meses, int) or isinstance(meses, bool) or not 1 <= meses <= max_meses:
+                raise ValueError(f"Invalid meses: must be an integer between 1 and {max_meses}")
+            validated_params['mes'] = mes
+            validated_params['meses'] = meses
+        
+        if action == 'get_profile':
+            request_id = body.get('request_id')
+            if not isinstance(request_id, str) or not profiler.REQUEST_ID_PATTERN.match(request_id):
+                raise ValueError(f"Invalid request_id: {request_id}")
+            validated_params['request_id'] = request_id
+        
         error_handler.log_info('request_parameters_validated', validated_params)
         
         return validated_params
@@ -271,11 +502,32 @@ def validate_request_parameters(request: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
+def validate_fecha(fecha: str):
+    """
+    Validate a YYYY-MM-DD date that is not in the future
+    
+    Raises:
+        ValueError: If the date is malformed or in the future
+    """
+    try:
+        fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid date format: {fecha}. Use YYYY-MM-DD format.")
+    
+    if fecha_obj.date() > datetime.now().date():
+        raise ValueError(f"Date {fecha} is in the future. No data available.")
+
+
 def initialize_services():
     """
     Initialize global service instances (reused across Lambda invocations)
     """
-    global database_service, llm_service
+    with _services_lock:
+        _initialize_services()
+
+
+def _initialize_services():
+    global database_service, llm_service, negative_cache, write_behind, tiered_cache, shared_cache
     
     try:
         # Load configuration first
@@ -287,10 +539,44 @@ def initialize_services():
             error_handler.log_info('initializing_database_service')
             database_service = MongoDBService()
         
-        # Initialize LLM service
+        # Shared Redis tier (REDIS_CACHE_URL): analyses, quota counters and locks for every container
+        redis_client = create_redis_client() if shared_cache is None else None
+        if redis_client is not None:
+            shared_cache = RedisCacheTier(redis_client)
+        
+        # Initialize LLM service (Gemini quota shared across containers through Redis or MongoDB)
         if llm_service is None:
             error_handler.log_info('initializing_llm_service')
-            llm_service = LLMAnalysisService()
+            rate_limiter = GeminiRateLimiter(
+                database_service.get_collection(os.getenv('MONGODB_RATE_LIMIT_COLLECTION', 'gemini_rate_limits')),
+                shared_counter=RedisWindowCounter(shared_cache.client) if shared_cache is not None else None
+            )
+            llm_service = LLMAnalysisService(rate_limiter=rate_limiter)
+        
+        # Dates without edition or with a recent failed analysis
+        if negative_cache is None:
+            negative_cache = NegativeResultCache(
+                database_service.get_collection(os.getenv('MONGODB_NEGATIVE_CACHE_COLLECTION', 'analisis_negativos'))
+            )
+        
+        # Analyses are buffered on local disk and written to MongoDB after the response
+        if write_behind is None and os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on'):
+            write_behind = WriteBehindQueue(database_service.save_analysis)
+        if write_behind is not None:
+            # Finish writes left by earlier invocations of this container
+            write_behind.flush_in_background()
+        
+        # Analyses and PDFs kept in memory and in /tmp (which may outlive the container's globals),
+        # then in the shared Redis tier, before MongoDB
+        if tiered_cache is None:
+            tiers = []
+            if os.getenv('LOCAL_CACHE_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on'):
+                tiers += [MemoryCacheTier(), DiskCacheTier()]
+            if shared_cache is not None:
+                tiers.append(shared_cache)
+            if tiers:
+                tiered_cache = TieredCache(tiers)
+                llm_service.pdf_cache = tiered_cache
         
         error_handler.log_info('services_initialized_successfully')
         
@@ -322,6 +608,18 @@ def process_analysis_request(params: Dict[str, Any], context) -> Dict[str, Any]:
         elif action == 'get_expert_opinions':
             forzar_actualizacion = params.get('forzar_actualizacion', False)
             return process_expert_opinions_request(fecha, context, forzar_actualizacion)
+        elif action == 'analyze_all':
+            return process_full_analysis(fecha, forzar_reanalisis, context)
+        elif action == 'analyze_dates':
+            return run_async(process_multiple_dates_async(params['fechas'], forzar_reanalisis, context))
+        elif action == 'analyze_range':
+            return process_range_analysis(params['fecha_desde'], params['fecha_hasta'], context)
+        elif action == 'get_calendar':
+            return process_calendar_request(params['mes'], params['meses'])
+        elif action == 'list_profiles':
+            return {'perfiles': get_profile_store().list(), 'metadatos': {}}
+        elif action == 'get_profile':
+            return process_get_profile(params['request_id'])
         else:
             raise ValueError(f"Unknown action: {action}")
         
@@ -365,41 +663,47 @@ def process_boletin_analysis(fecha: str, forzar_reanalisis: bool, context) -> Di
                 }
                 complete_analysis['metadatos']['desde_cache'] = True
                 return complete_analysis
-        
+            
+            # Known to have no edition, or failed recently: answer without scraping again
+            negative_result = check_negative_cache(fecha)
+            if negative_result:
+                return negative_result
+            
         # Perform new analysis
         error_handler.log_info('starting_new_boletin_analysis', {
             'fecha': fecha,
             'forced': forzar_reanalisis
         })
-        
+            
         # Step 1: Analyze normativa with LLM using direct URL access
-        analysis_result = analyze_normativa_with_llm(fecha, context)
-        
+        call_log = []
+        analysis_result = analyze_normativa_with_llm(fecha, context, call_log=call_log)
+            
         # Check if analysis failed
         if analysis_result.get('error', False):
             error_handler.log_error(ErrorCode.LLM_API_ERROR, Exception(analysis_result.get('error_message', 'Unknown error')), {
                 'fecha': fecha,
                 'action': 'analyze_normativa_failed'
             })
-            return analysis_result
-        
+            return record_negative_result(fecha, analysis_result)
+            
         # Prepare bulletin-only analysis data (without expert opinions)
-        bulletin_analysis = prepare_bulletin_analysis_data(fecha, analysis_result)
-        
+        bulletin_analysis = prepare_bulletin_analysis_data(fecha, analysis_result, call_log)
+            
         # Save bulletin analysis to database
         save_analysis_to_database(bulletin_analysis, context)
-        
+            
         # Add metadata
         bulletin_analysis['metadatos']['desde_cache'] = False
-        
+            
         error_handler.log_info('boletin_analysis_completed', {
             'fecha': fecha,
             'method': 'direct_gemini_analysis',
             'changes_count': len(analysis_result.get('cambios_principales', []))
         })
-        
+            
         return bulletin_analysis
-        
+            
     except Exception as e:
         error_handler.log_error(ErrorCode.UNKNOWN_ERROR, e, {
             'action': 'process_boletin_analysis',
@@ -417,7 +721,7 @@ def process_expert_opinions_request(fecha: str, context, forzar_actualizacion: b
         fecha: Date for analysis
         context: Lambda context
         forzar_actualizacion: Force update of expert opinions
-        
+            
     Returns:
         dict: Expert opinions result
     """
@@ -426,7 +730,7 @@ def process_expert_opinions_request(fecha: str, context, forzar_actualizacion: b
         existing_analysis = check_existing_analysis(fecha)
         if not existing_analysis:
             raise ValueError(f"No bulletin analysis found for date {fecha}. Please analyze the bulletin first.")
-        
+            
         # Check if expert opinions already exist and if we should use cache
         if (not forzar_actualizacion and 
             existing_analysis.get('opiniones_expertos') and 
@@ -444,27 +748,27 @@ def process_expert_opinions_request(fecha: str, context, forzar_actualizacion: b
                     'tiempo_procesamiento': 0
                 }
             }
-        
+            
         error_handler.log_info('starting_expert_opinions_analysis', {
             'fecha': fecha,
             'forced_update': forzar_actualizacion
         })
-        
+            
         # Get analysis result from existing data
         analysis_result = existing_analysis.get('analisis', {})
-        
+            
         # Get expert opinions (always fresh when forced or when none exist)
         expert_opinions = get_expert_opinions(analysis_result, context, fecha)
-        
+            
         # Update the existing document with expert opinions
         update_analysis_with_expert_opinions(fecha, expert_opinions, context)
-        
+            
         error_handler.log_info('expert_opinions_completed', {
             'fecha': fecha,
             'opinions_count': len(expert_opinions),
             'was_update': forzar_actualizacion
         })
-        
+            
         return {
             'fecha': fecha,
             'opiniones_expertos': expert_opinions,
@@ -475,7 +779,7 @@ def process_expert_opinions_request(fecha: str, context, forzar_actualizacion: b
                 'actualizado': forzar_actualizacion
             }
         }
-        
+            
     except Exception as e:
         error_handler.log_error(ErrorCode.UNKNOWN_ERROR, e, {
             'action': 'process_expert_opinions_request',
@@ -485,6 +789,546 @@ def process_expert_opinions_request(fecha: str, context, forzar_actualizacion: b
         raise
 
 
+def process_full_analysis(fecha: str, forzar_reanalisis: bool, context, pdf_part=None) -> Dict[str, Any]:
+    """
+    Process bulletin analysis and expert opinions in a single request
+    
+    The expert opinions search only needs the summary and the main changes, so it
+    is started in a worker thread as soon as those fields stream out of the
+    analysis, overlapping both Gemini calls. Both results are saved in one write.
+    
+    Args:
+        fecha: Date for analysis
+        forzar_reanalisis: Force reanalysis flag
+        context: Lambda context
+        pdf_part: Edition PDF already downloaded (see LLMAnalysisServiceDirect.fetch_pdf_part)
+            
+    Returns:
+        dict: Complete analysis including expert opinions
+    """
+    try:
+        if not forzar_reanalisis:
+            existing_analysis = check_existing_analysis(fecha)
+            if existing_analysis:
+                if existing_analysis.get('opiniones_expertos'):
+                    error_handler.log_info('full_analysis_retrieved_from_cache', {
+                        'fecha': fecha,
+                        'opinions_count': len(existing_analysis.get('opiniones_expertos', []))
+                    })
+                    complete_analysis = {
+                        'fecha': existing_analysis['fecha'],
+                        'analisis': existing_analysis.get('analisis', {}),
+                        'opiniones_expertos': existing_analysis.get('opiniones_expertos', []),
+                        'metadatos': existing_analysis.get('metadatos', {})
+                    }
+                    complete_analysis['metadatos']['desde_cache'] = True
+                    return complete_analysis
+                
+                # Bulletin already analysed: only the expert opinions are missing
+                expert_opinions = get_expert_opinions(existing_analysis.get('analisis', {}), context, fecha)
+                update_analysis_with_expert_opinions(fecha, expert_opinions, context)
+                complete_analysis = {
+                    'fecha': existing_analysis['fecha'],
+                    'analisis': existing_analysis.get('analisis', {}),
+                    'opiniones_expertos': expert_opinions,
+                    'metadatos': dict(existing_analysis.get('metadatos', {}))
+                }
+                # The opinions were just generated by Gemini: only the analysis was reused
+                complete_analysis['metadatos']['desde_cache'] = False
+                complete_analysis['metadatos']['analisis_desde_cache'] = True
+                return complete_analysis
+            
+            negative_result = check_negative_cache(fecha)
+            if negative_result:
+                return negative_result
+            
+        error_handler.log_info('starting_full_analysis', {
+            'fecha': fecha,
+            'forced': forzar_reanalisis
+        })
+            
+        executor = ThreadPoolExecutor(max_workers=1)
+        opinions_future = []
+        call_log = []  # shared by both threads: list.append is atomic
+            
+        def _start_expert_opinions(resumen: str, cambios_principales: list):
+            if opinions_future:
+                return
+            error_handler.log_info('expert_opinions_started_early', {
+                'fecha': fecha,
+                'changes_count': len(cambios_principales)
+            })
+            opinions_future.append(executor.submit(
+                timing.in_current_context(get_expert_opinions),
+                {'resumen': resumen, 'cambios_principales': cambios_principales},
+                context,
+                fecha,
+                call_log
+            ))
+            
+        try:
+            analysis_result = analyze_normativa_with_llm(fecha, context, on_summary=_start_expert_opinions,
+                                                         call_log=call_log, pdf_part=pdf_part)
+            
+            if analysis_result.get('error', False):
+                error_handler.log_error(ErrorCode.LLM_API_ERROR, Exception(analysis_result.get('error_message', 'Unknown error')), {
+                    'fecha': fecha,
+                    'action': 'analyze_normativa_failed'
+                })
+                return record_negative_result(fecha, analysis_result)
+            
+            # Summary never streamed out in a parseable way: fall back to sequential search
+            if not opinions_future:
+                _start_expert_opinions(
+                    analysis_result.get('resumen', ''),
+                    analysis_result.get('cambios_principales', [])
+                )
+            
+            expert_opinions = opinions_future[0].result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        complete_analysis = prepare_bulletin_analysis_data(fecha, analysis_result, call_log)
+        complete_analysis['opiniones_expertos'] = expert_opinions
+        if expert_opinions:
+            complete_analysis['metadatos']['fecha_actualizacion_opiniones'] = datetime.utcnow()
+        
+        # Single write for analysis and opinions
+        save_analysis_to_database(complete_analysis, context)
+        
+        complete_analysis['metadatos']['desde_cache'] = False
+        
+        error_handler.log_info('full_analysis_completed', {
+            'fecha': fecha,
+            'changes_count': len(analysis_result.get('cambios_principales', [])),
+            'opinions_count': len(expert_opinions)
+        })
+        
+        return complete_analysis
+        
+    except Exception as e:
+        error_handler.log_error(ErrorCode.UNKNOWN_ERROR, e, {
+            'action': 'process_full_analysis',
+            'fecha': fecha,
+            'forced': forzar_reanalisis
+        })
+        raise
+
+
+def process_range_analysis(fecha_desde: str, fecha_hasta: str, context) -> Dict[str, Any]:
+    """
+    Backfill every pending edition of a date range
+    
+    Work stops being scheduled when less than BACKFILL_STOP_MARGIN_MS remain in
+    the invocation; in-flight analyses are saved and the checkpoint lets the
+    same request resume the range.
+    
+    Args:
+        fecha_desde: First date (YYYY-MM-DD)
+        fecha_hasta: Last date (YYYY-MM-DD)
+        context: Lambda context
+        
+    Returns:
+        dict: Backfill summary (pendientes lists the dates left for the next call)
+    """
+    stop_margin_ms = int(os.getenv('BACKFILL_STOP_MARGIN_MS', '180000'))
+    backfill = BackfillService(database_service, llm_service, prepare_document=prepare_bulletin_analysis_data)
+    
+    summary = backfill.run(
+        fecha_desde,
+        fecha_hasta,
+        should_stop=lambda: context.get_remaining_time_in_millis() < stop_margin_ms
+    )
+    summary['metadatos'] = {'desde_cache': not summary['analizadas']}
+    return summary
+
+
+def process_get_profile(request_id: str) -> Dict[str, Any]:
+    """
+    Stored profile of a request: summary plus the gzip'd pstats file in base64
+    
+    Raises:
+        ValueError: If there is no profile for the request id
+    """
+    perfil = get_profile_store().get(request_id)
+    if perfil is None:
+        raise ValueError(f"Invalid request_id: no profile stored for {request_id}")
+    return {'perfil': perfil, 'metadatos': {}}
+
+
+def process_calendar_request(mes: str, meses: int) -> Dict[str, Any]:
+    """
+    Availability calendar of the last `meses` months up to `mes`
+    
+    Each month carries integer bitsets (bit d-1 is day d) of the days already
+    analysed, with expert opinions and without edition, read from one small
+    document per month instead of the analyses themselves.
+    
+    Args:
+        mes: Last month (YYYY-MM)
+        meses: Number of months
+        
+    Returns:
+        dict: Month bitmaps, oldest first
+    """
+    year, month = (int(part) for part in mes.split('-'))
+    months = []
+    for _ in range(meses):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    months.reverse()
+    
+    stored = database_service.get_calendar(months)
+    
+    # Dates the site reported without edition (holidays not in the precomputed calendar)
+    reported = negative_cache.no_edition_dates(f'{months[0]}-01', month_dates(months[-1])[-1]) if negative_cache else []
+    
+    return {
+        'meses': [
+            format_month(
+                m,
+                stored[m]['analizadas'],
+                stored[m]['con_opiniones'],
+                no_edition_bits(m) | dates_to_bits(fecha for fecha in reported if month_key(fecha) == m)
+            )
+            for m in months
+        ],
+        'metadatos': {'desde_cache': True}
+    }
+
+
+def is_scheduled_event(event: Dict[str, Any]) -> bool:
+    """
+    Whether the event comes from an EventBridge schedule rather than an HTTP request
+    """
+    return isinstance(event, dict) and (
+        event.get('source') == 'aws.events' or event.get('detail-type') == 'Scheduled Event'
+    )
+
+
+def process_scheduled_prewarm(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Analyse the day's edition and its expert opinions ahead of demand
+    
+    Polls the Boletín Oficial until the edition is published (the schedule runs
+    several times each morning, so a run that gives up is retried by the next),
+    then runs the full analysis with the downloaded PDF. The single save fills
+    the analysis, calendar and PDF handle caches, and any stale negative-cache
+    record for the date is removed.
+    
+    Args:
+        event: EventBridge event; detail.fecha overrides today's date
+        context: Lambda context
+        
+    Returns:
+        dict: Pre-warm summary (estado, fecha, sondeos, tiempo_s)
+    """
+    start = time.monotonic()
+    detail = event.get('detail') or {}
+    fecha = detail.get('fecha') or datetime.now().strftime('%Y-%m-%d')
+    poll_interval = float(os.getenv('PREWARM_POLL_INTERVAL_SECONDS', '60'))
+    min_remaining_ms = int(os.getenv('PREWARM_MIN_REMAINING_MS', str(PREWARM_MIN_REMAINING_MS)))
+    polls = 0
+    
+    def _summary(estado: str) -> Dict[str, Any]:
+        summary = {
+            'fecha': fecha,
+            'estado': estado,
+            'sondeos': polls,
+            'tiempo_s': round(time.monotonic() - start, 2)
+        }
+        error_handler.log_info('prewarm_finished', summary)
+        return summary
+    
+    try:
+        validate_fecha(fecha)
+        error_handler.log_info('prewarm_started', {'fecha': fecha, 'request_id': context.aws_request_id})
+        if context.get_remaining_time_in_millis() <= min_remaining_ms:
+            # The run could never wait for the edition: the margin does not fit in the timeout
+            error_handler.log_warning('prewarm_margin_exceeds_timeout', {
+                'min_remaining_ms': min_remaining_ms,
+                'remaining_time_ms': context.get_remaining_time_in_millis()
+            })
+        
+        if not has_edition(fecha):
+            return _summary('sin_edicion')
+        
+        initialize_services()
+        
+        # Overlapping scheduled runs (retries, a slow morning) analyse the day only once
+        lock_token = None
+        if shared_cache is not None:
+            lock_token = shared_cache.lock(f'prewarm:{fecha}', context.get_remaining_time_in_millis() // 1000 + 1)
+            if lock_token is None:
+                return _summary('en_curso')
+        
+        try:
+            existing_analysis = check_existing_analysis(fecha)
+            if existing_analysis and existing_analysis.get('opiniones_expertos'):
+                return _summary('ya_en_cache')
+        
+            pdf_part = None
+            if not existing_analysis:
+                while pdf_part is None:
+                    polls += 1
+                    try:
+                        pdf_part = llm_service.fetch_pdf_part(fecha)
+                    except EditionNotAvailableError:
+                        if context.get_remaining_time_in_millis() - poll_interval * 1000 < min_remaining_ms:
+                            return _summary('edicion_no_publicada')
+                        time.sleep(poll_interval)
+        
+            # The edition is out: drop a "no edition yet" record left by an earlier request
+            if negative_cache is not None:
+                negative_cache.clear(fecha)
+        
+            result = process_full_analysis(fecha, False, context, pdf_part=pdf_part)
+            return _summary('error' if result.get('error', False) else 'analizado')
+        finally:
+            if lock_token is not None:
+                shared_cache.unlock(f'prewarm:{fecha}', lock_token)
+        
+    except Exception as e:
+        error_handler.log_error(ErrorCode.UNKNOWN_ERROR, e, {
+            'action': 'process_scheduled_prewarm',
+            'fecha': fecha
+        })
+        return _summary('error')
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the container's persistent event loop
+    
+    Motor and httpx clients stay bound to the loop that created them, so one loop
+    runs in a background thread for the life of the container instead of
+    asyncio.run(). Each call submits its coroutine with the caller's context
+    (stage timings, metrics) and waits for it; concurrent requests under
+    http_server run their coroutines on the loop at the same time.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """The container's event loop, started in a daemon thread on first use."""
+    global _event_loop
+    
+    with _event_loop_lock:
+        if _event_loop is None or _event_loop.is_closed():
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, daemon=True, name='async-loop').start()
+        return _event_loop
+
+
+def initialize_async_services():
+    """
+    Initialize the asyncio service instances (lazy: only the async path needs them)
+    """
+    global async_database_service, async_llm_service
+    
+    from services.database_service_async import AsyncMongoDBService
+    from services.llm_service_async import AsyncLLMAnalysisService
+    
+    with _async_services_lock:
+        if async_database_service is None:
+            error_handler.log_info('initializing_async_database_service')
+            async_database_service = AsyncMongoDBService()
+        
+        if async_llm_service is None:
+            error_handler.log_info('initializing_async_llm_service')
+            async_llm_service = AsyncLLMAnalysisService(rate_limiter=llm_service.rate_limiter)
+
+
+async def process_multiple_dates_async(fechas: list, forzar_reanalisis: bool, context) -> Dict[str, Any]:
+    """
+    Analyze several dates concurrently on one event loop
+    
+    Existing analyses are looked up in the same order as check_existing_analysis
+    (write-behind buffer, local cache tiers, then a single $in query for the
+    dates still missing); the remaining dates are scraped, analysed and saved
+    concurrently, bounded by ASYNC_MAX_CONCURRENCY. Local disk work runs in
+    worker threads so the event loop keeps serving the other dates.
+    
+    Args:
+        fechas: Dates to analyse (YYYY-MM-DD)
+        forzar_reanalisis: Force reanalysis flag
+        context: Lambda context
+        
+    Returns:
+        dict: Per-date results plus a summary in metadatos
+    """
+    initialize_async_services()
+    
+    cached = {}
+    if not forzar_reanalisis:
+        cached = await asyncio.to_thread(find_local_analyses, fechas)
+        missing = [fecha for fecha in fechas if fecha not in cached]
+        if missing:
+            stored = await async_database_service.get_analyses_by_dates(missing)
+            for analysis in stored.values():
+                await asyncio.to_thread(cache_analysis, analysis)
+            cached.update(stored)
+    
+    semaphore = asyncio.Semaphore(int(os.getenv('ASYNC_MAX_CONCURRENCY', '4')))
+    
+    async def _analyze_one(fecha: str) -> Dict[str, Any]:
+        async with semaphore:
+            if context.get_remaining_time_in_millis() < ANALYSIS_MIN_REMAINING_MS:
+                return {'fecha': fecha, 'error': True, 'error_message': 'Insufficient time remaining for LLM analysis'}
+            
+            if not forzar_reanalisis:
+                negative_result = await asyncio.to_thread(check_negative_cache, fecha)
+                if negative_result:
+                    return negative_result
+            
+            if async_llm_service.pdf_upload_enabled and not async_llm_service.get_pdf_handle(fecha):
+                try:
+                    async_llm_service.remember_pdf_handle(fecha, await async_database_service.get_pdf_handle(fecha))
+                except Exception as e:
+                    error_handler.log_warning('pdf_handle_lookup_failed', {'fecha': fecha, 'error': str(e)})
+            
+            call_log = []
+            analysis_result = await async_llm_service.analyze_normativa_async(fecha, call_log=call_log)
+            if analysis_result.get('error', False):
+                return {'fecha': fecha, **await asyncio.to_thread(record_negative_result, fecha, analysis_result)}
+            
+            bulletin_analysis = prepare_bulletin_analysis_data(fecha, analysis_result, call_log)
+            document = bulletin_analysis
+            pdf_handle = async_llm_service.get_pdf_handle(fecha)
+            if pdf_handle:
+                document = {**bulletin_analysis, 'archivo_gemini': pdf_handle}
+            try:
+                if write_behind is not None:
+                    # Durable on local disk now; MongoDB is written by a background thread
+                    await asyncio.to_thread(write_behind.enqueue, document)
+                    write_behind.flush_in_background()
+                else:
+                    await async_database_service.save_analysis(document)
+                await asyncio.to_thread(cache_analysis, document)
+            except Exception as e:
+                error_handler.log_warning('analysis_not_saved_continuing', {
+                    'fecha': fecha,
+                    'error': str(e)
+                })
+            bulletin_analysis['metadatos']['desde_cache'] = False
+            return bulletin_analysis
+    
+    pending = [fecha for fecha in fechas if fecha not in cached]
+    analysed = await asyncio.gather(*[_analyze_one(fecha) for fecha in pending])
+    
+    resultados = {}
+    for fecha in fechas:
+        if fecha in cached:
+            existing = cached[fecha]
+            existing.setdefault('metadatos', {})['desde_cache'] = True
+            resultados[fecha] = existing
+    for result in analysed:
+        resultados[result['fecha']] = result
+    
+    error_handler.log_info('multiple_dates_analysis_completed', {
+        'dates_count': len(fechas),
+        'from_cache': len(cached),
+        'analysed': len(pending),
+        'failed': sum(1 for r in analysed if r.get('error'))
+    })
+    
+    return {
+        'fechas': fechas,
+        'resultados': resultados,
+        'metadatos': {
+            'desde_cache': len(pending) == 0,
+            'fechas_desde_cache': len(cached),
+            'fechas_analizadas': len(pending)
+        }
+    }
+
+
+def find_local_analyses(fechas: list) -> Dict[str, Dict[str, Any]]:
+    """Analyses of several dates found by find_local_analysis, by date."""
+    with timing.span('busqueda_cache'):
+        found = {fecha: find_local_analysis(fecha) for fecha in fechas}
+    return {fecha: analysis for fecha, analysis in found.items() if analysis is not None}
+
+
+def check_negative_cache(fecha: str) -> Optional[Dict[str, Any]]:
+    """
+    Answer for a date known to have no analysis (no edition or a recent failure)
+    
+    Args:
+        fecha: Date to check
+        
+    Returns:
+        dict or None: Error result to return as is, None if the date should be analysed
+    """
+    if not has_edition(fecha):
+        return format_negative_result(fecha, {
+            'motivo': NO_EDITION,
+            'error_message': 'No hay edición del Boletín Oficial para esta fecha (fin de semana o feriado)'
+        })
+    
+    with timing.span('busqueda_cache'):
+        record = negative_cache.get(fecha) if negative_cache is not None else None
+    if not record:
+        return None
+    
+    error_handler.log_info('negative_cache_hit', {
+        'fecha': fecha,
+        'motivo': record['motivo'],
+        'expira_en': record['expira_en'].isoformat()
+    })
+    return format_negative_result(fecha, record)
+
+
+def record_negative_result(fecha: str, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Cache a failed analysis so the next requests for the date back off
+    
+    Args:
+        fecha: Analysis date
+        analysis_result: Error result returned by the LLM service
+        
+    Returns:
+        dict: The same result with the time after which the date is retried
+    """
+    if negative_cache is None:
+        return analysis_result
+    
+    if analysis_result.get('sin_edicion'):
+        record = negative_cache.record_no_edition(fecha)
+    else:
+        record = negative_cache.record_failure(fecha, analysis_result.get('error_message', 'Unknown error'))
+    
+    if record:
+        analysis_result.setdefault('metadatos', {}).update({
+            'desde_cache': False,
+            'reintentar_despues': record['expira_en']
+        })
+    return analysis_result
+
+
+def format_negative_result(fecha: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the error result served from the negative cache
+    
+    Args:
+        fecha: Analysis date
+        record: Negative cache record (motivo, error_message, expira_en)
+        
+    Returns:
+        dict: Error result
+    """
+    return {
+        'fecha': fecha,
+        'error': True,
+        'sin_edicion': record['motivo'] == NO_EDITION,
+        'error_message': record['error_message'],
+        'metadatos': {
+            'desde_cache': True,
+            'reintentar_despues': record.get('expira_en')
+        }
+    }
+
+
 def check_existing_analysis(fecha: str) -> Optional[Dict[str, Any]]:
     """
     Check if analysis already exists for the given date
@@ -502,7 +1346,12 @@ def check_existing_analysis(fecha: str) -> Optional[Dict[str, Any]]:
             'fecha_length': len(fecha)
         })
         
-        result = database_service.get_analysis_by_date(fecha)
+        with timing.span('busqueda_cache'):
+            result = find_local_analysis(fecha)
+            if result is None:
+                result = database_service.get_analysis_by_date(fecha)
+                if result is not None:
+                    cache_analysis(result)
         
         error_handler.log_info('cache_check_completed', {
             'fecha': fecha,
@@ -519,13 +1368,84 @@ def check_existing_analysis(fecha: str) -> Optional[Dict[str, Any]]:
         })
         return None
 
-def analyze_normativa_with_llm(fecha: str, context) -> Dict[str, Any]:
+def find_local_analysis(fecha: str) -> Optional[Dict[str, Any]]:
+    """
+    Analysis held by this container: the write-behind buffer, then the local cache tiers
+    
+    Args:
+        fecha: Date in YYYY-MM-DD format
+        
+    Returns:
+        dict or None: Analysis or None if MongoDB has to be queried
+    """
+    # Analyses written behind are served from the local buffer until they reach MongoDB
+    result = write_behind.pending(fecha) if write_behind is not None else None
+    if result is not None:
+        result.pop('_id', None)
+        return result
+    if tiered_cache is not None:
+        return tiered_cache.get_document(analysis_key(fecha))
+    return None
+
+
+def cache_analysis(analysis: Dict[str, Any]):
+    """
+    Keep an analysis in the local cache tiers
+    
+    Other containers may still add expert opinions, so entries expire after
+    LOCAL_CACHE_ANALYSIS_TTL_SECONDS.
+    
+    Args:
+        analysis: Analysis document (as stored in MongoDB)
+    """
+    if tiered_cache is None:
+        return
+    try:
+        tiered_cache.put_document(analysis_key(analysis['fecha']), analysis,
+                                 ttl=int(os.getenv('LOCAL_CACHE_ANALYSIS_TTL_SECONDS', '3600')))
+    except Exception as e:
+        error_handler.log_warning('local_cache_write_failed', {
+            'fecha': analysis.get('fecha'),
+            'error': str(e)
+        })
+
+
+def load_pdf_handle(fecha: str):
+    """
+    Seed the LLM service with the Gemini file handle stored for an edition
+    
+    Args:
+        fecha: Date in YYYY-MM-DD format
+    """
+    if not llm_service.pdf_upload_enabled or llm_service.get_pdf_handle(fecha):
+        return
+    
+    try:
+        pdf_handle = database_service.get_pdf_handle(fecha)
+    except Exception as e:
+        error_handler.log_warning('pdf_handle_lookup_failed', {
+            'fecha': fecha,
+            'error': str(e)
+        })
+        return
+    
+    if pdf_handle:
+        llm_service.remember_pdf_handle(fecha, pdf_handle)
+
+
+def analyze_normativa_with_llm(fecha: str, context,
+                               on_summary: Optional[Callable[[str, list], None]] = None,
+                               call_log: Optional[list] = None, pdf_part=None) -> Dict[str, Any]:
     """
     Analyze normativa using LLM with direct URL access
     
     Args:
         fecha: Date for analysis
         context: Lambda context
+        on_summary: Optional callback fired with (resumen, cambios_principales)
+            as soon as they stream out of the analysis
+        call_log: Optional list that receives the metrics of every Gemini call
+        pdf_part: Edition PDF already downloaded (None: downloaded by the LLM service)
         
     Returns:
         dict: Analysis result
@@ -533,11 +1453,15 @@ def analyze_normativa_with_llm(fecha: str, context) -> Dict[str, Any]:
     try:
         # Check remaining time
         remaining_time = context.get_remaining_time_in_millis()
-        if remaining_time < 60000:  # Less than 60 seconds
+        if remaining_time < ANALYSIS_MIN_REMAINING_MS:
             raise Exception("Insufficient time remaining for LLM analysis")
         
+        # Reuse the PDF already uploaded to Gemini for this edition, if any
+        load_pdf_handle(fecha)
+        
         # Use new method that accesses URL directly
-        analysis_result = llm_service.analyze_normativa(fecha)
+        analysis_result = llm_service.analyze_normativa(fecha, on_summary=on_summary, call_log=call_log,
+                                                        pdf_part=pdf_part)
         
         error_handler.log_info('llm_analysis_completed', {
             'fecha': fecha,
@@ -557,7 +1481,8 @@ def analyze_normativa_with_llm(fecha: str, context) -> Dict[str, Any]:
         raise
 
 
-def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin: str) -> list:
+def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin: str,
+                        call_log: Optional[list] = None) -> list:
     """
     Get expert opinions based on analysis
     
@@ -565,6 +1490,7 @@ def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin:
         analysis_result: Result from LLM analysis
         context: Lambda context
         fecha_boletin: Fecha del boletín oficial
+        call_log: Optional list that receives the metrics of every Gemini call
         
     Returns:
         list: Expert opinions
@@ -572,7 +1498,7 @@ def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin:
     try:
         # Check remaining time
         remaining_time = context.get_remaining_time_in_millis()
-        if remaining_time < 50000:  # Less than 50 seconds
+        if remaining_time < EXPERT_OPINIONS_MIN_REMAINING_MS:
             error_handler.log_warning('insufficient_time_for_expert_opinions', {
                 'remaining_time_ms': remaining_time,
                 'fecha_boletin': fecha_boletin
@@ -582,7 +1508,11 @@ def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin:
         resumen = analysis_result.get('resumen', '')
         cambios_principales = analysis_result.get('cambios_principales', [])
         
-        expert_opinions = llm_service.get_expert_opinions(resumen, cambios_principales, fecha_boletin)
+        # Let the search see the edition itself when it is already uploaded
+        load_pdf_handle(fecha_boletin)
+        
+        expert_opinions = llm_service.get_expert_opinions(resumen, cambios_principales, fecha_boletin,
+                                                          call_log=call_log)
         
         error_handler.log_info('expert_opinions_generated', {
             'opinions_count': len(expert_opinions),
@@ -602,18 +1532,20 @@ def get_expert_opinions(analysis_result: Dict[str, Any], context, fecha_boletin:
 
 
 
-def prepare_bulletin_analysis_data(fecha: str, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+def prepare_bulletin_analysis_data(fecha: str, analysis_result: Dict[str, Any],
+                                   call_log: Optional[list] = None) -> Dict[str, Any]:
     """
     Prepare bulletin analysis data structure (without expert opinions)
     
     Args:
         fecha: Analysis date
         analysis_result: LLM analysis result
+        call_log: Metrics of the Gemini calls made for this analysis
         
     Returns:
         dict: Bulletin analysis data
     """
-    return {
+    bulletin_analysis = {
         'fecha': fecha,
         'seccion': 'legislacion_avisos_oficiales',
         'pdf_url': 'https://www.boletinoficial.gob.ar/',  # Base URL used for analysis
@@ -630,6 +1562,20 @@ def prepare_bulletin_analysis_data(fecha: str, analysis_result: Dict[str, Any])
             'url_fuente': 'https://www.boletinoficial.gob.ar/'
         }
     }
+    
+    # How the edition reached Gemini; 'url' means it was too large to attach and the analysis is degraded
+    estrategia_pdf = memory.pdf_strategy(fecha)
+    if estrategia_pdf is not None:
+        bulletin_analysis['metadatos']['estrategia_pdf'] = estrategia_pdf
+        if estrategia_pdf == 'url':
+            bulletin_analysis['metadatos']['degradado'] = True
+    
+    if call_log:
+        # Per-call timings and token counts for latency/cost dashboards
+        bulletin_analysis['metadatos']['llamadas_llm'] = list(call_log)
+        bulletin_analysis['metadatos']['uso_llm'] = summarize_call_metrics(call_log)
+    
+    return bulletin_analysis
 
 
 def update_analysis_with_expert_opinions(fecha: str, expert_opinions: list, context) -> bool:
@@ -645,8 +1591,23 @@ def update_analysis_with_expert_opinions(fecha: str, expert_opinions: list, cont
         bool: True if update was successful
     """
     try:
+        # Still buffered: buffer the document again with the opinions instead of updating MongoDB
+        pending = write_behind.pending(fecha) if write_behind is not None else None
+        if pending is not None:
+            pending['opiniones_expertos'] = expert_opinions
+            pending.setdefault('metadatos', {})['fecha_actualizacion_opiniones'] = datetime.utcnow()
+            with timing.span('guardado'):
+                write_behind.enqueue(pending)
+            write_behind.flush_in_background()
+            cache_analysis(pending)
+            return True
+        
         # Update the document in database
-        success = database_service.update_analysis_expert_opinions(fecha, expert_opinions)
+        with timing.span('guardado'):
+            success = database_service.update_analysis_expert_opinions(fecha, expert_opinions)
+        if tiered_cache is not None:
+            # Read again from MongoDB on the next request
+            tiered_cache.delete(analysis_key(fecha))
         
         if success:
             error_handler.log_info('analysis_updated_with_expert_opinions', {
@@ -671,17 +1632,33 @@ def update_analysis_with_expert_opinions(fecha: str, expert_opinions: list, cont
 
 def save_analysis_to_database(analysis_data: Dict[str, Any], context) -> str:
     """
-    Save analysis to database
+    Save analysis to database (buffered on local disk when write-behind is enabled)
     
     Args:
         analysis_data: Complete analysis data
         context: Lambda context
         
     Returns:
-        str: Document ID
+        str: Document ID ('' when buffered or not saved)
     """
     try:
-        document_id = database_service.save_analysis(analysis_data)
+        # Keep the Gemini file handle with the analysis so later requests reuse the upload
+        document = analysis_data
+        pdf_handle = llm_service.get_pdf_handle(analysis_data['fecha'])
+        if pdf_handle:
+            document = {**analysis_data, 'archivo_gemini': pdf_handle}
+        
+        if write_behind is not None:
+            # Durable on local disk now; MongoDB is written by a background thread
+            with timing.span('guardado'):
+                write_behind.enqueue(document)
+            write_behind.flush_in_background()
+            cache_analysis(document)
+            return ''
+        
+        with timing.span('guardado'):
+            document_id = database_service.save_analysis(document)
+        cache_analysis(document)
         
         error_handler.log_info('analysis_saved_to_database', {
             'document_id': document_id,
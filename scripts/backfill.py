@@ -0,0 +1,63 @@
+"""
+Backfill de ediciones históricas del Boletín Oficial fuera de Lambda.
+
+Analiza los días hábiles del rango que todavía no están en MongoDB. El
+progreso queda en un checkpoint: si se interrumpe (Ctrl+C), volver a
+ejecutar con el mismo --run-id retoma las fechas pendientes.
+
+Uso:
+    python scripts/backfill.py --desde 2025-01-01 --hasta 2025-03-31
+    python scripts/backfill.py --desde 2025-01-01 --hasta 2025-03-31 --analysis-concurrency 4
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv()
+
+import lambda_function  # noqa: E402
+from services.backfill_service import BackfillService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill de análisis por rango de fechas')
+    parser.add_argument('--desde', required=True, help='Primera fecha (YYYY-MM-DD)')
+    parser.add_argument('--hasta', required=True, help='Última fecha (YYYY-MM-DD)')
+    parser.add_argument('--run-id', help='Id del checkpoint (por defecto el rango)')
+    parser.add_argument('--fetch-concurrency', type=int, help='Descargas de PDF en paralelo')
+    parser.add_argument('--analysis-concurrency', type=int, help='Análisis de Gemini en paralelo')
+    parser.add_argument('--batch-size', type=int, help='Análisis por escritura en bloque')
+    args = parser.parse_args()
+
+    for fecha in (args.desde, args.hasta):
+        lambda_function.validate_fecha(fecha)
+
+    lambda_function.initialize_services()
+    backfill = BackfillService(
+        lambda_function.database_service,
+        lambda_function.llm_service,
+        prepare_document=lambda_function.prepare_bulletin_analysis_data,
+        fetch_concurrency=args.fetch_concurrency,
+        analysis_concurrency=args.analysis_concurrency,
+        batch_size=args.batch_size
+    )
+
+    # Ctrl+C deja de programar fechas; lo que está en curso se guarda antes de salir
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    summary = backfill.run(args.desde, args.hasta, should_stop=stop.is_set, run_id=args.run_id)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 0 if summary['completo'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -182,4 +182,26 @@ resource "aws_lambda_function_url" "boletin_analyzer_url" {
 
 
   depends_on = [aws_lambda_function.boletin_analyzer]
-}
\ No newline at end of file
+}
+# Scheduled pre-warm: analyses the day's edition and its expert opinions ahead of demand
+resource "aws_cloudwatch_event_rule" "prewarm" {
+  count               = var.enable_prewarm ? 1 : 0
+  name                = "${var.lambda_function_name}-prewarm"
+  description         = "Analiza la edicion del dia antes de que lleguen los usuarios"
+  schedule_expression = var.prewarm_schedule
+}
+
+resource "aws_cloudwatch_event_target" "prewarm" {
+  count = var.enable_prewarm ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.prewarm[0].name
+  arn   = aws_lambda_function.boletin_analyzer.arn
+}
+
+resource "aws_lambda_permission" "allow_prewarm" {
+  count         = var.enable_prewarm ? 1 : 0
+  statement_id  = "AllowPrewarmFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.boletin_analyzer.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.prewarm[0].arn
+}
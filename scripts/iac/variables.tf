@@ -183,4 +183,16 @@ variable "waf_rate_limit" {
   description = "Rate limit for WAF (requests per 5-minute period)"
   type        = number
   default     = 2000
-}
\ No newline at end of file
+}
+# Scheduled pre-warming of the day's analysis
+variable "enable_prewarm" {
+  description = "Run the analysis of the day's edition on a schedule, before users ask for it"
+  type        = bool
+  default     = true
+}
+
+variable "prewarm_schedule" {
+  description = "EventBridge schedule of the pre-warm (UTC; the edition is usually out by 08:00 UTC)"
+  type        = string
+  default     = "cron(0/20 8-11 ? * MON-FRI *)"
+}
@@ -0,0 +1,119 @@
+"""
+Graba y reproduce cassettes de tráfico de Gemini y del sitio del Boletín Oficial.
+
+record: analiza una fecha contra Gemini y el sitio reales (necesita GEMINI_API_KEY)
+        y guarda el PDF, cada chunk del stream con su tiempo y el resultado final.
+replay: repite el mismo análisis desde la cassette, sin red, a la velocidad original
+        o acelerada; informa latencias y si el resultado cambió respecto del grabado
+        (útil al tocar prompts, parseo o validación).
+
+Uso:
+    python scripts/perf/cassette.py record --fecha 2025-03-10 --output tests/cassettes/2025-03-10.json.gz
+    python scripts/perf/cassette.py replay tests/cassettes/2025-03-10.json.gz --speed 10 --repeat 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests.cassettes import Cassette, record, replay  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def analyze(service, fecha):
+    """Análisis y opiniones de expertos, como el camino analyze_all de la Lambda"""
+    analysis = service.analyze_normativa(fecha)
+    opinions = []
+    if not analysis.get('error'):
+        opinions = service.get_expert_opinions(analysis.get('resumen', ''), analysis.get('cambios_principales', []),
+                                               fecha)
+    return {'analisis': analysis, 'opiniones': opinions}
+
+
+def command_record(args):
+    from services.llm_service_direct import LLMAnalysisServiceDirect
+
+    service = LLMAnalysisServiceDirect()
+    cassette = Cassette(metadata={'fecha': args.fecha, 'modelo': service.model_name})
+    record(service, cassette)
+
+    start = time.monotonic()
+    result = analyze(service, args.fecha)
+    cassette.metadata['resultado'] = result
+    cassette.metadata['tiempo_s'] = round(time.monotonic() - start, 2)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    cassette.save(args.output)
+    print(json.dumps({
+        'cassette': args.output,
+        'llamadas': len(cassette.calls),
+        'chunks': sum(len(call['chunks']) for call in cassette.calls),
+        'tiempo_s': cassette.metadata['tiempo_s']
+    }, ensure_ascii=False))
+
+
+def command_replay(args):
+    os.environ.setdefault('GEMINI_API_KEY', 'replay')
+    from services.llm_service_direct import LLMAnalysisServiceDirect
+
+    cassette = Cassette.load(args.cassette)
+    fecha = cassette.metadata['fecha']
+    latencies = []
+    result = None
+    for _ in range(args.repeat):
+        service = LLMAnalysisServiceDirect()
+        replay(service, cassette, speed=args.speed)
+        start = time.monotonic()
+        result = analyze(service, fecha)
+        latencies.append(time.monotonic() - start)
+
+    # Mismo formato que al grabar (los datetimes de las opiniones quedan como texto)
+    replayed = json.loads(json.dumps(result, ensure_ascii=False, default=str))
+    print(json.dumps({
+        'cassette': args.cassette,
+        'fecha': fecha,
+        'velocidad': args.speed,
+        'repeticiones': args.repeat,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'tiempo_grabado_s': cassette.metadata.get('tiempo_s'),
+        'resultado_igual_al_grabado': replayed == cassette.metadata.get('resultado')
+    }, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Grabar contra Gemini y el sitio reales')
+    record_parser.add_argument('--fecha', required=True, help='Fecha de la edición (YYYY-MM-DD)')
+    record_parser.add_argument('--output', required=True, help='Archivo .json.gz de la cassette')
+
+    replay_parser = commands.add_parser('replay', help='Reproducir sin red')
+    replay_parser.add_argument('cassette', help='Archivo .json.gz de la cassette')
+    replay_parser.add_argument('--speed', type=float, default=1.0, help='1: tiempos originales, 0: sin esperas')
+    replay_parser.add_argument('--repeat', type=int, default=1)
+
+    args = parser.parse_args()
+
+    # Los eventos de cada llamada no interesan aquí, sólo el resumen
+    logging.getLogger('utils.error_handler').setLevel(logging.WARNING)
+
+    if args.command == 'record':
+        command_record(args)
+    else:
+        command_replay(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Perfil del cold start de la Lambda, en un intérprete nuevo por corrida.
+
+Mide lo que paga el primer request de un contenedor:
+
+    imports              import lambda_function con -X importtime (google.genai, pymongo,
+                         requests, services.*), módulo por módulo
+    initialize_services  desglose por paso: configuración, MongoDBService (MongoClient,
+                         ping, creación de índices), Redis, LLM service (cliente de
+                         Gemini), rate limiter, cache negativa, write-behind y caches locales
+
+El reporte es un árbol tipo flamegraph (tiempo acumulado y barra proporcional) y,
+con --collapsed, un archivo de stacks colapsados ("a;b;c microsegundos") que
+aceptan flamegraph.pl y speedscope. Con --budget-ms (o COLD_START_BUDGET_MS) el
+script termina con código 1 si la mediana del total (imports + initialize_services)
+supera el presupuesto; e2e_benchmark.py lo usa con --cold-start-budget-ms.
+
+MongoDB es mongomock salvo --mongodb-uri: sólo contra un mongod real el ping y los
+índices reflejan la red. -X importtime agrega algo de overhead a los imports.
+
+Uso:
+    python scripts/perf/cold_start.py --runs 5 --budget-ms 1500
+    python scripts/perf/cold_start.py --mongodb-uri mongodb://localhost:27017 --collapsed cold_start.folded
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Módulos que se informan por separado además del árbol completo
+WATCHED_IMPORTS = ('google.genai', 'pymongo', 'requests', 'redis', 'motor', 'httpx')
+
+
+def parse_importtime(stderr):
+    """
+    Árbol de imports a partir de la salida de -X importtime
+
+    Python imprime cada módulo después de sus dependencias (post-orden), indentado
+    según la profundidad. Devuelve nodos {'nombre', 'propio_us', 'acumulado_us', 'hijos'}.
+    """
+    pending = {}
+    roots = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = {
+            'nombre': name.strip(),
+            'propio_us': int(self_us),
+            'acumulado_us': int(cumulative_us),
+            'hijos': pending.pop(depth + 1, [])
+        }
+        if depth == 0:
+            roots.append(node)
+        else:
+            pending.setdefault(depth, []).append(node)
+    return roots
+
+
+def find_imports(roots, names):
+    """Tiempo acumulado de la primera importación de cada módulo vigilado"""
+    found = {}
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        if node['nombre'] in names and node['nombre'] not in found:
+            found[node['nombre']] = node['acumulado_us']
+        stack.extend(reversed(node['hijos']))
+    return found
+
+
+class Tracer:
+    """Tiempos anidados de funciones envueltas, como un profiler de una sola corrida"""
+
+    def __init__(self):
+        self.root = {'nombre': 'initialize_services', 'acumulado_us': 0, 'hijos': []}
+        self._stack = [self.root]
+
+    def wrap(self, owner, attr, label=None):
+        original = getattr(owner, attr)
+        tracer = self
+
+        def traced(*args, **kwargs):
+            name = label(args) if callable(label) else (label or attr)
+            parent = tracer._stack[-1]
+            node = next((child for child in parent['hijos'] if child['nombre'] == name), None)
+            if node is None:
+                node = {'nombre': name, 'acumulado_us': 0, 'hijos': []}
+                parent['hijos'].append(node)
+            tracer._stack.append(node)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                node['acumulado_us'] += int((time.perf_counter() - start) * 1e6)
+                tracer._stack.pop()
+
+        setattr(owner, attr, traced)
+
+
+def command_label(args):
+    return f"command {args[1]}" if len(args) > 1 and isinstance(args[1], str) else 'command'
+
+
+def child(output, use_mongomock):
+    """Corre dentro del intérprete nuevo: importa la Lambda e inicializa los servicios"""
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    import lambda_function
+    import_us = int((time.perf_counter() - start) * 1e6)
+
+    import logging
+    logging.getLogger('utils.error_handler').setLevel(logging.WARNING)
+
+    import pymongo.collection
+    import pymongo.database
+    from services import database_service as database_module
+    from services import llm_service_direct, local_cache, negative_cache, rate_limiter, redis_cache, write_behind
+
+    databases = [pymongo.database.Database]
+    collections = [pymongo.collection.Collection]
+    if use_mongomock:
+        import mongomock
+        database_module.MongoClient = mongomock.MongoClient
+        databases.append(mongomock.database.Database)
+        collections.append(mongomock.collection.Collection)
+
+    tracer = Tracer()
+    tracer.wrap(lambda_function.config_service, 'load_config')
+    tracer.wrap(database_module.MongoDBService, '__init__', 'MongoDBService')
+    tracer.wrap(database_module, 'MongoClient')
+    tracer.wrap(database_module.MongoDBService, '_create_indexes')
+    for database in databases:
+        tracer.wrap(database, 'command', command_label)
+    for collection in collections:
+        tracer.wrap(collection, 'create_index')
+    tracer.wrap(lambda_function, 'create_redis_client')
+    tracer.wrap(redis_cache.RedisCacheTier, '__init__', 'RedisCacheTier')
+    tracer.wrap(rate_limiter.GeminiRateLimiter, '__init__', 'GeminiRateLimiter')
+    tracer.wrap(llm_service_direct.LLMAnalysisServiceDirect, '__init__', 'LLMAnalysisService')
+    tracer.wrap(llm_service_direct.genai, 'Client', 'genai.Client')
+    tracer.wrap(negative_cache.NegativeResultCache, '__init__', 'NegativeResultCache')
+    tracer.wrap(write_behind.WriteBehindQueue, '__init__', 'WriteBehindQueue')
+    tracer.wrap(local_cache.DiskCacheTier, '__init__', 'DiskCacheTier')
+
+    start = time.perf_counter()
+    lambda_function.initialize_services()
+    tracer.root['acumulado_us'] = int((time.perf_counter() - start) * 1e6)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'import_us': import_us, 'init': tracer.root}, f)
+
+
+def run_once(env, mongodb_uri):
+    """Un cold start en un intérprete nuevo; devuelve imports, árbol de init y totales"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'cold_start.json')
+        command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', output]
+        if not mongodb_uri:
+            command.append('--child-mongomock')
+        process = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"El cold start falló:\n{process.stderr[-3000:]}")
+        with open(output, encoding='utf-8') as f:
+            result = json.load(f)
+
+    imports = [node for node in parse_importtime(process.stderr) if node['nombre'] == 'lambda_function']
+    result['imports'] = imports[0] if imports else None
+    result['total_us'] = result['import_us'] + result['init']['acumulado_us']
+    return result
+
+
+def profile_cold_start(runs=3, mongodb_uri=None, extra_env=()):
+    """
+    Corre `runs` cold starts y devuelve la corrida mediana con el resumen por etapa
+
+    Args:
+        runs: Intérpretes nuevos a medir
+        mongodb_uri: mongod real (None: mongomock)
+        extra_env: Variables CLAVE=VALOR de la configuración a medir
+    """
+    env = dict(os.environ)
+    env.update({
+        'GEMINI_API_KEY': env.get('GEMINI_API_KEY') or 'cold-start',
+        'MONGODB_CONNECTION_STRING': mongodb_uri or 'mongodb://localhost',
+        'MONGODB_DATABASE': f'boletin_cold_start_{os.getpid()}',
+        'MONGODB_COLLECTION': 'analisis'
+    })
+    env.update(setting.split('=', 1) for setting in extra_env)
+
+    results = sorted((run_once(env, mongodb_uri) for _ in range(runs)), key=lambda result: result['total_us'])
+    median = results[len(results) // 2]
+    watched = find_imports([median['imports']] if median['imports'] else [], WATCHED_IMPORTS)
+    services = sum(node['acumulado_us'] for node in (median['imports'] or {}).get('hijos', [])
+                   if node['nombre'].startswith('services.'))
+
+    if mongodb_uri:
+        from pymongo import MongoClient
+        with MongoClient(mongodb_uri) as client:
+            client.drop_database(env['MONGODB_DATABASE'])
+
+    return {
+        'corridas': runs,
+        'total_ms': round(median['total_us'] / 1000, 1),
+        'total_ms_min': round(results[0]['total_us'] / 1000, 1),
+        'total_ms_max': round(results[-1]['total_us'] / 1000, 1),
+        'imports_ms': round(median['import_us'] / 1000, 1),
+        'initialize_services_ms': round(median['init']['acumulado_us'] / 1000, 1),
+        'imports_por_modulo_ms': dict(
+            {name: round(us / 1000, 1) for name, us in watched.items()},
+            **{'services.*': round(services / 1000, 1)}
+        ),
+        'mongodb': 'mongod' if mongodb_uri else 'mongomock',
+        'arbol': {'imports': median['imports'], 'init': median['init']}
+    }
+
+
+def flame_lines(node, total_us, min_us, depth=0, width=40):
+    """Árbol indentado con el tiempo acumulado y una barra proporcional al total"""
+    lines = []
+    if node['acumulado_us'] < min_us:
+        return lines
+    bar = '█' * max(1, round(width * node['acumulado_us'] / total_us)) if total_us else ''
+    lines.append(f"{node['acumulado_us'] / 1000:9.1f} ms  {bar:<{width}}  {'  ' * depth}{node['nombre']}")
+    for child_node in sorted(node['hijos'], key=lambda n: -n['acumulado_us']):
+        lines.extend(flame_lines(child_node, total_us, min_us, depth + 1, width))
+    return lines
+
+
+def collapsed_stacks(node, prefix=()):
+    """Stacks colapsados con el tiempo propio de cada nodo (formato de flamegraph.pl)"""
+    path = prefix + (node['nombre'],)
+    own = node.get('propio_us', node['acumulado_us'] - sum(child['acumulado_us'] for child in node['hijos']))
+    lines = [f"{';'.join(path)} {max(0, own)}"]
+    for child_node in node['hijos']:
+        lines.extend(collapsed_stacks(child_node, path))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='Intérpretes nuevos a medir (se informa la mediana)')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('COLD_START_BUDGET_MS', '0')),
+                        help='Presupuesto del total; se supera: código de salida 1 (0: sin presupuesto)')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='Nodos más chicos no se muestran en el árbol')
+    parser.add_argument('--collapsed', help='Archivo de stacks colapsados para flamegraph.pl/speedscope')
+    parser.add_argument('--json', action='store_true', help='Resumen en JSON en lugar del árbol')
+    parser.add_argument('--mongodb-uri', help='mongod local en lugar de mongomock')
+    parser.add_argument('--env', action='append', default=[], metavar='CLAVE=VALOR',
+                        help='Variable de entorno de la configuración a medir (repetible)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-mongomock', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.child_mongomock)
+        return
+
+    report = profile_cold_start(args.runs, args.mongodb_uri, args.env)
+    tree = report.pop('arbol')
+    root = {'nombre': 'cold_start', 'acumulado_us': int(report['total_ms'] * 1000),
+            'hijos': [node for node in (tree['imports'], tree['init']) if node]}
+
+    if args.collapsed:
+        with open(args.collapsed, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(collapsed_stacks(root)) + '\n')
+
+    over_budget = bool(args.budget_ms) and report['total_ms'] > args.budget_ms
+    report['presupuesto_ms'] = args.budget_ms or None
+    report['excede_presupuesto'] = over_budget
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print('\n'.join(flame_lines(root, root['acumulado_us'], args.min_ms * 1000)))
+        print()
+        print(json.dumps({key: value for key, value in report.items()}, ensure_ascii=False))
+
+    if over_budget:
+        print(f"Cold start de {report['total_ms']} ms supera el presupuesto de {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Benchmark de punta a punta de lambda_handler, sin red.
+
+Gemini es el cliente falso de tests/fakes.py (latencia y chunks configurables), el
+sitio del Boletín Oficial es FakeBoletinServer en un puerto local y MongoDB es
+mongomock (o un mongod local con --mongodb-uri). Mide p50/p95/p99 y la memoria
+asignada por request en cuatro caminos:
+
+    cache_hit    análisis ya guardado
+    cache_miss   fecha nueva: descarga del PDF, análisis y guardado
+    reanalisis   forzar_reanalisis sobre una fecha guardada
+    opiniones    get_expert_opinions con forzar_actualizacion
+
+Con --cassette las respuestas de Gemini y el PDF salen de una cassette grabada con
+scripts/perf/cassette.py en lugar de las respuestas sintéticas.
+
+Cada corrida se agrega al historial (JSONL) y se compara con la última corrida de
+la misma configuración. Con --cold-start-budget-ms también se mide el cold start en
+intérpretes nuevos (scripts/perf/cold_start.py) y la corrida falla si lo supera.
+
+Uso:
+    python scripts/perf/e2e_benchmark.py --iterations 50 --ttft 0.05
+    python scripts/perf/e2e_benchmark.py --env LOCAL_CACHE_ENABLED=true
+    python scripts/perf/e2e_benchmark.py --cold-start-budget-ms 1500
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from cold_start import profile_cold_start  # noqa: E402
+from tests.cassettes import Cassette, ReplayGenaiClient  # noqa: E402
+from tests.conftest import MockLambdaContext  # noqa: E402
+from tests.fakes import FakeBoletinServer, FakeGenaiClient  # noqa: E402
+from utils.edition_calendar import edition_dates  # noqa: E402
+
+ANALYSIS_JSON = json.dumps({
+    'resumen': 'Se publicaron decretos y resoluciones de la administración pública nacional.',
+    'cambios_principales': [
+        {'tipo': 'decreto', 'numero': f'{n}/2025', 'titulo': f'Decreto {n}', 'resumen': 'Modifica el régimen',
+         'impacto': 'alto' if n % 3 == 0 else 'medio'}
+        for n in range(1, 13)
+    ],
+    'impacto_estimado': 'Impacto moderado en el sector público',
+    'areas_afectadas': ['administrativo', 'laboral', 'tributario']
+}, ensure_ascii=False)
+
+OPINIONS_JSON = json.dumps([
+    {'medio': medio, 'url': f'https://{medio.lower()}.example/nota', 'autor': 'Redacción',
+     'titulo': f'Análisis en {medio}', 'opinion_resumen': 'Opinión sobre los cambios', 'relevancia': 'alta'}
+    for medio in ('Infobae', 'Clarin', 'LaNacion', 'Ambito')
+], ensure_ascii=False)
+
+PATHS = ('cache_hit', 'cache_miss', 'reanalisis', 'opiniones')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def fake_response(model, contents, config):
+    """El análisis lleva el PDF adjunto; la búsqueda de opiniones no"""
+    for content in contents:
+        for part in getattr(content, 'parts', None) or []:
+            if part.inline_data is not None or part.file_data is not None:
+                return ANALYSIS_JSON
+    return OPINIONS_JSON
+
+
+def api_event(body):
+    return {
+        'httpMethod': 'POST',
+        'body': json.dumps(body),
+        'headers': {'Content-Type': 'application/json'},
+        'requestContext': {'identity': {'sourceIp': '127.0.0.1'}}
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Bench:
+    """Lambda configurada contra los dobles locales"""
+
+    def __init__(self, args, site):
+        os.environ.update({
+            'GEMINI_API_KEY': 'benchmark',
+            'MONGODB_CONNECTION_STRING': args.mongodb_uri or 'mongodb://localhost',
+            'MONGODB_DATABASE': f'boletin_benchmark_{os.getpid()}',
+            'MONGODB_COLLECTION': 'analisis',
+            'BOLETIN_BASE_URL': site.url,
+            'BOLETIN_SESSION_DELAY_SECONDS': str(args.session_delay)
+        })
+        for setting in args.env:
+            key, _, value = setting.partition('=')
+            os.environ[key] = value
+
+        if not args.mongodb_uri:
+            import mongomock
+            from services import database_service as database_module
+            database_module.MongoClient = mongomock.MongoClient
+
+        import lambda_function
+        self.lambda_function = lambda_function
+        self.context = MockLambdaContext(remaining_time_in_millis=900000)
+        with contextlib.redirect_stdout(io.StringIO()):
+            lambda_function.initialize_services()
+        if args.cassette:
+            lambda_function.llm_service.client = ReplayGenaiClient(Cassette.load(args.cassette),
+                                                                   speed=args.replay_speed, loop=True)
+        else:
+            lambda_function.llm_service.client = FakeGenaiClient(
+                fake_response, chunk_size=args.chunk_size,
+                latency_sampler=lambda: (args.ttft, args.chunk_delay)
+            )
+
+        self._fresh_dates = iter(reversed(edition_dates('2015-01-01', '2025-12-31')))
+        self.saved_date = None
+
+    def fresh_date(self):
+        return next(self._fresh_dates)
+
+    def request(self, body):
+        """Invoca la Lambda y devuelve los segundos que tardó (falla si el request no salió bien)"""
+        event = api_event(body)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            response = self.lambda_function.lambda_handler(event, self.context)
+            elapsed = time.perf_counter() - start
+        data = json.loads(response['body']).get('data') or {}
+        if response['statusCode'] != 200 or data.get('error'):
+            raise RuntimeError(f"Request fallido ({response['statusCode']}): {response['body'][:300]}")
+        return elapsed
+
+    def body_for(self, path):
+        if path == 'cache_hit':
+            return {'action': 'analyze_boletin', 'fecha': self.saved_date}
+        if path == 'cache_miss':
+            return {'action': 'analyze_boletin', 'fecha': self.fresh_date()}
+        if path == 'reanalisis':
+            return {'action': 'analyze_boletin', 'fecha': self.saved_date, 'forzar_reanalisis': True}
+        return {'action': 'get_expert_opinions', 'fecha': self.saved_date, 'forzar_actualizacion': True}
+
+
+def measure(bench, path, iterations, alloc_iterations):
+    latencies = [bench.request(bench.body_for(path)) for _ in range(iterations)]
+
+    # tracemalloc frena la ejecución: la memoria se mide en requests aparte
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            body = bench.body_for(path)
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            bench.request(body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'iteraciones': iterations,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+    }
+    if peaks:
+        result['memoria_pico_kib_p50'] = round(percentile(peaks, 50) / 1024, 1)
+    return result
+
+
+def compare(previous, current):
+    """Variación porcentual contra la corrida anterior de la misma configuración"""
+    deltas = {}
+    for path, stats in current['caminos'].items():
+        before = previous['caminos'].get(path)
+        if not before:
+            continue
+        deltas[path] = {
+            metric: round(100.0 * (stats[metric] - before[metric]) / before[metric], 1)
+            for metric in ('p50_ms', 'p95_ms', 'memoria_pico_kib_p50')
+            if before.get(metric) and metric in stats
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=30, help='Requests medidos por camino')
+    parser.add_argument('--alloc-iterations', type=int, default=5, help='Requests extra con tracemalloc por camino')
+    parser.add_argument('--paths', nargs='+', choices=PATHS, default=list(PATHS))
+    parser.add_argument('--ttft', type=float, default=0.02, help='Segundos hasta el primer chunk de Gemini')
+    parser.add_argument('--chunk-delay', type=float, default=0.001, help='Segundos entre chunks de Gemini')
+    parser.add_argument('--chunk-size', type=int, default=200, help='Caracteres por chunk de Gemini')
+    parser.add_argument('--site-latency', type=float, default=0.0, help='Segundos por respuesta del sitio falso')
+    parser.add_argument('--session-delay', type=float, default=0.0,
+                        help='BOLETIN_SESSION_DELAY_SECONDS (1 en producción)')
+    parser.add_argument('--cassette', help='Reproducir Gemini y el PDF desde una cassette (.json.gz)')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help='Velocidad de la cassette (1: tiempos originales, 0: sin esperas)')
+    parser.add_argument('--mongodb-uri', help='mongod local en lugar de mongomock')
+    parser.add_argument('--env', action='append', default=[], metavar='CLAVE=VALOR',
+                        help='Variable de entorno de la configuración a medir (repetible)')
+    parser.add_argument('--cold-start-budget-ms', type=float, default=float(os.getenv('COLD_START_BUDGET_MS', '0')),
+                        help='Presupuesto del cold start (imports + initialize_services); 0: no se mide')
+    parser.add_argument('--cold-start-runs', type=int, default=3, help='Intérpretes nuevos para el cold start')
+    parser.add_argument('--label', default='default', help='Nombre de la configuración en el historial')
+    parser.add_argument('--history', default=os.path.join(ROOT, 'scripts', 'perf', 'results', 'e2e_history.jsonl'),
+                        help="Historial JSONL ('' para no guardar)")
+    args = parser.parse_args()
+
+    # Los eventos de cada request no interesan aquí, sólo el resumen
+    logging.getLogger('utils.error_handler').setLevel(logging.WARNING)
+
+    site_options = {'latency': args.site_latency}
+    if args.cassette:
+        recorded_pdfs = [pdf for pdf in Cassette.load(args.cassette).pdfs.values() if pdf]
+        site_options['pdf_bytes'] = base64.b64decode(recorded_pdfs[0])
+
+    with FakeBoletinServer(**site_options) as site:
+        bench = Bench(args, site)
+        bench.saved_date = bench.fresh_date()
+        bench.request({'action': 'analyze_boletin', 'fecha': bench.saved_date})
+
+        record = {
+            'fecha_hora': datetime.utcnow().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'configuracion': args.label,
+            'parametros': {
+                'ttft': args.ttft, 'chunk_delay': args.chunk_delay, 'chunk_size': args.chunk_size,
+                'site_latency': args.site_latency, 'session_delay': args.session_delay,
+                'mongodb': 'mongod' if args.mongodb_uri else 'mongomock', 'env': args.env,
+                'cassette': args.cassette, 'replay_speed': args.replay_speed if args.cassette else None
+            },
+            'caminos': {path: measure(bench, path, args.iterations, args.alloc_iterations) for path in args.paths}
+        }
+
+    if args.cold_start_budget_ms:
+        cold_start = profile_cold_start(args.cold_start_runs, args.mongodb_uri, args.env)
+        cold_start.pop('arbol')
+        cold_start['presupuesto_ms'] = args.cold_start_budget_ms
+        cold_start['excede_presupuesto'] = cold_start['total_ms'] > args.cold_start_budget_ms
+        record['cold_start'] = cold_start
+
+    previous = None
+    if args.history and os.path.exists(args.history):
+        with open(args.history, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get('configuracion') == record['configuracion'] and entry.get('parametros') == record['parametros']:
+                    previous = entry
+    if previous:
+        record['variacion_pct'] = compare(previous, record)
+        record['comparado_con'] = previous.get('commit')
+
+    if args.history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+
+    if record.get('cold_start', {}).get('excede_presupuesto'):
+        print(f"Cold start de {record['cold_start']['total_ms']} ms supera el presupuesto de "
+              f"{args.cold_start_budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compara la latencia de cola de llamadas a Gemini con y sin hedging.
+
+Usa el cliente falso de tests/fakes.py con una distribución de latencias de
+cola pesada (la mayoría de las llamadas rápidas y un porcentaje de rezagadas),
+así que no consume cuota ni necesita red.
+
+Uso:
+    python scripts/perf/hedging_benchmark.py --calls 400 --straggler-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+from services.hedging import HedgingPolicy  # noqa: E402
+from services.llm_service_direct import LLMAnalysisServiceDirect  # noqa: E402
+from tests.fakes import FakeGenaiClient  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def make_sampler(rng, base_ttft, straggler_rate, straggler_factor):
+    def sample():
+        ttft = rng.lognormvariate(0, 0.25) * base_ttft
+        if rng.random() < straggler_rate:
+            ttft *= straggler_factor
+        return ttft, base_ttft / 20
+    return sample
+
+
+def run(hedged, args):
+    rng = random.Random(args.seed)
+    service = LLMAnalysisServiceDirect()
+    service.client = FakeGenaiClient('x' * 2000, chunk_size=200,
+                                     latency_sampler=make_sampler(rng, args.base_ttft,
+                                                                  args.straggler_rate, args.straggler_factor))
+    service.hedging = HedgingPolicy(enabled=hedged, percentile=args.percentile,
+                                    ttft_delay=args.base_ttft * 3, total_delay=args.base_ttft * 10,
+                                    max_ratio=args.max_ratio, min_samples=20)
+
+    def one_call(_):
+        start = time.monotonic()
+        service._stream_generate([], None, operation='analisis')
+        return time.monotonic() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(one_call, range(args.calls)))
+
+    return {
+        'modo': 'hedged' if hedged else 'unhedged',
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'llamadas_gemini': service.client.calls,
+        'llamadas_extra_pct': round(100.0 * (service.client.calls - args.calls) / args.calls, 1),
+        'hedge_wins': service.hedging.stats['hedge_wins']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--base-ttft', type=float, default=0.05, help='Segundos hasta el primer chunk (mediana)')
+    parser.add_argument('--straggler-rate', type=float, default=0.05)
+    parser.add_argument('--straggler-factor', type=float, default=10.0)
+    parser.add_argument('--percentile', type=float, default=95)
+    parser.add_argument('--max-ratio', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    # Los eventos llm_hedge_* se emiten por cada llamada; aquí sólo interesa el resumen
+    logging.getLogger('utils.error_handler').setLevel(logging.WARNING)
+
+    for hedged in (False, True):
+        print(json.dumps(run(hedged, args), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
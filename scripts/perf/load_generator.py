@@ -0,0 +1,283 @@
+"""
+Generador de carga que simula muchos contenedores Lambda calientes a la vez.
+
+Cada worker es un proceso aparte que importa lambda_function, como un contenedor:
+tiene sus propios singletons (MongoDBService, LLM service, caches) y atiende un
+request por vez. Todos los workers empiezan juntos (después de su cold start) y
+piden fechas con una popularidad realista: la edición del día es la más pedida y
+el interés cae con la antigüedad (distribución de Zipf sobre los últimos días).
+
+Gemini es el cliente falso de tests/fakes.py y el sitio del Boletín es un
+FakeBoletinServer compartido por todos los workers, que cuenta cuántas veces se
+pidió cada edición: cada pedido de más es un análisis duplicado. Para que los
+contenedores compartan la base hace falta un mongod local (--mongodb-uri); con
+mongomock cada worker tiene su propia base.
+
+Informa throughput, percentiles de latencia (total, hits y misses), conexiones a
+MongoDB (pool de cada contenedor y, con mongod, las del servidor) y análisis
+duplicados.
+
+Uso:
+    python scripts/perf/load_generator.py --workers 16 --duration 30 --mongodb-uri mongodb://localhost:27017
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from e2e_benchmark import api_event, fake_response, percentile  # noqa: E402
+from tests.conftest import MockLambdaContext  # noqa: E402
+from tests.fakes import FakeBoletinServer, FakeGenaiClient  # noqa: E402
+from utils.edition_calendar import edition_dates  # noqa: E402
+
+
+def popular_dates(hoy, days, zipf):
+    """Fechas con edición de los últimos `days` días (la más reciente primero) y su peso"""
+    desde = (datetime.strptime(hoy, '%Y-%m-%d') - timedelta(days=days)).strftime('%Y-%m-%d')
+    dates = list(reversed(edition_dates(desde, hoy)))
+    return dates, [1.0 / (rank + 1) ** zipf for rank in range(len(dates))]
+
+
+def pick_action(rng, mix):
+    value = rng.random()
+    for action, share in mix:
+        value -= share
+        if value <= 0:
+            return action
+    return mix[-1][0]
+
+
+class PoolCounter:
+    """Conexiones del pool de pymongo del contenedor (creadas y en uso a la vez)"""
+
+    def __init__(self):
+        from pymongo import monitoring
+
+        class Listener(monitoring.ConnectionPoolListener):
+            def __init__(self, counter):
+                self.counter = counter
+
+            def connection_created(self, event):
+                self.counter._update(created=1)
+
+            def connection_checked_out(self, event):
+                self.counter._update(in_use=1)
+
+            def connection_checked_in(self, event):
+                self.counter._update(in_use=-1)
+
+            def pool_created(self, event): pass
+            def pool_ready(self, event): pass
+            def pool_cleared(self, event): pass
+            def pool_closed(self, event): pass
+            def connection_ready(self, event): pass
+            def connection_closed(self, event): pass
+            def connection_check_out_started(self, event): pass
+            def connection_check_out_failed(self, event): pass
+
+        self.created = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self._lock = threading.Lock()
+        monitoring.register(Listener(self))
+
+    def _update(self, created=0, in_use=0):
+        with self._lock:
+            self.created += created
+            self.in_use += in_use
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+
+def run_worker(index, config, barrier, results):
+    """Un "contenedor": cold start, espera a los demás y atiende requests hasta el final de la prueba"""
+    os.environ.update(config['env'])
+    logging.getLogger('utils.error_handler').setLevel(logging.WARNING)
+    pool = PoolCounter()
+
+    if not config['mongodb_uri']:
+        import mongomock
+        from services import database_service as database_module
+        database_module.MongoClient = mongomock.MongoClient
+
+    cold_start = time.perf_counter()
+    import lambda_function
+    with contextlib.redirect_stdout(io.StringIO()):
+        lambda_function.initialize_services()
+    lambda_function.llm_service.client = FakeGenaiClient(
+        fake_response, latency_sampler=lambda: (config['ttft'], config['chunk_delay'])
+    )
+    cold_start = time.perf_counter() - cold_start
+
+    rng = random.Random(config['seed'] + index)
+    dates, weights = popular_dates(config['hoy'], config['days'], config['zipf'])
+    context = MockLambdaContext(remaining_time_in_millis=900000)
+    requests = []
+
+    barrier.wait()
+    deadline = time.monotonic() + config['duration']
+    while time.monotonic() < deadline:
+        fecha = rng.choices(dates, weights)[0]
+        body = {'action': pick_action(rng, config['mix']), 'fecha': fecha}
+        event = api_event(body)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            response = lambda_function.lambda_handler(event, context)
+            elapsed = time.perf_counter() - start
+        data = json.loads(response['body']).get('data') or {}
+        ok = response['statusCode'] == 200 and not data.get('error')
+        requests.append((elapsed, ok, bool((data.get('metadatos') or {}).get('desde_cache'))))
+        if config['think_time']:
+            time.sleep(rng.expovariate(1.0 / config['think_time']))
+
+    # Espera las escrituras diferidas antes de salir, si están habilitadas
+    if lambda_function.write_behind is not None:
+        lambda_function.write_behind.wait(timeout=10)
+
+    results.put({
+        'worker': index,
+        'cold_start_s': cold_start,
+        'requests': requests,
+        'pool_conexiones_creadas': pool.created,
+        'pool_en_uso_max': pool.max_in_use
+    })
+
+
+def sample_server_connections(uri, stop, peak):
+    """Máximo de conexiones abiertas en el mongod durante la prueba"""
+    from pymongo import MongoClient
+    client = MongoClient(uri, serverSelectionTimeoutMS=2000)
+    try:
+        while not stop.is_set():
+            current = client.admin.command('serverStatus')['connections']['current']
+            peak['max'] = max(peak.get('max', 0), current)
+            stop.wait(0.25)
+    except Exception as e:
+        peak['error'] = str(e)
+    finally:
+        client.close()
+
+
+def summarize(latencies):
+    if not latencies:
+        return None
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8, help='Contenedores simulados (procesos)')
+    parser.add_argument('--duration', type=float, default=20, help='Segundos de carga')
+    parser.add_argument('--hoy', help='Fecha de la edición más reciente (default: hoy)')
+    parser.add_argument('--days', type=int, default=30, help='Días hacia atrás que se piden')
+    parser.add_argument('--zipf', type=float, default=1.3, help='Exponente de popularidad (mayor: más concentrado en hoy)')
+    parser.add_argument('--mix', default='analyze_boletin:0.7,analyze_all:0.3',
+                        help='Acciones y su proporción')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Pausa media entre requests de un contenedor (s)')
+    parser.add_argument('--ttft', type=float, default=0.3, help='Segundos hasta el primer chunk de Gemini')
+    parser.add_argument('--chunk-delay', type=float, default=0.005)
+    parser.add_argument('--site-latency', type=float, default=0.02, help='Segundos por respuesta del sitio falso')
+    parser.add_argument('--mongodb-uri', help='mongod compartido por los workers (default: mongomock por worker)')
+    parser.add_argument('--env', action='append', default=[], metavar='CLAVE=VALOR',
+                        help='Variable de entorno de la configuración a medir (repetible)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    hoy = args.hoy or edition_dates((datetime.now() - timedelta(days=10)).strftime('%Y-%m-%d'),
+                                    datetime.now().strftime('%Y-%m-%d'))[-1]
+    mix = [(action, float(share)) for action, share in (item.split(':') for item in args.mix.split(','))]
+    database = f'boletin_load_{os.getpid()}'
+
+    with FakeBoletinServer(latency=args.site_latency) as site:
+        env = {
+            'GEMINI_API_KEY': 'load-test',
+            'MONGODB_CONNECTION_STRING': args.mongodb_uri or 'mongodb://localhost',
+            'MONGODB_DATABASE': database,
+            'MONGODB_COLLECTION': 'analisis',
+            'BOLETIN_BASE_URL': site.url,
+            'BOLETIN_SESSION_DELAY_SECONDS': '0'
+        }
+        env.update(setting.split('=', 1) for setting in args.env)
+        config = {
+            'env': env, 'mongodb_uri': args.mongodb_uri, 'hoy': hoy, 'days': args.days, 'zipf': args.zipf,
+            'mix': mix, 'think_time': args.think_time, 'ttft': args.ttft, 'chunk_delay': args.chunk_delay,
+            'duration': args.duration, 'seed': args.seed
+        }
+
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(args.workers + 1)
+        results = ctx.Queue()
+        workers = [ctx.Process(target=run_worker, args=(i, config, barrier, results)) for i in range(args.workers)]
+        for worker in workers:
+            worker.start()
+
+        stop = threading.Event()
+        server_connections = {}
+        sampler = None
+        barrier.wait()
+        started = time.monotonic()
+        if args.mongodb_uri:
+            sampler = threading.Thread(target=sample_server_connections,
+                                       args=(args.mongodb_uri, stop, server_connections), daemon=True)
+            sampler.start()
+
+        reports = [results.get() for _ in workers]
+        elapsed = time.monotonic() - started
+        stop.set()
+        for worker in workers:
+            worker.join()
+        editions = dict(site.editions)
+
+    if args.mongodb_uri:
+        from pymongo import MongoClient
+        with MongoClient(args.mongodb_uri) as client:
+            client.drop_database(database)
+
+    requests = [request for report in reports for request in report['requests']]
+    duplicated = {fecha: count - 1 for fecha, count in editions.items() if count > 1}
+    print(json.dumps({
+        'contenedores': args.workers,
+        'duracion_s': round(elapsed, 1),
+        'requests': len(requests),
+        'throughput_rps': round(len(requests) / elapsed, 1) if elapsed else None,
+        'errores': sum(1 for _, ok, _ in requests if not ok),
+        'latencia': summarize([latency for latency, _, _ in requests]),
+        'latencia_cache_hit': summarize([latency for latency, ok, hit in requests if ok and hit]),
+        'latencia_cache_miss': summarize([latency for latency, ok, hit in requests if ok and not hit]),
+        'cold_start_p50_ms': round(percentile([r['cold_start_s'] for r in reports], 50) * 1000, 1),
+        'mongodb': {
+            'backend': 'mongod' if args.mongodb_uri else 'mongomock (una base por contenedor)',
+            'pool_conexiones_creadas_total': sum(r['pool_conexiones_creadas'] for r in reports),
+            'pool_en_uso_max_por_contenedor': max(r['pool_en_uso_max'] for r in reports),
+            'servidor_conexiones_max': server_connections.get('max'),
+        },
+        'duplicados': {
+            'ediciones_analizadas': len(editions),
+            'analisis_duplicados': sum(duplicated.values()),
+            'fechas_con_duplicados': len(duplicated),
+            'mas_duplicada': max(duplicated, key=duplicated.get) if duplicated else None
+        },
+        'fecha_mas_reciente': hoy,
+        'configuracion': {'mix': args.mix, 'zipf': args.zipf, 'days': args.days, 'env': args.env}
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
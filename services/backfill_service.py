@@ -0,0 +1,249 @@
+"""
+Batch backfill of historical bulletin editions.
+Plans the publication days of a date range, skips editions already analysed
+(one $in query), downloads PDFs with bounded concurrency and feeds them to
+analysis workers through a bounded work queue. Results are written with bulk
+upserts and a checkpoint document lets an interrupted run resume.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from services.llm_service_direct import EditionNotAvailableError
+from utils.edition_calendar import edition_dates
+from utils.error_handler import error_handler
+
+# Outcome of a date that was not processed because the run was stopped
+_SKIPPED = 'omitida'
+# Error of a date the site has no edition for (an unlisted holiday): never retried
+_NO_EDITION = 'sin_edicion'
+
+
+class BackfillService:
+    """Runs the analysis over a date range with checkpointing."""
+
+    def __init__(self, database_service, llm_service,
+                 prepare_document: Callable[[str, Dict[str, Any], list], Dict[str, Any]],
+                 fetch_concurrency: Optional[int] = None, analysis_concurrency: Optional[int] = None,
+                 batch_size: Optional[int] = None, max_attempts: Optional[int] = None):
+        """
+        Args:
+            database_service: MongoDBService instance
+            llm_service: LLMAnalysisServiceDirect instance
+            prepare_document: Builds the document to save from (fecha, analysis, call_log)
+            fetch_concurrency: Concurrent PDF downloads (BACKFILL_FETCH_CONCURRENCY)
+            analysis_concurrency: Concurrent Gemini analyses (BACKFILL_ANALYSIS_CONCURRENCY)
+            batch_size: Analyses per bulk write (BACKFILL_BATCH_SIZE)
+            max_attempts: Failed dates are retried by later runs up to this many times (BACKFILL_MAX_ATTEMPTS)
+        """
+        self.database_service = database_service
+        self.llm_service = llm_service
+        self.prepare_document = prepare_document
+        self.fetch_concurrency = (int(os.getenv('BACKFILL_FETCH_CONCURRENCY', '4'))
+                                  if fetch_concurrency is None else fetch_concurrency)
+        self.analysis_concurrency = (int(os.getenv('BACKFILL_ANALYSIS_CONCURRENCY', '2'))
+                                     if analysis_concurrency is None else analysis_concurrency)
+        self.batch_size = int(os.getenv('BACKFILL_BATCH_SIZE', '10')) if batch_size is None else batch_size
+        self.max_attempts = int(os.getenv('BACKFILL_MAX_ATTEMPTS', '3')) if max_attempts is None else max_attempts
+        self._checkpoints = database_service.get_collection(
+            os.getenv('MONGODB_BACKFILL_COLLECTION', 'backfill_checkpoints')
+        )
+
+    def _load_checkpoint(self, run_id: str, fecha_desde: str, fecha_hasta: str) -> Dict[str, Any]:
+        checkpoint = self._checkpoints.find_one_and_update(
+            {'_id': run_id},
+            {
+                '$setOnInsert': {
+                    'fecha_desde': fecha_desde,
+                    'fecha_hasta': fecha_hasta,
+                    'creado_en': datetime.utcnow(),
+                    'completadas': [],
+                    'fallidas': {}
+                },
+                '$set': {'estado': 'en_progreso', 'actualizado_en': datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=True
+        )
+        return checkpoint
+
+    def _save_checkpoint(self, run_id: str, completed: List[str], failures: Dict[str, Dict[str, Any]]):
+        update: Dict[str, Any] = {'$set': {'actualizado_en': datetime.utcnow()}}
+        if completed:
+            update['$addToSet'] = {'completadas': {'$each': completed}}
+            update['$unset'] = {f'fallidas.{fecha}': '' for fecha in completed}
+        for fecha, failure in failures.items():
+            update['$set'][f'fallidas.{fecha}'] = failure
+        self._checkpoints.update_one({'_id': run_id}, update)
+
+    def run(self, fecha_desde: str, fecha_hasta: str, should_stop: Optional[Callable[[], bool]] = None,
+            run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyse every pending edition of the range.
+
+        Args:
+            fecha_desde: First date (YYYY-MM-DD)
+            fecha_hasta: Last date (YYYY-MM-DD)
+            should_stop: Checked before and after each download and before each analysis;
+                once true, the analyses in progress are saved as they finish and the
+                remaining dates (downloaded or not) are left for the next run
+            run_id: Checkpoint id (default: the range), reuse it to resume
+
+        Returns:
+            dict: Run summary
+        """
+        run_id = run_id or f'{fecha_desde}_{fecha_hasta}'
+        should_stop = should_stop or (lambda: False)
+
+        planned = edition_dates(fecha_desde, fecha_hasta)
+        checkpoint = self._load_checkpoint(run_id, fecha_desde, fecha_hasta)
+        previous_failures = checkpoint.get('fallidas', {})
+        existing = self.database_service.get_existing_dates(planned) if planned else set()
+
+        exhausted = {fecha for fecha, info in previous_failures.items()
+                     if info.get('intentos', 0) >= self.max_attempts}
+        pending = [fecha for fecha in planned if fecha not in existing and fecha not in exhausted]
+
+        error_handler.log_info('backfill_started', {
+            'run_id': run_id,
+            'planned': len(planned),
+            'already_analysed': len(existing),
+            'exhausted_failures': len(exhausted),
+            'pending': len(pending)
+        })
+
+        work = queue.Queue(maxsize=max(1, self.analysis_concurrency) * 2)
+        results = queue.Queue()
+        stop = threading.Event()
+
+        def _stopping() -> bool:
+            if stop.is_set() or should_stop():
+                stop.set()
+                return True
+            return False
+
+        def _fetch(fecha: str):
+            if _stopping():
+                results.put((fecha, _SKIPPED, None, None))
+                return
+            try:
+                pdf_part = self.llm_service.fetch_pdf_part(fecha)
+            except EditionNotAvailableError:
+                results.put((fecha, None, None, _NO_EDITION))
+                return
+            except Exception as e:
+                results.put((fecha, None, None, f'descarga: {e}'))
+                return
+            if _stopping():
+                results.put((fecha, _SKIPPED, None, None))
+                return
+            # Blocks while the analysis workers are behind (bounded queue)
+            work.put((fecha, pdf_part))
+
+        def _analyse():
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                fecha, pdf_part = item
+                # PDFs queued before the stop are left for the next run, not analysed
+                if _stopping():
+                    results.put((fecha, _SKIPPED, None, None))
+                    continue
+                call_log = []
+                try:
+                    analysis = self.llm_service.analyze_normativa(fecha, call_log=call_log, pdf_part=pdf_part)
+                except Exception as e:
+                    analysis = {'error': True, 'error_message': str(e)}
+                if analysis.get('sin_edicion'):
+                    results.put((fecha, None, call_log, _NO_EDITION))
+                elif analysis.get('error', False):
+                    results.put((fecha, None, call_log, analysis.get('error_message', 'error de análisis')))
+                else:
+                    results.put((fecha, analysis, call_log, None))
+
+        workers = [threading.Thread(target=_analyse, daemon=True, name=f'backfill-analysis-{i}')
+                   for i in range(max(1, self.analysis_concurrency))]
+        for worker in workers:
+            worker.start()
+
+        analysed, failed, skipped = [], {}, []
+        batch, batch_dates, batch_failures = [], [], {}
+
+        def _flush():
+            if batch:
+                self.database_service.bulk_save_analyses(batch)
+            self._save_checkpoint(run_id, list(batch_dates), dict(batch_failures))
+            batch.clear()
+            batch_dates.clear()
+            batch_failures.clear()
+
+        fetcher = ThreadPoolExecutor(max_workers=max(1, self.fetch_concurrency))
+        try:
+            for fecha in pending:
+                fetcher.submit(_fetch, fecha)
+
+            # Exactly one result per pending date
+            for _ in range(len(pending)):
+                fecha, analysis, call_log, error = results.get()
+                if analysis == _SKIPPED:
+                    skipped.append(fecha)
+                    continue
+                if error == _NO_EDITION:
+                    failed[fecha] = batch_failures[fecha] = {'intentos': self.max_attempts, 'error': error}
+                elif error is not None:
+                    attempts = previous_failures.get(fecha, {}).get('intentos', 0) + 1
+                    failed[fecha] = batch_failures[fecha] = {'intentos': attempts, 'error': error[:500]}
+                    error_handler.log_warning('backfill_date_failed', {'fecha': fecha, 'attempt': attempts, 'error': error})
+                else:
+                    document = self.prepare_document(fecha, analysis, call_log)
+                    pdf_handle = self.llm_service.get_pdf_handle(fecha)
+                    if pdf_handle:
+                        document['archivo_gemini'] = pdf_handle
+                    batch.append(document)
+                    batch_dates.append(fecha)
+                    analysed.append(fecha)
+
+                if len(batch) >= self.batch_size or len(batch_failures) >= self.batch_size:
+                    _flush()
+                elif stop.is_set() and (batch or batch_failures):
+                    # Little time is left: save each analysis as it finishes
+                    _flush()
+            _flush()
+        finally:
+            # On an early exit the remaining downloads are skipped instead of analysed
+            stop.set()
+            fetcher.shutdown(wait=True)
+            for _ in workers:
+                work.put(None)
+
+        retryable = [fecha for fecha, info in failed.items() if info['intentos'] < self.max_attempts]
+        complete = not skipped and not retryable
+        self._checkpoints.update_one({'_id': run_id}, {'$set': {
+            'estado': 'completado' if complete else 'en_progreso',
+            'actualizado_en': datetime.utcnow()
+        }})
+
+        summary = {
+            'run_id': run_id,
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'planificadas': len(planned),
+            'ya_analizadas': len(existing),
+            'analizadas': sorted(analysed),
+            'fallidas': {fecha: failed[fecha] for fecha in sorted(failed)},
+            'pendientes': sorted(skipped + retryable),
+            'completo': complete
+        }
+        error_handler.log_info('backfill_finished', {
+            'run_id': run_id,
+            'analysed': len(analysed),
+            'failed': len(failed),
+            'pending': len(summary['pendientes']),
+            'complete': complete
+        })
+        return summary
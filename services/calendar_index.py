@@ -0,0 +1,82 @@
+"""
+Month bitmaps of edition availability.
+One small document per month holds the days already analysed and the days
+with expert opinions as integer bitsets (bit d-1 is day d). The documents are
+updated with atomic $bit operations whenever an analysis is saved, so the
+calendar is read without loading any analysis.
+"""
+
+import calendar
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.edition_calendar import has_edition
+
+
+def month_key(fecha: str) -> str:
+    """'YYYY-MM' of a YYYY-MM-DD date."""
+    return fecha[:7]
+
+
+def day_bit(fecha: str) -> int:
+    """Bit of the day within its month bitset."""
+    return 1 << (int(fecha[8:10]) - 1)
+
+
+def month_dates(mes: str) -> List[str]:
+    """Every date (YYYY-MM-DD) of a month."""
+    year, month = (int(part) for part in mes.split('-'))
+    return [f'{mes}-{day:02d}' for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+
+def dates_to_bits(dates: Iterable[str]) -> int:
+    """Bitset of a set of dates of the same month."""
+    bits = 0
+    for fecha in dates:
+        bits |= day_bit(fecha)
+    return bits
+
+
+def bits_to_dates(mes: str, bits: int) -> List[str]:
+    """Dates of a month whose bit is set."""
+    return [fecha for fecha in month_dates(mes) if bits & day_bit(fecha)]
+
+
+def no_edition_bits(mes: str) -> int:
+    """Weekends and holidays of a month (see utils.edition_calendar)."""
+    return dates_to_bits(fecha for fecha in month_dates(mes) if not has_edition(fecha))
+
+
+def calendar_update(fecha: str, analizada: Optional[bool] = None,
+                    con_opiniones: Optional[bool] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Filter and $bit update that set or clear the day of a date.
+
+    Args:
+        fecha: Date (YYYY-MM-DD)
+        analizada: Set (True) or clear (False) the analysed bit; None leaves it as is
+        con_opiniones: Same for the expert opinions bit
+
+    Returns:
+        tuple: (filter, update) for the month document (only existing ones are updated)
+    """
+    bit = day_bit(fecha)
+    bit_ops = {}
+    for field, value in (('analizadas', analizada), ('con_opiniones', con_opiniones)):
+        if value is not None:
+            bit_ops[field] = {'or': bit} if value else {'and': ~bit}
+    update: Dict[str, Any] = {'$set': {'actualizado_en': datetime.utcnow()}}
+    if bit_ops:
+        update['$bit'] = bit_ops
+    return {'_id': month_key(fecha)}, update
+
+
+def format_month(mes: str, analizadas: int, con_opiniones: int, sin_edicion: int) -> Dict[str, Any]:
+    """Calendar entry of a month as returned by the API."""
+    return {
+        'mes': mes,
+        'dias': len(month_dates(mes)),
+        'analizadas': analizadas,
+        'con_opiniones': con_opiniones,
+        'sin_edicion': sin_edicion & ~analizadas
+    }
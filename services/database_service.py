@@ -4,7 +4,7 @@ Handles database connections, operations, and data validation.
 """
 
 import pymongo
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import (
     ConnectionFailure, 
     ServerSelectionTimeoutError, 
@@ -16,10 +16,180 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 import time
 import threading
+from services.calendar_index import calendar_update, dates_to_bits, month_dates
+from utils import metrics
 from utils.error_handler import error_handler, ErrorCode
 
 
-class MongoDBService:
+class AnalysisDocumentValidator:
+    """Validation helpers shared by the sync and async MongoDB services."""
+    
+    def _prepare_analysis_document(self, analysis_data: dict) -> dict:
+        """
+        Valida los datos del análisis y agrega los metadatos por defecto.
+        
+        Args:
+            analysis_data: Diccionario con los datos del análisis
+            
+        Returns:
+            dict: Documento listo para guardar
+        """
+        validated_data = self._validate_analysis_data(analysis_data)
+        
+        validated_data['metadatos'] = {
+            'fecha_creacion': datetime.utcnow(),
+            'version_analisis': '1.0',
+            'estado': 'completado',
+            **validated_data.get('metadatos', {})
+        }
+        
+        return validated_data
+    
+    def _validate_analysis_data(self, data: dict) -> dict:
+        """
+        Valida los datos del análisis según el esquema esperado.
+        
+        Args:
+            data: Datos del análisis a validar
+            
+        Returns:
+            dict: Datos validados y normalizados
+            
+        Raises:
+            ValueError: Si los datos no son válidos
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Los datos del análisis deben ser un diccionario")
+        
+        # Required fields
+        required_fields = ['fecha', 'seccion']
+        for field in required_fields:
+            if field not in data:
+                raise ValueError(f"Campo requerido faltante: {field}")
+        
+        # Validate date format
+        self._validate_date_format(data['fecha'])
+        
+        # Validate seccion
+        valid_sections = ['legislacion_avisos_oficiales']
+        if data['seccion'] not in valid_sections:
+            raise ValueError(f"Sección inválida: {data['seccion']}. Debe ser una de: {valid_sections}")
+        
+        # Create validated copy
+        validated_data = {
+            'fecha': data['fecha'],
+            'seccion': data['seccion'],
+            'pdf_url': data.get('pdf_url', ''),
+            'contenido_original': data.get('contenido_original', ''),
+            'analisis': data.get('analisis', {}),
+            'opiniones_expertos': data.get('opiniones_expertos', [])
+        }
+        
+        # Metadatos del llamador (modelo, tiempos y uso de tokens por llamada al LLM)
+        if isinstance(data.get('metadatos'), dict):
+            validated_data['metadatos'] = dict(data['metadatos'])
+        
+        # Handle del PDF subido a la Files API de Gemini (opcional)
+        if data.get('archivo_gemini'):
+            validated_data['archivo_gemini'] = self._validate_file_handle(data['archivo_gemini'])
+        
+        # Validate analisis structure if present
+        if validated_data['analisis']:
+            self._validate_analysis_structure(validated_data['analisis'])
+        
+        # Validate opiniones_expertos structure if present
+        if validated_data['opiniones_expertos']:
+            self._validate_opinions_structure(validated_data['opiniones_expertos'])
+        
+        return validated_data
+    
+    def _validate_date_format(self, date_str: str):
+        """
+        Valida que la fecha esté en formato YYYY-MM-DD.
+        
+        Args:
+            date_str: Fecha como string
+            
+        Raises:
+            ValueError: Si el formato de fecha es inválido
+        """
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Formato de fecha inválido: {date_str}. Debe ser YYYY-MM-DD")
+    
+    def _validate_analysis_structure(self, analisis: dict):
+        """
+        Valida la estructura del análisis.
+        
+        Args:
+            analisis: Diccionario con el análisis
+            
+        Raises:
+            ValueError: Si la estructura es inválida
+        """
+        if not isinstance(analisis, dict):
+            raise ValueError("El análisis debe ser un diccionario")
+        
+        # Optional but expected fields
+        expected_fields = ['resumen', 'cambios_principales', 'impacto_estimado', 'areas_afectadas']
+        
+        # Validate cambios_principales if present
+        if 'cambios_principales' in analisis:
+            if not isinstance(analisis['cambios_principales'], list):
+                raise ValueError("cambios_principales debe ser una lista")
+        
+        # Validate areas_afectadas if present
+        if 'areas_afectadas' in analisis:
+            if not isinstance(analisis['areas_afectadas'], list):
+                raise ValueError("areas_afectadas debe ser una lista")
+    
+    def _validate_file_handle(self, handle: dict) -> dict:
+        """
+        Valida el handle de un archivo subido a Gemini.
+        
+        Args:
+            handle: Diccionario con nombre, uri y expira_en del archivo
+            
+        Returns:
+            dict: Handle con sólo los campos conocidos
+            
+        Raises:
+            ValueError: Si el handle es inválido
+        """
+        if not isinstance(handle, dict) or not isinstance(handle.get('uri'), str):
+            raise ValueError("archivo_gemini debe ser un diccionario con 'uri'")
+        if not isinstance(handle.get('expira_en'), datetime):
+            raise ValueError("archivo_gemini.expira_en debe ser una fecha")
+        
+        known_fields = ['nombre', 'uri', 'mime_type', 'expira_en', 'bytes', 'paginas', 'instrumentos_estimados']
+        return {field: handle[field] for field in known_fields if field in handle}
+    
+    def _validate_opinions_structure(self, opiniones: list):
+        """
+        Valida la estructura de las opiniones de expertos.
+        
+        Args:
+            opiniones: Lista de opiniones
+            
+        Raises:
+            ValueError: Si la estructura es inválida
+        """
+        if not isinstance(opiniones, list):
+            raise ValueError("Las opiniones deben ser una lista")
+        
+        for i, opinion in enumerate(opiniones):
+            if not isinstance(opinion, dict):
+                raise ValueError(f"La opinión {i} debe ser un diccionario")
+            
+            # Check for expected fields
+            expected_fields = ['fuente', 'opinion', 'fecha_opinion', 'relevancia']
+            for field in expected_fields:
+                if field in opinion and not isinstance(opinion[field], str):
+                    raise ValueError(f"El campo {field} en la opinión {i} debe ser un string")
+
+
+class MongoDBService(AnalysisDocumentValidator):
     """Service for MongoDB Atlas operations with connection pooling and error handling."""
     
     def __init__(self):
@@ -38,6 +208,7 @@ class MongoDBService:
         self._connection_string = os.getenv('MONGODB_CONNECTION_STRING')
         self._database_name = os.getenv('MONGODB_DATABASE')
         self._collection_name = os.getenv('MONGODB_COLLECTION')
+        self._calendar_collection_name = os.getenv('MONGODB_CALENDAR_COLLECTION', 'calendario')
         
         # Validate required configuration
         if not all([self._connection_string, self._database_name, self._collection_name]):
@@ -150,6 +321,8 @@ class MongoDBService:
                 if self._client:
                     self._client.close()
                 
+                metrics.increment('MongoReconnects')
+                
                 # Wait with exponential backoff
                 if attempt > 0:
                     delay = self._retry_delay * (2 ** (attempt - 1))
@@ -198,6 +371,8 @@ class MongoDBService:
                 if attempt == self._max_retry_attempts - 1:
                     raise
                 
+                metrics.increment('MongoRetries')
+                
                 # Wait before retry
                 time.sleep(self._retry_delay * (attempt + 1))
                 
@@ -243,6 +418,19 @@ class MongoDBService:
                 'last_check': self._last_connection_check.isoformat() if self._last_connection_check else None
             }
     
+    def get_collection(self, name: str):
+        """
+        Get another collection of the same database (e.g. auxiliary counters).
+        
+        Args:
+            name: Collection name
+            
+        Returns:
+            Collection: pymongo collection sharing this service's connection pool
+        """
+        self._ensure_connection()
+        return self._database[name]
+    
     def close_connection(self):
         """Close database connection and cleanup resources."""
         try:
@@ -279,16 +467,8 @@ class MongoDBService:
             Exception: Si hay error en la validación o guardado
         """
         try:
-            # Validate analysis data
-            validated_data = self._validate_analysis_data(analysis_data)
-            
-            # Add metadata
-            validated_data['metadatos'] = {
-                'fecha_creacion': datetime.utcnow(),
-                'version_analisis': '1.0',
-                'estado': 'completado',
-                **validated_data.get('metadatos', {})
-            }
+            # Validate analysis data and add metadata
+            validated_data = self._prepare_analysis_document(analysis_data)
             
             # Execute save operation with retry
             def _save_operation():
@@ -314,6 +494,8 @@ class MongoDBService:
                         return str(existing_doc['_id']) if existing_doc else None
             
             document_id = self._execute_with_retry(_save_operation)
+            self._mark_calendar(validated_data['fecha'], analizada=True,
+                                con_opiniones=bool(validated_data.get('opiniones_expertos')))
             
             error_handler.log_info('analysis_saved', {
                 'document_id': document_id,
@@ -376,6 +558,177 @@ class MongoDBService:
             })
             raise
     
+    def get_existing_dates(self, dates: List[str]) -> set:
+        """
+        Devuelve, con una sola consulta $in, cuáles de las fechas ya tienen análisis.
+        
+        Args:
+            dates: Fechas en formato YYYY-MM-DD
+            
+        Returns:
+            set: Fechas que ya existen en la colección
+        """
+        try:
+            for date in dates:
+                self._validate_date_format(date)
+            
+            def _existing_operation():
+                cursor = self._collection.find({'fecha': {'$in': list(dates)}}, {'_id': 0, 'fecha': 1})
+                return {doc['fecha'] for doc in cursor}
+            
+            return self._execute_with_retry(_existing_operation)
+            
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'get_existing_dates',
+                'dates_count': len(dates)
+            })
+            raise
+    
+    def bulk_save_analyses(self, analyses: List[dict]) -> Dict[str, int]:
+        """
+        Guarda varios análisis en un único bulk_write (upsert por fecha).
+        
+        Args:
+            analyses: Lista de diccionarios con los datos de cada análisis
+            
+        Returns:
+            dict: Cantidad de documentos insertados y actualizados
+        """
+        if not analyses:
+            return {'upserted': 0, 'modified': 0}
+        
+        try:
+            documents = [self._prepare_analysis_document(analysis) for analysis in analyses]
+            
+            def _bulk_operation():
+                result = self._collection.bulk_write(
+                    [UpdateOne({'fecha': doc['fecha']}, {'$set': doc}, upsert=True) for doc in documents],
+                    ordered=False
+                )
+                return {'upserted': result.upserted_count, 'modified': result.modified_count}
+            
+            counts = self._execute_with_retry(_bulk_operation)
+            for doc in documents:
+                self._mark_calendar(doc['fecha'], analizada=True, con_opiniones=bool(doc.get('opiniones_expertos')))
+            
+            error_handler.log_info('analyses_bulk_saved', {
+                'fechas': [doc['fecha'] for doc in documents],
+                **counts
+            })
+            
+            return counts
+            
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'bulk_save_analyses',
+                'analyses_count': len(analyses)
+            })
+            raise
+    
+    def get_pdf_handle(self, date: str) -> Optional[dict]:
+        """
+        Recupera el handle vigente del PDF subido a Gemini para una fecha.
+        
+        Args:
+            date: Fecha en formato YYYY-MM-DD
+            
+        Returns:
+            dict: Handle del archivo o None si no existe o ya expiró
+        """
+        try:
+            self._validate_date_format(date)
+            
+            def _get_handle_operation():
+                return self._collection.find_one(
+                    {'fecha': date, 'archivo_gemini.expira_en': {'$gt': datetime.utcnow()}},
+                    {'_id': 0, 'archivo_gemini': 1}
+                )
+            
+            result = self._execute_with_retry(_get_handle_operation)
+            return result.get('archivo_gemini') if result else None
+            
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'get_pdf_handle',
+                'fecha': date
+            })
+            raise
+    
+    def get_calendar(self, months: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Bitsets de días analizados y con opiniones de cada mes.
+        
+        Se leen de la colección del calendario (un documento por mes); los meses
+        que todavía no tienen documento se reconstruyen una vez desde el índice de fecha.
+        
+        Args:
+            months: Meses en formato YYYY-MM
+            
+        Returns:
+            dict: {mes: {'analizadas': int, 'con_opiniones': int}}
+        """
+        try:
+            calendar_collection = self.get_collection(self._calendar_collection_name)
+            
+            def _calendar_operation():
+                return {doc['_id']: doc for doc in calendar_collection.find({'_id': {'$in': list(months)}})}
+            
+            stored = self._execute_with_retry(_calendar_operation)
+            
+            result = {}
+            for month in months:
+                doc = stored.get(month) or self._rebuild_calendar_month(month)
+                result[month] = {
+                    'analizadas': doc.get('analizadas', 0),
+                    'con_opiniones': doc.get('con_opiniones', 0)
+                }
+            return result
+            
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'get_calendar',
+                'months': months
+            })
+            raise
+    
+    def _rebuild_calendar_month(self, month: str) -> Dict[str, int]:
+        """Recalcula los bitsets de un mes (sólo lee el campo fecha) y los guarda."""
+        dates = month_dates(month)
+        date_range = {'$gte': dates[0], '$lte': dates[-1]}
+        
+        def _rebuild_operation():
+            # Cubierta por el índice único de fecha: no lee los documentos
+            analysed = [doc['fecha'] for doc in self._collection.find(
+                {'fecha': date_range}, {'_id': 0, 'fecha': 1}).hint([('fecha', pymongo.ASCENDING)])]
+            with_opinions = [doc['fecha'] for doc in self._collection.find(
+                {'fecha': date_range, 'opiniones_expertos.0': {'$exists': True}}, {'_id': 0, 'fecha': 1})]
+            bits = {'analizadas': dates_to_bits(analysed), 'con_opiniones': dates_to_bits(with_opinions)}
+            self.get_collection(self._calendar_collection_name).update_one(
+                {'_id': month},
+                {'$set': {**bits, 'actualizado_en': datetime.utcnow()}},
+                upsert=True
+            )
+            return bits
+        
+        bits = self._execute_with_retry(_rebuild_operation)
+        error_handler.log_info('calendar_month_rebuilt', {'mes': month, **bits})
+        return bits
+    
+    def _mark_calendar(self, date: str, analizada: Optional[bool] = None, con_opiniones: Optional[bool] = None):
+        """
+        Actualiza el bit del día en el calendario (si falla, el análisis ya quedó guardado).
+        
+        Sólo modifica meses que ya tienen documento: uno nuevo con sólo este día ocultaría los
+        análisis anteriores del mes, así que los meses sin documento los arma get_calendar
+        desde el índice de fecha la primera vez que se leen.
+        """
+        try:
+            query, update = calendar_update(date, analizada, con_opiniones)
+            self.get_collection(self._calendar_collection_name).update_one(query, update)
+        except Exception as e:
+            error_handler.log_warning('calendar_update_failed', {'fecha': date, 'error': str(e)})
+    
     def analysis_exists(self, date: str) -> bool:
         """
         Verifica si ya existe análisis para una fecha.
@@ -469,6 +822,8 @@ class MongoDBService:
                 return result.deleted_count > 0
             
             deleted = self._execute_with_retry(_delete_operation)
+            if deleted:
+                self._mark_calendar(date, analizada=False, con_opiniones=False)
             
             error_handler.log_info('analysis_deleted', {
                 'fecha': date,
@@ -536,97 +891,6 @@ class MongoDBService:
             })
             raise
     
-    def _validate_analysis_data(self, data: dict) -> dict:
-        """
-        Valida los datos del análisis según el esquema esperado.
-        
-        Args:
-            data: Datos del análisis a validar
-            
-        Returns:
-            dict: Datos validados y normalizados
-            
-        Raises:
-            ValueError: Si los datos no son válidos
-        """
-        if not isinstance(data, dict):
-            raise ValueError("Los datos del análisis deben ser un diccionario")
-        
-        # Required fields
-        required_fields = ['fecha', 'seccion']
-        for field in required_fields:
-            if field not in data:
-                raise ValueError(f"Campo requerido faltante: {field}")
-        
-        # Validate date format
-        self._validate_date_format(data['fecha'])
-        
-        # Validate seccion
-        valid_sections = ['legislacion_avisos_oficiales']
-        if data['seccion'] not in valid_sections:
-            raise ValueError(f"Sección inválida: {data['seccion']}. Debe ser una de: {valid_sections}")
-        
-        # Create validated copy
-        validated_data = {
-            'fecha': data['fecha'],
-            'seccion': data['seccion'],
-            'pdf_url': data.get('pdf_url', ''),
-            'contenido_original': data.get('contenido_original', ''),
-            'analisis': data.get('analisis', {}),
-            'opiniones_expertos': data.get('opiniones_expertos', [])
-        }
-        
-        # Validate analisis structure if present
-        if validated_data['analisis']:
-            self._validate_analysis_structure(validated_data['analisis'])
-        
-        # Validate opiniones_expertos structure if present
-        if validated_data['opiniones_expertos']:
-            self._validate_opinions_structure(validated_data['opiniones_expertos'])
-        
-        return validated_data
-    
-    def _validate_date_format(self, date_str: str):
-        """
-        Valida que la fecha esté en formato YYYY-MM-DD.
-        
-        Args:
-            date_str: Fecha como string
-            
-        Raises:
-            ValueError: Si el formato de fecha es inválido
-        """
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            raise ValueError(f"Formato de fecha inválido: {date_str}. Debe ser YYYY-MM-DD")
-    
-    def _validate_analysis_structure(self, analisis: dict):
-        """
-        Valida la estructura del análisis.
-        
-        Args:
-            analisis: Diccionario con el análisis
-            
-        Raises:
-            ValueError: Si la estructura es inválida
-        """
-        if not isinstance(analisis, dict):
-            raise ValueError("El análisis debe ser un diccionario")
-        
-        # Optional but expected fields
-        expected_fields = ['resumen', 'cambios_principales', 'impacto_estimado', 'areas_afectadas']
-        
-        # Validate cambios_principales if present
-        if 'cambios_principales' in analisis:
-            if not isinstance(analisis['cambios_principales'], list):
-                raise ValueError("cambios_principales debe ser una lista")
-        
-        # Validate areas_afectadas if present
-        if 'areas_afectadas' in analisis:
-            if not isinstance(analisis['areas_afectadas'], list):
-                raise ValueError("areas_afectadas debe ser una lista")
-    
     def update_analysis_expert_opinions(self, date: str, expert_opinions: list) -> bool:
         """
         Update existing analysis with expert opinions
@@ -663,6 +927,8 @@ class MongoDBService:
                 return result.modified_count > 0
             
             updated = self._execute_with_retry(_update_operation)
+            if updated:
+                self._mark_calendar(date, con_opiniones=bool(expert_opinions))
             
             error_handler.log_info('analysis_expert_opinions_updated', {
                 'fecha': date,
@@ -679,26 +945,3 @@ class MongoDBService:
                 'opinions_count': len(expert_opinions) if expert_opinions else 0
             })
             raise
-
-    def _validate_opinions_structure(self, opiniones: list):
-        """
-        Valida la estructura de las opiniones de expertos.
-        
-        Args:
-            opiniones: Lista de opiniones
-            
-        Raises:
-            ValueError: Si la estructura es inválida
-        """
-        if not isinstance(opiniones, list):
-            raise ValueError("Las opiniones deben ser una lista")
-        
-        for i, opinion in enumerate(opiniones):
-            if not isinstance(opinion, dict):
-                raise ValueError(f"La opinión {i} debe ser un diccionario")
-            
-            # Check for expected fields
-            expected_fields = ['fuente', 'opinion', 'fecha_opinion', 'relevancia']
-            for field in expected_fields:
-                if field in opinion and not isinstance(opinion[field], str):
-                    raise ValueError(f"El campo {field} en la opinión {i} debe ser un string")
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Asyncio MongoDB service for the Boletin Oficial application.
+Async variant of MongoDBService built on the Motor driver, so a single
+event loop can run several database operations concurrently.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import (
+    ConnectionFailure,
+    ServerSelectionTimeoutError,
+    NetworkTimeout
+)
+
+from services.calendar_index import calendar_update
+from services.database_service import AnalysisDocumentValidator
+from utils import metrics
+from utils.error_handler import error_handler, ErrorCode
+
+
+class AsyncMongoDBService(AnalysisDocumentValidator):
+    """Async service for MongoDB Atlas operations using Motor."""
+
+    def __init__(self):
+        """Prepara la conexión a MongoDB Atlas (se abre en el primer uso)"""
+        self._client = None
+        self._database = None
+        self._collection = None
+        self._max_retry_attempts = 3
+        self._retry_delay = 1  # seconds
+
+        self._connection_string = os.getenv('MONGODB_CONNECTION_STRING')
+        self._database_name = os.getenv('MONGODB_DATABASE')
+        self._collection_name = os.getenv('MONGODB_COLLECTION')
+        self._calendar_collection_name = os.getenv('MONGODB_CALENDAR_COLLECTION', 'calendario')
+
+        if not all([self._connection_string, self._database_name, self._collection_name]):
+            raise ValueError("Missing required MongoDB configuration. Check MONGODB_CONNECTION_STRING, MONGODB_DATABASE, and MONGODB_COLLECTION environment variables.")
+
+    async def connect(self):
+        """Open the Motor client and verify the connection."""
+        if self._client is not None:
+            return
+
+        try:
+            self._client = AsyncIOMotorClient(
+                self._connection_string,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=10000,
+                socketTimeoutMS=30000,
+                maxPoolSize=10,
+                minPoolSize=1,
+                maxIdleTimeMS=30000,
+                retryWrites=True,
+                retryReads=True,
+                w='majority',
+                readPreference='primary'
+            )
+            await self._client.admin.command('ping')
+
+            self._database = self._client[self._database_name]
+            self._collection = self._database[self._collection_name]
+
+            error_handler.log_info('async_mongodb_connection_initialized', {
+                'database': self._database_name,
+                'collection': self._collection_name
+            })
+
+        except Exception as e:
+            self._client = None
+            error_handler.log_error(ErrorCode.DATABASE_CONNECTION_ERROR, e, {
+                'action': 'async_initialize_connection',
+                'database': self._database_name
+            })
+            raise
+
+    async def _execute_with_retry(self, operation_func, *args, **kwargs):
+        """Execute an async database operation with retry logic."""
+        for attempt in range(self._max_retry_attempts):
+            try:
+                await self.connect()
+                return await operation_func(*args, **kwargs)
+
+            except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout) as e:
+                error_handler.log_warning('async_mongodb_operation_connection_error', {
+                    'attempt': attempt + 1,
+                    'error': str(e),
+                    'operation': operation_func.__name__
+                })
+
+                if attempt == self._max_retry_attempts - 1:
+                    raise
+
+                metrics.increment('MongoRetries')
+                await asyncio.sleep(self._retry_delay * (attempt + 1))
+
+            except Exception as e:
+                error_handler.log_error(ErrorCode.DATABASE_QUERY_ERROR, e, {
+                    'operation': operation_func.__name__,
+                    'attempt': attempt + 1
+                })
+                raise
+
+    def close_connection(self):
+        """Close the Motor client."""
+        if self._client:
+            self._client.close()
+            self._client = None
+            self._database = None
+            self._collection = None
+
+    async def save_analysis(self, analysis_data: dict) -> str:
+        """
+        Guarda (o reemplaza) el análisis de una fecha.
+
+        Args:
+            analysis_data: Diccionario con los datos del análisis
+
+        Returns:
+            str: ID del documento guardado
+        """
+        try:
+            validated_data = self._prepare_analysis_document(analysis_data)
+
+            async def _save_operation():
+                result = await self._collection.update_one(
+                    {'fecha': validated_data['fecha']},
+                    {'$set': validated_data},
+                    upsert=True
+                )
+                if result.upserted_id:
+                    return str(result.upserted_id)
+                existing_doc = await self._collection.find_one(
+                    {'fecha': validated_data['fecha']},
+                    {'_id': 1}
+                )
+                return str(existing_doc['_id']) if existing_doc else None
+
+            document_id = await self._execute_with_retry(_save_operation)
+            await self._mark_calendar(validated_data['fecha'], analizada=True,
+                                      con_opiniones=bool(validated_data.get('opiniones_expertos')))
+
+            error_handler.log_info('analysis_saved', {
+                'document_id': document_id,
+                'fecha': validated_data['fecha'],
+                'seccion': validated_data.get('seccion'),
+                'driver': 'motor'
+            })
+
+            return document_id
+
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'async_save_analysis',
+                'fecha': analysis_data.get('fecha')
+            })
+            raise
+
+    async def get_analysis_by_date(self, date: str) -> Optional[dict]:
+        """
+        Recupera análisis existente por fecha.
+
+        Args:
+            date: Fecha en formato YYYY-MM-DD
+
+        Returns:
+            dict: Datos del análisis o None si no existe
+        """
+        try:
+            self._validate_date_format(date)
+
+            async def _get_operation():
+                return await self._collection.find_one({'fecha': date}, {'_id': 0})
+
+            result = await self._execute_with_retry(_get_operation)
+
+            error_handler.log_info('analysis_retrieved', {
+                'fecha': date,
+                'found': result is not None,
+                'driver': 'motor'
+            })
+
+            return result
+
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'async_get_analysis_by_date',
+                'fecha': date
+            })
+            raise
+
+    async def get_analyses_by_dates(self, dates: List[str]) -> Dict[str, dict]:
+        """
+        Recupera en una sola consulta los análisis de varias fechas.
+
+        Args:
+            dates: Fechas en formato YYYY-MM-DD
+
+        Returns:
+            dict: Análisis encontrados indexados por fecha
+        """
+        try:
+            for date in dates:
+                self._validate_date_format(date)
+
+            async def _get_many_operation():
+                cursor = self._collection.find({'fecha': {'$in': list(dates)}}, {'_id': 0})
+                return await cursor.to_list(length=None)
+
+            results = await self._execute_with_retry(_get_many_operation)
+
+            return {doc['fecha']: doc for doc in results}
+
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'async_get_analyses_by_dates',
+                'dates_count': len(dates)
+            })
+            raise
+
+    async def get_pdf_handle(self, date: str) -> Optional[dict]:
+        """
+        Recupera el handle vigente del PDF subido a Gemini para una fecha.
+
+        Args:
+            date: Fecha en formato YYYY-MM-DD
+
+        Returns:
+            dict: Handle del archivo o None si no existe o ya expiró
+        """
+        try:
+            self._validate_date_format(date)
+
+            async def _get_handle_operation():
+                return await self._collection.find_one(
+                    {'fecha': date, 'archivo_gemini.expira_en': {'$gt': datetime.utcnow()}},
+                    {'_id': 0, 'archivo_gemini': 1}
+                )
+
+            result = await self._execute_with_retry(_get_handle_operation)
+            return result.get('archivo_gemini') if result else None
+
+        except Exception as e:
+            error_handler.handle_database_error(e, {
+                'action': 'async_get_pdf_handle',
+                'fecha': date
+            })
+            raise
+
+    async def update_analysis_expert_opinions(self, date: str, expert_opinions: list) -> bool:
+        """
+        Update existing analysis with expert opinions
+
+        Args:
+            date: Date in YYYY-MM-DD format
+            expert_opinions: List of expert opinions to add
+
+        Returns:
+            bool: True if update was successful
+        """
+        try:
+            self._validate_date_format(date)
+
+            if expert_opinions:
+                self._validate_opinions_structure(expert_opinions)
+
+            async def _update_operation():
+                result = await self._collection.update_one(
+                    {'fecha': date},
+                    {
+                        '$set': {
+                            'opiniones_expertos': expert_opinions,
+                            'metadatos.fecha_actualizacion_opiniones': datetime.utcnow()
+                        }
+                    }
+                )
+                return result.modified_count > 0
+
+            updated = await self._execute_with_retry(_update_operation)
+            if updated:
+                await self._mark_calendar(date, con_opiniones=bool(expert_opinions))
+            return updated
+
+        except Exception as e:
+            error_handler.log_error(ErrorCode.DATABASE_QUERY_ERROR, e, {
+                'action': 'async_update_analysis_expert_opinions',
+                'fecha': date,
+                'opinions_count': len(expert_opinions) if expert_opinions else 0
+            })
+            raise
+
+    async def _mark_calendar(self, date: str, analizada: Optional[bool] = None, con_opiniones: Optional[bool] = None):
+        """
+        Actualiza el bit del día en el calendario (si falla, el análisis ya quedó guardado).
+        
+        Sólo modifica meses que ya tienen documento: uno nuevo con sólo este día ocultaría los
+        análisis anteriores del mes, así que los meses sin documento los arma get_calendar
+        desde el índice de fecha la primera vez que se leen.
+        """
+        try:
+            query, update = calendar_update(date, analizada, con_opiniones)
+            await self._database[self._calendar_collection_name].update_one(query, update)
+        except Exception as e:
+            error_handler.log_warning('calendar_update_failed', {'fecha': date, 'error': str(e)})
@@ -0,0 +1,198 @@
+"""
+Hedged requests for tail-latency reduction.
+If the first chunk or the full response of a call has not arrived by a
+percentile of recently observed latencies, an identical second request is
+fired; the first valid result wins and the other attempt is cancelled.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.error_handler import error_handler
+from utils.timing import in_current_context
+
+
+class FirstChunkSignal:
+    """Event set by an attempt when its first chunk arrives (records the time)."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._event = threading.Event()
+        self._clock = clock
+        self.at = None
+
+    def set(self):
+        if not self._event.is_set():
+            self.at = self._clock()
+            self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+
+class LatencyTracker:
+    """Rolling window of latencies per operation."""
+
+    def __init__(self, window: int = 100):
+        self._samples: Dict[str, deque] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, key: str, value: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self._window)).append(value)
+
+    def percentile(self, key: str, pct: float, min_samples: int) -> Optional[float]:
+        """Percentile of the window, or None while there are fewer than min_samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(pct / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+
+class HedgingPolicy:
+    """Decides when to hedge a call and caps the extra calls with a budget."""
+
+    def __init__(self, enabled: Optional[bool] = None, percentile: Optional[float] = None,
+                 ttft_delay: Optional[float] = None, total_delay: Optional[float] = None,
+                 max_ratio: Optional[float] = None, min_samples: Optional[int] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Args:
+            enabled: Enable hedging (LLM_HEDGE_ENABLED)
+            percentile: Latency percentile that triggers the hedge (LLM_HEDGE_PERCENTILE)
+            ttft_delay: First-chunk delay used until enough samples exist (LLM_HEDGE_TTFT_DELAY)
+            total_delay: Full-response delay used until enough samples exist (LLM_HEDGE_TOTAL_DELAY)
+            max_ratio: Maximum extra calls as a fraction of all calls (LLM_HEDGE_MAX_RATIO)
+            min_samples: Samples required before using the percentile (LLM_HEDGE_MIN_SAMPLES)
+            clock: Monotonic clock the delays are measured with (default time.monotonic)
+        """
+        self.enabled = (os.getenv('LLM_HEDGE_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+                        if enabled is None else enabled)
+        self.percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', '95')) if percentile is None else percentile
+        self.ttft_delay = float(os.getenv('LLM_HEDGE_TTFT_DELAY', '20')) if ttft_delay is None else ttft_delay
+        self.total_delay = float(os.getenv('LLM_HEDGE_TOTAL_DELAY', '90')) if total_delay is None else total_delay
+        self.max_ratio = float(os.getenv('LLM_HEDGE_MAX_RATIO', '0.1')) if max_ratio is None else max_ratio
+        self.min_samples = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20')) if min_samples is None else min_samples
+
+        self.clock = clock or time.monotonic
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_denied': 0}
+
+    def delays(self, operation: str) -> Tuple[float, float]:
+        """(first-chunk delay, full-response delay) that trigger a hedge for an operation."""
+        ttft = self.latencies.percentile(f'{operation}:ttft', self.percentile, self.min_samples)
+        total = self.latencies.percentile(f'{operation}:total', self.percentile, self.min_samples)
+        return (ttft if ttft is not None else self.ttft_delay,
+                total if total is not None else self.total_delay)
+
+    def _try_spend(self) -> bool:
+        """Take one extra call from the budget (one hedge of burst, then max_ratio of calls)."""
+        with self._lock:
+            if self.stats['hedged'] + 1 <= self.max_ratio * self.stats['calls'] + 1:
+                self.stats['hedged'] += 1
+                return True
+            self.stats['budget_denied'] += 1
+            return False
+
+    def run(self, operation: str, attempt_fn: Callable[[threading.Event, FirstChunkSignal, bool], Any],
+            is_valid: Callable[[Any], bool] = bool) -> Any:
+        """
+        Run attempt_fn, hedging it with an identical second attempt when it is slow.
+
+        Args:
+            operation: Latency bucket (e.g. 'analisis', 'opiniones')
+            attempt_fn: Callable(cancel_event, first_chunk_signal, is_hedge) returning the result;
+                is_hedge is True only for the second (hedge) attempt
+            is_valid: Whether a result may win the race
+
+        Returns:
+            The first valid result (or the last result/error when none is valid)
+        """
+        with self._lock:
+            self.stats['calls'] += 1
+
+        ttft_delay, total_delay = self.delays(operation)
+        results = queue.Queue()
+        attempts = []
+
+        def launch(label: str):
+            attempt = {
+                'label': label,
+                'cancel': threading.Event(),
+                'first_chunk': FirstChunkSignal(self.clock),
+                'is_hedge': bool(attempts),
+                'start': self.clock()
+            }
+
+            def target():
+                try:
+                    value = attempt_fn(attempt['cancel'], attempt['first_chunk'], attempt['is_hedge'])
+                    results.put((attempt, value, None))
+                except Exception as e:
+                    results.put((attempt, None, e))
+
+            attempts.append(attempt)
+            threading.Thread(target=in_current_context(target), daemon=True, name=f'hedge-{operation}-{label}').start()
+
+        launch('primaria')
+        primary = attempts[0]
+        may_hedge = True
+        finished = []
+
+        while True:
+            timeout = None
+            if may_hedge:
+                # Wake up at the next hedge deadline of the primary attempt
+                deadline = primary['start'] + (total_delay if primary['first_chunk'].is_set()
+                                               else min(ttft_delay, total_delay))
+                timeout = max(deadline - self.clock(), 0.005)
+            try:
+                attempt, value, error = results.get(timeout=timeout)
+            except queue.Empty:
+                if may_hedge:
+                    elapsed = self.clock() - primary['start']
+                    slow_first_chunk = not primary['first_chunk'].is_set() and elapsed >= ttft_delay
+                    if slow_first_chunk or elapsed >= total_delay:
+                        may_hedge = False
+                        if self._try_spend():
+                            error_handler.log_info('llm_hedge_fired', {
+                                'operation': operation,
+                                'elapsed_seconds': round(elapsed, 3),
+                                'trigger': 'first_chunk' if slow_first_chunk else 'total',
+                                'ttft_delay': round(ttft_delay, 3),
+                                'total_delay': round(total_delay, 3)
+                            })
+                            launch('cobertura')
+                continue
+
+            finished.append((attempt, value, error))
+            if error is None:
+                now = self.clock()
+                if attempt['first_chunk'].at is not None:
+                    self.latencies.record(f'{operation}:ttft', attempt['first_chunk'].at - attempt['start'])
+                self.latencies.record(f'{operation}:total', now - attempt['start'])
+
+            if error is None and is_valid(value):
+                for other in attempts:
+                    if other is not attempt:
+                        other['cancel'].set()
+                if attempt is not primary:
+                    with self._lock:
+                        self.stats['hedge_wins'] += 1
+                    error_handler.log_info('llm_hedge_won', {'operation': operation})
+                return value
+
+            # An attempt failed or returned an invalid result: wait for the rest
+            if len(finished) == len(attempts):
+                # A failing primary is left to the caller's retry loop rather than hedged
+                for _, finished_value, finished_error in reversed(finished):
+                    if finished_error is None:
+                        return finished_value
+                raise finished[0][2]
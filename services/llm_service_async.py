@@ -0,0 +1,260 @@
+"""
+Variante asyncio del servicio LLM
+Usa el cliente async de google-genai y httpx para el scraper del Boletín,
+de modo que un único event loop pueda atender varias fechas a la vez
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Any, Optional, Callable
+
+import httpx
+from google.genai import types
+
+from services.llm_service_direct import (
+    EditionNotAvailableError,
+    LLMAnalysisServiceDirect,
+    extract_pdf_base64,
+    is_missing_file_error,
+    last_completed_call,
+    usage_to_metrics
+)
+from utils.error_handler import error_handler, ErrorCode
+from utils import memory
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLLMAnalysisService(LLMAnalysisServiceDirect):
+    """Servicio de análisis LLM con llamadas no bloqueantes (prompts y parseo compartidos con la versión sync)"""
+
+    async def crear_sesion_pdf_fecha_async(self, fecha_boletin: str) -> str:
+        """
+        Descarga el PDF de la Primera Sección para la fecha indicada
+
+        Args:
+            fecha_boletin: Fecha en formato YYYY-MM-DD
+
+        Returns:
+            str: PDF codificado en Base64
+
+        Raises:
+            EditionNotAvailableError: Si no hay edición para la fecha
+            Exception: Si el sitio no responde (error transitorio)
+        """
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as session:
+            # Visitar página principal para establecer sesión
+            await session.get(f'{self.boletin_base_url}/seccion/primera')
+            await asyncio.sleep(self.boletin_session_delay)
+
+            response = await session.get(self._edition_url(fecha_boletin))
+            if response.status_code == 404:
+                raise EditionNotAvailableError(f"No hay edición del Boletín Oficial para {fecha_boletin}")
+            if response.status_code != 200:
+                raise Exception("No puedo obtener sesion pdf anterior")
+
+            response = await session.post(
+                f'{self.boletin_base_url}/pdf/download_section',
+                data={'nombreSeccion': 'primera'},
+                headers=self._pdf_download_headers()
+            )
+            if response.status_code != 200:
+                raise Exception("No puedo obtener pdf anterior")
+
+            return extract_pdf_base64(response.json(), fecha_boletin)
+
+    async def _pdf_part_async(self, fecha_boletin: str) -> types.Part:
+        """Versión async de _pdf_part (la subida a la Files API corre en un thread)"""
+        handle = self.get_pdf_handle(fecha_boletin) if self.pdf_upload_enabled else None
+        if handle:
+            memory.record_pdf(fecha_boletin, handle.get('bytes', 0), 'subida')
+            return self._file_part(handle)
+
+        # El cache en disco lee con mmap y decodificar el base64 recorre todo el PDF: en threads
+        pdf_bytes = await asyncio.to_thread(self.cached_pdf, fecha_boletin)
+        if pdf_bytes is None:
+            pdf_base64 = await self.crear_sesion_pdf_fecha_async(fecha_boletin)
+            pdf_bytes = await asyncio.to_thread(self.cache_pdf, fecha_boletin, pdf_base64)
+        if not self.pdf_upload_enabled and self._fits_inline(pdf_bytes):
+            return self._pdf_part_from_bytes(fecha_boletin, pdf_bytes)
+        return await asyncio.to_thread(self._pdf_part_from_bytes, fecha_boletin, pdf_bytes)
+
+    async def analyze_normativa_async(self, date: str,
+                                      on_summary: Optional[Callable[[str, list], None]] = None,
+                                      call_log: Optional[list] = None) -> Dict[str, Any]:
+        """
+        Analiza el contenido normativo de una fecha sin bloquear el event loop
+
+        Args:
+            date: Fecha del boletín
+            on_summary: Callback opcional, igual que en analyze_normativa
+            call_log: Lista opcional que recibe las métricas de cada llamada a Gemini
+
+        Returns:
+            dict: Análisis estructurado de la normativa
+        """
+        max_retries = int(os.getenv('MAX_RETRY_ATTEMPTS', '3'))
+
+        on_chunk = None
+        if on_summary is not None:
+            on_chunk = self._make_summary_watcher(on_summary)
+
+        profile = None
+
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"Iniciando análisis async de normativa para la fecha {date}, intento {attempt + 1}")
+
+                contents = self._build_analysis_contents(date, await self._pdf_part_async(date))
+                if profile is None:
+                    # Contar páginas e instrumentos descomprime el PDF: una vez y fuera del event loop
+                    profile = await asyncio.to_thread(self._profile_analysis_contents, contents)
+
+                return await self._analyze_with_routing_async(contents, on_chunk=on_chunk, call_log=call_log,
+                                                              attempt=attempt + 1, profile=profile)
+
+            except EditionNotAvailableError as e:
+                error_handler.log_info('boletin_edition_not_available', {'fecha': date})
+                return self._create_error_response(str(e), sin_edicion=True)
+
+            except json.JSONDecodeError as e:
+                error_handler.log_error(ErrorCode.LLM_PARSING_ERROR, e, {
+                    'attempt': attempt + 1,
+                    'fecha_boletin': date
+                })
+                if attempt == max_retries - 1:
+                    return self._create_error_response(f"Error parseando respuesta después de {max_retries} intentos")
+
+            except Exception as e:
+                error_handler.log_error(ErrorCode.LLM_API_ERROR, e, {
+                    'attempt': attempt + 1,
+                    'fecha_boletin': date
+                })
+                if is_missing_file_error(e):
+                    self.forget_pdf_handle(date)
+                if attempt == max_retries - 1:
+                    return self._create_error_response(f"Error en análisis después de {max_retries} intentos: {str(e)}")
+
+        return self._create_error_response("Todos los intentos de análisis fallaron")
+
+    async def get_expert_opinions_async(self, normativa_summary: str, cambios_principales: list = None,
+                                        fecha_boletin: str = None, call_log: Optional[list] = None) -> list:
+        """
+        Obtiene opiniones de expertos sin bloquear el event loop
+
+        Args:
+            normativa_summary: Resumen de la normativa
+            cambios_principales: Lista de cambios principales
+            fecha_boletin: Fecha del boletín oficial a buscar
+            call_log: Lista opcional que recibe las métricas de cada llamada a Gemini
+
+        Returns:
+            list: Lista de opiniones de expertos con referencias
+        """
+        if not fecha_boletin:
+            logger.warning("get_expert_opinions_async: No se proporcionó fecha del boletín")
+            return []
+
+        max_retries = int(os.getenv('MAX_RETRY_ATTEMPTS', '2'))
+
+        for attempt in range(max_retries):
+            try:
+                contents = self._create_expert_opinions_contents(fecha_boletin, normativa_summary, cambios_principales)
+                response_text = await self._stream_generate_async(
+                    contents, self._create_expert_opinions_config(), operation='opiniones',
+                    call_log=call_log, attempt=attempt + 1
+                )
+
+                if not response_text:
+                    logger.warning("Respuesta vacía de Gemini para opiniones de expertos")
+                    return []
+
+                return self._parse_expert_opinions_response(response_text)
+
+            except Exception as e:
+                error_handler.log_error(ErrorCode.LLM_API_ERROR, e, {
+                    'attempt': attempt + 1,
+                    'fecha_boletin': fecha_boletin,
+                    'action': 'get_expert_opinions_async'
+                })
+                if attempt == max_retries - 1:
+                    return []
+
+        return []
+
+    async def _analyze_with_routing_async(self, contents: list,
+                                          on_chunk: Optional[Callable[[str], None]] = None,
+                                          call_log: Optional[list] = None, attempt: int = 1,
+                                          profile: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Versión async de _analyze_with_routing"""
+        if profile is None:
+            profile = await asyncio.to_thread(self._profile_analysis_contents, contents)
+        tier = self.router.select_tier(profile)
+        calls = call_log if call_log is not None else []
+
+        while True:
+            started = time.monotonic()
+            response_text = await self._stream_generate_async(
+                contents, self._create_analysis_config(tier['thinking_budget']), on_chunk=on_chunk,
+                model=tier['model'], operation=f"analisis:{tier['name']}", call_log=calls, attempt=attempt
+            )
+            stronger = self._check_tier_response(tier, profile, response_text, time.monotonic() - started,
+                                                 last_completed_call(calls))
+            if stronger is None:
+                return self._process_analysis_response(response_text)
+            tier = stronger
+
+    async def _stream_generate_async(self, contents: list, config,
+                                     on_chunk: Optional[Callable[[str], None]] = None,
+                                     model: Optional[str] = None, operation: str = 'generate',
+                                     call_log: Optional[list] = None, attempt: int = 1) -> str:
+        """Versión async de _stream_generate usando client.aio (sin hedging)"""
+        model = model or self.model_name
+        estimated_tokens = 0
+        if self.rate_limiter.enabled:
+            estimated_tokens = await asyncio.to_thread(self._estimate_request_tokens, contents)
+        queued_seconds = await self.rate_limiter.acquire_async(estimated_tokens, operation='generate_content_stream')
+
+        started = time.monotonic()
+        first_chunk_at = None
+        chunks = 0
+        usage = None
+        error = None
+        response_text = ""
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=config,
+            )
+            async for chunk in stream:
+                chunks += 1
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                usage = getattr(chunk, 'usage_metadata', None) or usage
+                if chunk.text:
+                    response_text += chunk.text
+                    if on_chunk is not None:
+                        on_chunk(response_text)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_call_metrics({
+                'operacion': operation,
+                'modelo': model,
+                'intento': attempt,
+                'hedge': False,
+                'cancelada': False,
+                'espera_cuota_s': round(queued_seconds or 0.0, 3),
+                'tiempo_primer_chunk_s': round(first_chunk_at - started, 3) if first_chunk_at else None,
+                'tiempo_total_s': round(time.monotonic() - started, 3),
+                'chunks': chunks,
+                'caracteres': len(response_text),
+                **usage_to_metrics(usage),
+                'error': type(error).__name__ if error else None
+            }, call_log)
+        return response_text
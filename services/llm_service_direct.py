@@ -5,24 +5,129 @@ Basado en geminiPrompt.py con fecha actual
 """
 
 import os
+import re
 import json
 import logging
 import requests
+import io
 import time
 import base64
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional, Callable, Tuple
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
+from services.hedging import HedgingPolicy
+from services.local_cache import pdf_key
+from services.model_router import ModelRouter
+from services.rate_limiter import GeminiRateLimiter
 from utils.error_handler import error_handler, ErrorCode
+from utils import memory, metrics, timing
+from utils.pdf_utils import count_instruments, count_pdf_pages, TOKENS_PER_PDF_PAGE
 
 logger = logging.getLogger(__name__)
 
+# Medios consultados en la búsqueda de opiniones, agrupados para el modo fan-out
+OUTLET_GROUPS = {
+    'diarios_generales': [
+        'La Nación (lanacion.com.ar)',
+        'Clarín (clarin.com)',
+        'Página/12 (pagina12.com.ar)',
+        'Infobae (infobae.com)',
+    ],
+    'economia_negocios': [
+        'Ámbito Financiero (ambito.com)',
+        'El Cronista (cronista.com)',
+        'BAE Negocios (baenegocios.com)',
+    ],
+    'especializados': [
+        'Portales jurídicos especializados.',
+        'Sitios de análisis económico y legal',
+    ],
+}
+
+# Orden del listado original del prompt (modo de búsqueda única)
+ALL_OUTLETS = [
+    'La Nación (lanacion.com.ar)',
+    'Clarín (clarin.com)',
+    'Página/12 (pagina12.com.ar)',
+    'Ámbito Financiero (ambito.com)',
+    'El Cronista (cronista.com)',
+    'Infobae (infobae.com)',
+    'BAE Negocios (baenegocios.com)',
+    'Portales jurídicos especializados.',
+    'Sitios de análisis económico y legal',
+]
+
+RELEVANCE_WEIGHTS = {'alta': 3, 'media': 2, 'baja': 1}
+
+# La Files API conserva los archivos 48 horas; se deja de usar un handle poco antes
+PDF_HANDLE_TTL = timedelta(hours=48)
+PDF_HANDLE_EXPIRY_MARGIN = timedelta(minutes=15)
+
+
+class EditionNotAvailableError(Exception):
+    """El sitio no tiene edición para la fecha pedida (fin de semana, feriado o aún no publicada)"""
+
+
+def extract_pdf_base64(json_data: Any, fecha_boletin: str) -> str:
+    """
+    PDF en Base64 de la respuesta de download_section
+    
+    Raises:
+        EditionNotAvailableError: Si la respuesta no trae un PDF
+    """
+    pdf_base64 = json_data.get('pdfBase64') if isinstance(json_data, dict) else None
+    if not pdf_base64:
+        raise EditionNotAvailableError(f"No hay edición del Boletín Oficial para {fecha_boletin}")
+    return pdf_base64
+
+
+def usage_to_metrics(usage) -> Dict[str, int]:
+    """Conteo de tokens de usage_metadata de Gemini (0 si no vino en la respuesta)"""
+    return {
+        'tokens_prompt': getattr(usage, 'prompt_token_count', None) or 0,
+        'tokens_respuesta': getattr(usage, 'candidates_token_count', None) or 0,
+        'tokens_thinking': getattr(usage, 'thoughts_token_count', None) or 0,
+        'tokens_cache': getattr(usage, 'cached_content_token_count', None) or 0,
+        'tokens_total': getattr(usage, 'total_token_count', None) or 0,
+    }
+
+
+def last_completed_call(call_log: list) -> Dict[str, Any]:
+    """Métricas de la última llamada no cancelada (la ganadora si hubo hedging)"""
+    return next((call for call in reversed(call_log) if not call.get('cancelada')), {})
+
+
+def summarize_call_metrics(call_log: list) -> Dict[str, Any]:
+    """Totales de un call_log para guardar en metadatos"""
+    totals = {'llamadas': len(call_log), 'tiempo_llm_s': 0.0}
+    for field in ('tokens_prompt', 'tokens_respuesta', 'tokens_thinking', 'tokens_cache', 'tokens_total'):
+        totals[field] = sum(call.get(field, 0) for call in call_log)
+    totals['tiempo_llm_s'] = round(sum(call.get('tiempo_total_s', 0.0) for call in call_log), 3)
+    return totals
+
+
+def is_missing_file_error(error: Exception) -> bool:
+    """Error de Gemini por un archivo subido que expiró o fue borrado (404 NOT_FOUND o 403 PERMISSION_DENIED)"""
+    if not isinstance(error, genai_errors.ClientError):
+        return False
+    return error.code in (403, 404) or error.status in ('NOT_FOUND', 'PERMISSION_DENIED')
+
+
 class LLMAnalysisServiceDirect:
     """Servicio de análisis LLM usando Gemini directamente"""
     
-    def __init__(self):
-        """Inicializa el servicio de Gemini directamente"""
+    def __init__(self, rate_limiter: Optional[GeminiRateLimiter] = None):
+        """
+        Inicializa el servicio de Gemini directamente
+        
+        Args:
+            rate_limiter: Limitador compartido de cuota de Gemini (por defecto sólo en proceso)
+        """
         try:
             # Configurar API key - usar GEMINI_API_KEY como en geminiPrompt.py
             api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
@@ -36,65 +141,110 @@ class LLMAnalysisServiceDirect:
             # Configurar modelo desde variables de entorno
             self.model_name = os.getenv('LANGCHAIN_MODEL', 'gemini-2.5-flash')
             
+            # Cuota de Gemini: las llamadas esperan un turno en lugar de fallar con 429
+            self.rate_limiter = rate_limiter or GeminiRateLimiter()
+            
+            # Hedging de llamadas lentas (desactivado por defecto)
+            self.hedging = HedgingPolicy()
+            
+            # Nivel de modelo y thinking según el tamaño de la edición (desactivado por defecto)
+            self.router = ModelRouter()
+            
+            # PDF subido una vez por edición a la Files API y reutilizado mientras no expire
+            self.pdf_upload_enabled = os.getenv('GEMINI_PDF_UPLOAD', 'false').lower() in ('true', '1', 'yes', 'on')
+            self.attach_pdf_to_opinions = os.getenv('EXPERT_OPINIONS_ATTACH_PDF', 'true').lower() in ('true', '1', 'yes', 'on')
+            self._pdf_handles = {}
+            self._pdf_handles_lock = threading.Lock()
+            
+            # Ediciones grandes: se suben en lugar de ir inline si superan el tamaño o la memoria libre
+            self.pdf_inline_max_bytes = int(float(os.getenv('PDF_INLINE_MAX_MB', '18')) * 1024 * 1024)
+            self.pdf_inline_memory_factor = float(os.getenv('PDF_INLINE_MEMORY_FACTOR', '4'))
+            
+            # Cache local de PDFs descargados (memoria y /tmp), lo asigna la Lambda si está habilitado
+            self.pdf_cache = None
+            
+            # Sitio del Boletín Oficial (configurable para pruebas locales)
+            self.boletin_base_url = os.getenv('BOLETIN_BASE_URL', 'https://www.boletinoficial.gob.ar').rstrip('/')
+            # Pausa entre abrir la sesión y fijar la edición (el sitio real la necesita)
+            self.boletin_session_delay = float(os.getenv('BOLETIN_SESSION_DELAY_SECONDS', '1'))
+            
             logger.info(f"LLMAnalysisServiceDirect inicializado con modelo: {self.model_name}")
             
         except Exception as e:
             logger.error(f"Error inicializando LLMAnalysisServiceDirect: {str(e)}")
             raise
     
-    def crear_sesion_pdf_fecha(self, fecha_boletin: str = None):
-        """Crea una nueva sesión con cookies frescas para poder consultar el boletin de fecha_boletin"""
+    def crear_sesion_pdf_fecha(self, fecha_boletin: str = None) -> str:
+        """
+        Crea una nueva sesión con cookies frescas para poder consultar el boletin de fecha_boletin
+        
+        Returns:
+            str: PDF codificado en Base64
+        
+        Raises:
+            EditionNotAvailableError: Si no hay edición para la fecha
+            Exception: Si el sitio no responde (error transitorio)
+        """
         session = requests.Session()
     
         # Visitar página principal para establecer sesión
-        session.get('https://www.boletinoficial.gob.ar/seccion/primera')
-        time.sleep(1)
-        fecha_obj = datetime.strptime(fecha_boletin, '%Y-%m-%d')
-        fecha_formateada= fecha_obj.strftime('%d-%m-%Y')
+        session.get(f'{self.boletin_base_url}/seccion/primera')
+        time.sleep(self.boletin_session_delay)
 
-        url1= f'https://www.boletinoficial.gob.ar/edicion/actualizar/{fecha_formateada}'
         #sesion que setea la fecha para traer el pdf de una fecha determinada
-        response = session.get(url1)
-        
-        if response.status_code == 200:
-                url2 = "https://www.boletinoficial.gob.ar/pdf/download_section"
-                headers = {
-                        'Accept': 'application/json, text/javascript, */*; q=0.01',
-                        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-                        'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                        'Origin': 'https://www.boletinoficial.gob.ar',
-                        'Referer': 'https://www.boletinoficial.gob.ar/seccion/primera',
-                        'X-Requested-With': 'XMLHttpRequest',
-                        'Sec-Fetch-Dest': 'empty',
-                        'Sec-Fetch-Mode': 'cors',
-                        'Sec-Fetch-Site': 'same-origin',
-                }
-                data = {
-                    'nombreSeccion': 'primera',
-                }
+        response = session.get(self._edition_url(fecha_boletin))
+        if response.status_code == 404:
+            raise EditionNotAvailableError(f"No hay edición del Boletín Oficial para {fecha_boletin}")
+        if response.status_code != 200:
+            raise Exception("No puedo obtener sesion pdf anterior")
+        
+        # Hacer petición POST con la sesión establecida
+        response = session.post(
+            f'{self.boletin_base_url}/pdf/download_section',
+            data={'nombreSeccion': 'primera'},
+            headers=self._pdf_download_headers(),
+            timeout=30
+        )
+        if response.status_code != 200:
+            raise Exception("No puedo obtener pdf anterior")
+        
+        # La respuesta es JSON con el PDF en Base64 (vacío si no hubo edición ese día)
+        return extract_pdf_base64(response.json(), fecha_boletin)
 
-                # Hacer petición POST con la sesión establecida
-                response = session.post(url2, data=data, headers=headers, timeout=30)
+    def _edition_url(self, fecha_boletin: str) -> str:
+        """URL que fija en la sesión la edición de la fecha indicada"""
+        fecha_obj = datetime.strptime(fecha_boletin, '%Y-%m-%d')
+        fecha_formateada = fecha_obj.strftime('%d-%m-%Y')
+        return f'{self.boletin_base_url}/edicion/actualizar/{fecha_formateada}'
 
-                if response.status_code == 200:
-                    # La respuesta es JSON con el PDF en Base64
-                    json_data = response.json()
-                    pdf_base64 = json_data['pdfBase64']
-                    return pdf_base64
-                else:
-                    return self._create_error_response("No puedo obtener pdf anterior") 
-    
-        else:
-            return self._create_error_response("No puedo obtener sesion pdf anterior") 
+    def _pdf_download_headers(self) -> Dict[str, str]:
+        """Headers de la petición AJAX que descarga el PDF de la sección"""
+        return {
+                'Accept': 'application/json, text/javascript, */*; q=0.01',
+                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+                'Origin': self.boletin_base_url,
+                'Referer': f'{self.boletin_base_url}/seccion/primera',
+                'X-Requested-With': 'XMLHttpRequest',
+                'Sec-Fetch-Dest': 'empty',
+                'Sec-Fetch-Mode': 'cors',
+                'Sec-Fetch-Site': 'same-origin',
+        }
 
     
-    def analyze_normativa(self, date: str = None) -> Dict[str, Any]:
+    def analyze_normativa(self, date: str = None, on_summary: Optional[Callable[[str, list], None]] = None,
+                          call_log: Optional[list] = None, pdf_part: Optional[types.Part] = None) -> Dict[str, Any]:
         """
         Analiza el contenido normativo usando Gemini directamente
         Siempre usa la fecha parametro o la mas actual que encuentre
         
         Args:
             date: Fecha del boletín 
+            on_summary: Callback opcional que recibe (resumen, cambios_principales)
+                apenas esos campos terminan de llegar en el stream, antes de
+                que finalice la respuesta completa
+            call_log: Lista opcional que recibe las métricas de cada llamada a Gemini
+            pdf_part: PDF ya obtenido con fetch_pdf_part (se evita volver a descargarlo)
             
         Returns:
             dict: Análisis estructurado de la normativa
@@ -105,60 +255,42 @@ class LLMAnalysisServiceDirect:
         
         max_retries = int(os.getenv('MAX_RETRY_ATTEMPTS', '3'))
         
+        # Avisar del resumen apenas aparece en el stream (una sola vez, aun con reintentos)
+        on_chunk = None
+        if on_summary is not None:
+            on_chunk = self._make_summary_watcher(on_summary)
+        
+        # Perfil de la edición (páginas, instrumentos): se calcula una vez, no en cada reintento
+        profile = None
+        
         for attempt in range(max_retries):
             try:
                 logger.info(f"Iniciando análisis de normativa para la fecha {param_date}, intento {attempt + 1}")
                 
                
                 # Crear contenido usando el formato de geminiPrompt.py
-                contents = self._create_analysis_contents(param_date)
-                
-                # Configurar tools y thinking
-                tool_config = {"force_refresh": True}
-                tools = [
-                    types.Tool(url_context=types.UrlContext()),
-                    types.Tool(googleSearch=types.GoogleSearch()),
-                ]
-                
-                generate_content_config = types.GenerateContentConfig(
-                    temperature=int(os.getenv('LANGCHAIN_TEMPERATURE', '0')),
-                    thinking_config = types.ThinkingConfig(
-                        thinking_budget=-1,
-                    ),
-                    media_resolution="MEDIA_RESOLUTION_UNSPECIFIED",
-                    tools=tools,
-                )
+                if pdf_part is not None:
+                    contents = self._build_analysis_contents(param_date, pdf_part)
+                else:
+                    contents = self._create_analysis_contents(param_date)
                 
                 # Realizar llamada a Gemini
                 logger.info("Enviando solicitud a Gemini API con thinking y Google Search")
                 
-                # Recopilar respuesta completa
-                response_text = ""
-                for chunk in self.client.models.generate_content_stream(
-                    model=self.model_name,
-                    contents=contents,
-                    config=generate_content_config,
-                ):
-                    if chunk.text:
-                        response_text += chunk.text
-                
-                #Borrar Cache de contexto pendiente
-                
-                
-                if not response_text:
-                    raise Exception("Respuesta vacía de Gemini")
-                
-                logger.info(f"Respuesta recibida de Gemini: {len(response_text)} caracteres")
-                
-                # Parsear respuesta JSON
-                analysis_result = self._parse_response(response_text)
-                
-                # Validar estructura de respuesta
-                validated_result = self._validate_analysis_response(analysis_result)
+                # Modelo y thinking según el tamaño de la edición
+                if profile is None:
+                    profile = self._profile_analysis_contents(contents)
+                validated_result = self._analyze_with_routing(contents, on_chunk=on_chunk, call_log=call_log,
+                                                              attempt=attempt + 1, profile=profile)
                 
                 logger.info("Análisis de normativa completado exitosamente con Gemini directo")
                 return validated_result
                 
+            except EditionNotAvailableError as e:
+                # No tiene sentido reintentar: la edición no existe
+                error_handler.log_info('boletin_edition_not_available', {'fecha': param_date})
+                return self._create_error_response(str(e), sin_edicion=True)
+                
             except json.JSONDecodeError as e:
                 error_handler.log_error(ErrorCode.LLM_PARSING_ERROR, e, {
                     'attempt': attempt + 1,
@@ -173,6 +305,10 @@ class LLMAnalysisServiceDirect:
                     'attempt': attempt + 1,
                     'fecha_actual': current_date
                 })
+                if is_missing_file_error(e):
+                    # El archivo subido ya no existe: el próximo intento vuelve a subir el PDF
+                    self.forget_pdf_handle(param_date)
+                    pdf_part = None
                 if attempt == max_retries - 1:
                     return self._create_error_response(f"Error en análisis después de {max_retries} intentos: {str(e)}")
                 continue
@@ -180,7 +316,8 @@ class LLMAnalysisServiceDirect:
         # Si llegamos aquí, todos los intentos fallaron
         return self._create_error_response("Todos los intentos de análisis fallaron")
     
-    def get_expert_opinions(self, normativa_summary: str, cambios_principales: list = None, fecha_boletin: str = None) -> list:
+    def get_expert_opinions(self, normativa_summary: str, cambios_principales: list = None, fecha_boletin: str = None,
+                            call_log: Optional[list] = None) -> list:
         """
         Obtiene opiniones de expertos sobre el análisis del Boletín Oficial
         buscando en portales argentinos
@@ -189,6 +326,7 @@ class LLMAnalysisServiceDirect:
             normativa_summary: Resumen de la normativa
             cambios_principales: Lista de cambios principales
             fecha_boletin: Fecha del boletín oficial a buscar
+            call_log: Lista opcional que recibe las métricas de cada llamada a Gemini
             
         Returns:
             list: Lista de opiniones de expertos con referencias
@@ -197,6 +335,9 @@ class LLMAnalysisServiceDirect:
             logger.warning("get_expert_opinions: No se proporcionó fecha del boletín")
             return []
         
+        if os.getenv('EXPERT_OPINIONS_MODE', 'single').lower() == 'fanout':
+            return self.get_expert_opinions_fanout(normativa_summary, cambios_principales, fecha_boletin, call_log)
+        
         max_retries = int(os.getenv('MAX_RETRY_ATTEMPTS', '2'))
         
         for attempt in range(max_retries):
@@ -207,26 +348,13 @@ class LLMAnalysisServiceDirect:
                 contents = self._create_expert_opinions_contents(fecha_boletin, normativa_summary, cambios_principales)
                 
                 # Configurar tools para búsqueda web
-                tools = [
-                    types.Tool(googleSearch=types.GoogleSearch())
-                ]
-                
-                generate_content_config = types.GenerateContentConfig(
-                    tools=tools,
-                    temperature=1,
-                )
+                generate_content_config = self._create_expert_opinions_config()
                 
                 # Realizar llamada a Gemini
                 logger.info("Enviando solicitud a Gemini para búsqueda de opiniones de expertos")
                 
-                response_text = ""
-                for chunk in self.client.models.generate_content_stream(
-                    model=self.model_name,
-                    contents=contents,
-                    config=generate_content_config,
-                ):
-                    if chunk.text:
-                        response_text += chunk.text
+                response_text = self._stream_generate(contents, generate_content_config, operation='opiniones',
+                                                      call_log=call_log, attempt=attempt + 1)
                 
                 if not response_text:
                     logger.warning("Respuesta vacía de Gemini para opiniones de expertos")
@@ -235,7 +363,8 @@ class LLMAnalysisServiceDirect:
                 logger.info(f"Respuesta de opiniones recibida: {len(response_text)} caracteres")
                 
                 # Parsear respuesta JSON
-                opinions_result = self._parse_expert_opinions_response(response_text)
+                with timing.span('parseo_respuesta_llm'):
+                    opinions_result = self._parse_expert_opinions_response(response_text)
                 
                 logger.info(f"Opiniones de expertos obtenidas: {len(opinions_result)} opiniones")
                 return opinions_result
@@ -253,11 +382,652 @@ class LLMAnalysisServiceDirect:
         
         return []
     
+    def get_expert_opinions_fanout(self, normativa_summary: str, cambios_principales: list = None, fecha_boletin: str = None,
+                                   call_log: Optional[list] = None) -> list:
+        """
+        Busca opiniones con varias búsquedas chicas en paralelo en lugar de un único prompt
+        
+        Lanza una búsqueda por cada cambio de impacto alto y una por cada grupo de medios,
+        con un límite de concurrencia, y fusiona los resultados deduplicando por URL/título.
+        
+        Args:
+            normativa_summary: Resumen de la normativa
+            cambios_principales: Lista de cambios principales
+            fecha_boletin: Fecha del boletín oficial a buscar
+            
+        Returns:
+            list: Hasta 10 opiniones ordenadas por relevancia
+        """
+        if not fecha_boletin:
+            logger.warning("get_expert_opinions_fanout: No se proporcionó fecha del boletín")
+            return []
+        
+        searches = self._build_fanout_searches(fecha_boletin, normativa_summary, cambios_principales or [])
+        max_concurrency = max(1, int(os.getenv('EXPERT_OPINIONS_MAX_CONCURRENCY', '3')))
+        
+        logger.info(f"Búsqueda fan-out de opiniones para {fecha_boletin}: {len(searches)} búsquedas, concurrencia {max_concurrency}")
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {
+                executor.submit(timing.in_current_context(self._search_expert_opinions), contents, call_log): label
+                for label, contents in searches
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    opinions = future.result()
+                    logger.info(f"Búsqueda '{label}': {len(opinions)} opiniones")
+                    results.append(opinions)
+                except Exception as e:
+                    # Una búsqueda fallida no invalida el resto
+                    error_handler.log_error(ErrorCode.LLM_API_ERROR, e, {
+                        'fecha_boletin': fecha_boletin,
+                        'action': 'get_expert_opinions_fanout',
+                        'search': label
+                    })
+        
+        merged = self._merge_expert_opinions(results)
+        
+        error_handler.log_info('expert_opinions_fanout_completed', {
+            'fecha_boletin': fecha_boletin,
+            'searches': len(searches),
+            'successful_searches': len(results),
+            'raw_opinions': sum(len(r) for r in results),
+            'merged_opinions': len(merged)
+        })
+        
+        return merged
+    
+    def _build_fanout_searches(self, fecha_boletin: str, normativa_summary: str, cambios_principales: list) -> list:
+        """Arma las búsquedas (etiqueta, contenido) del modo fan-out"""
+        searches = []
+        
+        max_change_searches = int(os.getenv('EXPERT_OPINIONS_MAX_CHANGE_SEARCHES', '3'))
+        high_impact = [
+            cambio for cambio in cambios_principales
+            if isinstance(cambio, dict) and str(cambio.get('impacto', '')).lower() in ('alto', 'alta')
+        ]
+        for cambio in high_impact[:max_change_searches]:
+            label = f"cambio {cambio.get('tipo', '')} {cambio.get('numero', '')}".strip()
+            searches.append((label, self._create_expert_opinions_contents(
+                fecha_boletin, normativa_summary, cambios_principales, cambio_foco=cambio
+            )))
+        
+        for group_name, outlets in OUTLET_GROUPS.items():
+            searches.append((f"medios {group_name}", self._create_expert_opinions_contents(
+                fecha_boletin, normativa_summary, cambios_principales, medios=outlets
+            )))
+        
+        return searches
+    
+    def _search_expert_opinions(self, contents: list, call_log: Optional[list] = None) -> list:
+        """Ejecuta una búsqueda de opiniones (un intento) y parsea la respuesta"""
+        response_text = self._stream_generate(contents, self._create_expert_opinions_config(), operation='opiniones',
+                                              call_log=call_log)
+        if not response_text:
+            return []
+        return self._parse_expert_opinions_response(response_text)
+    
+    def _merge_expert_opinions(self, opinion_lists: list) -> list:
+        """
+        Fusiona los resultados de varias búsquedas
+        
+        Deduplica por URL normalizada o título normalizado, cuenta en cuántas búsquedas
+        apareció cada opinión y ordena por relevancia, cobertura y presencia de URL.
+        
+        Returns:
+            list: Hasta 10 opiniones
+        """
+        merged = []
+        hits = []
+        index_by_key = {}
+        
+        for opinions in opinion_lists:
+            for opinion in opinions:
+                keys = [key for key in (self._normalize_url(opinion.get('url', '')),
+                                        self._normalize_title(opinion.get('titulo', ''))) if key]
+                position = next((index_by_key[key] for key in keys if key in index_by_key), None)
+                
+                if position is None:
+                    position = len(merged)
+                    merged.append(opinion)
+                    hits.append(1)
+                else:
+                    hits[position] += 1
+                    current = merged[position]
+                    # Conservar la versión más relevante / con URL
+                    if (RELEVANCE_WEIGHTS.get(opinion.get('relevancia'), 0) > RELEVANCE_WEIGHTS.get(current.get('relevancia'), 0)
+                            or (not current.get('url') and opinion.get('url'))):
+                        merged[position] = opinion
+                
+                for key in keys:
+                    index_by_key.setdefault(key, position)
+        
+        ranked = sorted(
+            range(len(merged)),
+            key=lambda i: (
+                RELEVANCE_WEIGHTS.get(merged[i].get('relevancia'), 0),
+                hits[i],
+                bool(merged[i].get('url'))
+            ),
+            reverse=True
+        )
+        validated_opinions = [merged[i] for i in ranked]
+        return validated_opinions[:10]
+    
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        """Normaliza una URL para deduplicar (sin esquema, www, parámetros de tracking ni barra final)"""
+        if not url or not isinstance(url, str):
+            return ''
+        parsed = urlsplit(url.strip().lower())
+        if not parsed.netloc:
+            return ''
+        host = parsed.netloc[4:] if parsed.netloc.startswith('www.') else parsed.netloc
+        query = '&'.join(
+            part for part in parsed.query.split('&')
+            if part and not part.startswith('utm_')
+        )
+        normalized = f"{host}{parsed.path.rstrip('/')}"
+        return f"{normalized}?{query}" if query else normalized
+    
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        """Normaliza un título para deduplicar (minúsculas, sólo letras y números)"""
+        if not title or not isinstance(title, str) or title == 'No especificado':
+            return ''
+        return ' '.join(re.findall(r'\w+', title.lower()))
+    
+    def get_pdf_handle(self, fecha_boletin: str) -> Optional[Dict[str, Any]]:
+        """Handle vigente del PDF subido a la Files API para una fecha (None si no hay o expiró)"""
+        with self._pdf_handles_lock:
+            handle = self._pdf_handles.get(fecha_boletin)
+        if not handle:
+            return None
+        if handle['expira_en'] - PDF_HANDLE_EXPIRY_MARGIN <= datetime.utcnow():
+            self.forget_pdf_handle(fecha_boletin)
+            return None
+        return handle
+    
+    def remember_pdf_handle(self, fecha_boletin: str, handle: Dict[str, Any]):
+        """Registra un handle (por ejemplo, el guardado en MongoDB con el análisis)"""
+        if handle and handle.get('uri') and handle.get('expira_en'):
+            with self._pdf_handles_lock:
+                self._pdf_handles[fecha_boletin] = handle
+    
+    def forget_pdf_handle(self, fecha_boletin: str):
+        with self._pdf_handles_lock:
+            self._pdf_handles.pop(fecha_boletin, None)
+    
+    def _handle_for_uri(self, uri: str) -> Dict[str, Any]:
+        with self._pdf_handles_lock:
+            for handle in self._pdf_handles.values():
+                if handle.get('uri') == uri:
+                    return handle
+        return {}
+    
+    def fetch_pdf_part(self, fecha_boletin: str) -> types.Part:
+        """
+        Obtiene el PDF de una edición listo para analyze_normativa(pdf_part=...)
+        
+        Permite separar la descarga del análisis (por ejemplo, en el backfill).
+        
+        Raises:
+            Exception: Si la edición no se pudo descargar
+        """
+        return self._pdf_part(fecha_boletin)
+    
+    def _pdf_part(self, fecha_boletin: str) -> types.Part:
+        """Parte con el PDF de la edición: el archivo ya subido o una descarga nueva"""
+        handle = self.get_pdf_handle(fecha_boletin) if self.pdf_upload_enabled else None
+        if handle:
+            logger.info(f"Reutilizando PDF subido a Gemini para {fecha_boletin}: {handle['nombre']}")
+            memory.record_pdf(fecha_boletin, handle.get('bytes', 0), 'subida')
+            return self._file_part(handle)
+        
+        with timing.span('obtencion_pdf'):
+            try:
+                pdf_bytes = self.cached_pdf(fecha_boletin)
+                if pdf_bytes is None:
+                    pdf_bytes = self.cache_pdf(fecha_boletin, self.crear_sesion_pdf_fecha(fecha_boletin))
+                return self._pdf_part_from_bytes(fecha_boletin, pdf_bytes)
+            except MemoryError:
+                return self._edition_url_part(fecha_boletin, 0, 'memory_error')
+    
+    def cached_pdf(self, fecha_boletin: str) -> Optional[bytes]:
+        """PDF de la edición guardado en el cache local (None si no está o no hay cache)"""
+        if self.pdf_cache is None:
+            return None
+        return self.pdf_cache.get(pdf_key(fecha_boletin))
+    
+    def cache_pdf(self, fecha_boletin: str, pdf_base64: str) -> bytes:
+        """Decodifica el PDF descargado y lo guarda en el cache local (las ediciones no cambian)"""
+        pdf_bytes = base64.b64decode(pdf_base64)
+        if self.pdf_cache is not None:
+            self.pdf_cache.put(pdf_key(fecha_boletin), pdf_bytes)
+        return pdf_bytes
+    
+    def _pdf_part_from_bytes(self, fecha_boletin: str, pdf_bytes: bytes) -> types.Part:
+        """
+        Sube el PDF descargado o lo adjunta inline
+        
+        Se sube si GEMINI_PDF_UPLOAD está habilitado o si inline no entra (ver _fits_inline).
+        Si además la subida falla, se analiza la edición desde su URL pública (análisis degradado)
+        en lugar de arriesgar quedarse sin memoria.
+        """
+        metrics.observe('PdfBytes', len(pdf_bytes), 'Bytes')
+        fits_inline = self._fits_inline(pdf_bytes)
+        if self.pdf_upload_enabled or not fits_inline:
+            handle = self._upload_pdf(fecha_boletin, pdf_bytes)
+            if handle:
+                memory.record_pdf(fecha_boletin, len(pdf_bytes), 'subida')
+                return self._file_part(handle)
+            if not fits_inline:
+                return self._edition_url_part(fecha_boletin, len(pdf_bytes), 'pdf_too_large_for_memory')
+        
+        memory.record_pdf(fecha_boletin, len(pdf_bytes), 'inline')
+        return types.Part.from_bytes(mime_type="application/pdf", data=pdf_bytes)
+    
+    def _fits_inline(self, pdf_bytes: bytes) -> bool:
+        """
+        Si el PDF puede ir inline en la solicitud
+        
+        La solicitud lleva el PDF en base64 dentro del JSON, así que el SDK llega a tener
+        varias copias a la vez: se estima PDF_INLINE_MEMORY_FACTOR veces su tamaño y se
+        compara con la memoria libre de la Lambda (si se conoce el límite).
+        """
+        if len(pdf_bytes) > self.pdf_inline_max_bytes:
+            return False
+        headroom = memory.headroom_bytes()
+        return headroom is None or len(pdf_bytes) * self.pdf_inline_memory_factor <= headroom
+    
+    def _edition_url_part(self, fecha_boletin: str, pdf_size: int, reason: str) -> types.Part:
+        """Parte de texto que pide leer la edición desde el sitio (url_context) en lugar del PDF adjunto"""
+        url = f"{self.boletin_base_url}/seccion/primera/{fecha_boletin.replace('-', '')}"
+        memory.record_pdf(fecha_boletin, pdf_size, 'url')
+        metrics.increment('PdfDegraded')
+        error_handler.log_warning('pdf_analysis_degraded', {
+            'fecha_boletin': fecha_boletin,
+            'pdf_bytes': pdf_size,
+            'reason': reason,
+            'rss_mb': round(memory.rss_bytes() / (1024 * 1024), 1),
+            'url': url
+        })
+        return types.Part.from_text(
+            text=f"El PDF de la edición no se adjunta por su tamaño. Leer la Primera Sección de la edición "
+                 f"del {fecha_boletin} directamente desde {url}"
+        )
+    
+    def _upload_pdf(self, fecha_boletin: str, pdf_bytes: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Sube el PDF a la Files API de Gemini
+        
+        Returns:
+            dict o None: Handle del archivo (None si la subida falla y hay que usar inline)
+        """
+        try:
+            uploaded = self.client.files.upload(
+                file=io.BytesIO(pdf_bytes),
+                config=types.UploadFileConfig(mime_type='application/pdf', display_name=f'boletin-{fecha_boletin}')
+            )
+        except Exception as e:
+            error_handler.log_warning('gemini_pdf_upload_failed', {
+                'fecha_boletin': fecha_boletin,
+                'error': str(e)
+            })
+            return None
+        
+        expira_en = uploaded.expiration_time
+        if expira_en is None:
+            expira_en = datetime.utcnow() + PDF_HANDLE_TTL
+        elif expira_en.tzinfo is not None:
+            expira_en = expira_en.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        handle = {
+            'nombre': uploaded.name,
+            'uri': uploaded.uri,
+            'mime_type': uploaded.mime_type or 'application/pdf',
+            'expira_en': expira_en,
+            'bytes': len(pdf_bytes),
+            'paginas': count_pdf_pages(pdf_bytes)
+        }
+        if self.router.enabled:
+            handle['instrumentos_estimados'] = count_instruments(pdf_bytes)
+        
+        self.remember_pdf_handle(fecha_boletin, handle)
+        error_handler.log_info('gemini_pdf_uploaded', {
+            'fecha_boletin': fecha_boletin,
+            'file_name': handle['nombre'],
+            'bytes': handle['bytes'],
+            'expira_en': expira_en.isoformat()
+        })
+        return handle
+    
+    @staticmethod
+    def _file_part(handle: Dict[str, Any]) -> types.Part:
+        return types.Part.from_uri(file_uri=handle['uri'], mime_type=handle.get('mime_type', 'application/pdf'))
+    
+    def _stream_generate(self, contents: list, config, on_chunk: Optional[Callable[[str], None]] = None,
+                         operation: str = 'generate', model: Optional[str] = None,
+                         call_log: Optional[list] = None, attempt: int = 1) -> str:
+        """
+        Ejecuta una llamada streaming a Gemini y devuelve el texto completo
+        
+        Con LLM_HEDGE_ENABLED, si la llamada tarda más que el percentil configurado se
+        lanza una segunda idéntica y gana la primera respuesta válida.
+        
+        Args:
+            contents: Contenido de la solicitud
+            config: GenerateContentConfig de la llamada
+            on_chunk: Callback opcional que recibe el texto acumulado tras cada chunk
+            operation: Tipo de llamada, agrupa las latencias para el hedging
+            model: Modelo a usar (por defecto self.model_name)
+            call_log: Lista opcional donde se agregan las métricas de cada llamada
+            attempt: Número de intento del llamador (para las métricas)
+            
+        Returns:
+            str: Texto completo de la respuesta
+        """
+        call = {'operation': operation, 'model': model or self.model_name, 'call_log': call_log, 'attempt': attempt}
+        
+        if not self.hedging.enabled:
+            return self._run_stream(contents, config, on_chunk, call=call)
+        
+        return self.hedging.run(
+            operation,
+            lambda cancel_event, first_chunk, is_hedge: self._run_stream(
+                contents, config, on_chunk, cancel_event=cancel_event, first_chunk=first_chunk,
+                call={**call, 'is_hedge': is_hedge}
+            )
+        )
+    
+    def _run_stream(self, contents: list, config, on_chunk: Optional[Callable[[str], None]] = None,
+                    cancel_event: Optional[threading.Event] = None, first_chunk=None,
+                    call: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Un intento de llamada streaming (cancelable entre chunks)
+        
+        Args:
+            cancel_event: Si se activa, se corta el stream y se devuelve lo recibido
+            first_chunk: Señal que se activa al llegar el primer chunk
+            call: operation, model, call_log y attempt de la llamada (ver _stream_generate), e is_hedge
+                si es la llamada de cobertura del hedging
+        """
+        call = call or {}
+        model = call.get('model') or self.model_name
+        
+        # Estimar tokens cuenta las páginas del PDF: sólo si hay cuota que reservar
+        estimated_tokens = self._estimate_request_tokens(contents) if self.rate_limiter.enabled else 0
+        queued_seconds = self.rate_limiter.acquire(estimated_tokens, operation='generate_content_stream')
+        
+        started = time.monotonic()
+        first_chunk_at = None
+        chunks = 0
+        usage = None
+        error = None
+        response_text = ""
+        try:
+            stream = self.client.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=config,
+            )
+            try:
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    chunks += 1
+                    if first_chunk_at is None:
+                        first_chunk_at = time.monotonic()
+                    if first_chunk is not None:
+                        first_chunk.set()
+                    # El último chunk trae el conteo acumulado de tokens
+                    usage = getattr(chunk, 'usage_metadata', None) or usage
+                    if chunk.text:
+                        response_text += chunk.text
+                        if on_chunk is not None:
+                            on_chunk(response_text)
+            finally:
+                # Libera la conexión HTTP del stream abandonado
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_call_metrics({
+                'operacion': call.get('operation', 'generate'),
+                'modelo': model,
+                'intento': call.get('attempt', 1),
+                'hedge': call.get('is_hedge', False),
+                'cancelada': cancel_event is not None and cancel_event.is_set(),
+                'espera_cuota_s': round(queued_seconds or 0.0, 3),
+                'tiempo_primer_chunk_s': round(first_chunk_at - started, 3) if first_chunk_at else None,
+                'tiempo_total_s': round(time.monotonic() - started, 3),
+                'chunks': chunks,
+                'caracteres': len(response_text),
+                **usage_to_metrics(usage),
+                'error': type(error).__name__ if error else None
+            }, call.get('call_log'))
+        return response_text
+    
+    def _record_call_metrics(self, call_metrics: Dict[str, Any], call_log: Optional[list]):
+        """Emite las métricas de una llamada y las agrega al call_log del llamador"""
+        if call_log is not None:
+            call_log.append(call_metrics)
+        if not call_metrics['cancelada']:
+            # Tiempos del request en curso (las llamadas canceladas por un hedge no cuentan)
+            stage = 'gemini_' + call_metrics['operacion'].split(':')[0]
+            timing.record(stage + '_primer_chunk', call_metrics['tiempo_primer_chunk_s'])
+            timing.record(stage + '_total', call_metrics['tiempo_total_s'])
+            if call_metrics['tiempo_primer_chunk_s'] is not None:
+                metrics.observe('GeminiTimeToFirstChunk', round(call_metrics['tiempo_primer_chunk_s'] * 1000, 1))
+            metrics.observe('GeminiLatency', round(call_metrics['tiempo_total_s'] * 1000, 1))
+        metrics.increment('GeminiCalls')
+        if call_metrics['error']:
+            metrics.increment('GeminiErrors')
+        # Los tokens de una llamada cancelada también se facturan
+        for field, name in (('tokens_prompt', 'GeminiPromptTokens'), ('tokens_respuesta', 'GeminiOutputTokens'),
+                            ('tokens_thinking', 'GeminiThinkingTokens'), ('tokens_cache', 'GeminiCachedTokens')):
+            metrics.increment(name, call_metrics.get(field, 0))
+        error_handler.log_info('llm_call_metrics', call_metrics)
+    
+    def _analyze_with_routing(self, contents: list, on_chunk: Optional[Callable[[str], None]] = None,
+                              call_log: Optional[list] = None, attempt: int = 1,
+                              profile: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Analiza con el nivel de modelo que elige el router y escala a uno más fuerte
+        sólo si la respuesta no pasa la validación
+        
+        Con el router desactivado se usa siempre el último nivel (LANGCHAIN_MODEL, thinking -1).
+        
+        Args:
+            profile: Perfil ya calculado de la edición (ver _profile_analysis_contents)
+        
+        Returns:
+            dict: Análisis validado
+        """
+        if profile is None:
+            profile = self._profile_analysis_contents(contents)
+        tier = self.router.select_tier(profile)
+        calls = call_log if call_log is not None else []
+        
+        while True:
+            started = time.monotonic()
+            response_text = self._stream_generate(
+                contents, self._create_analysis_config(tier['thinking_budget']), on_chunk=on_chunk,
+                operation=f"analisis:{tier['name']}", model=tier['model'], call_log=calls, attempt=attempt
+            )
+            stronger = self._check_tier_response(tier, profile, response_text, time.monotonic() - started,
+                                                 last_completed_call(calls))
+            if stronger is None:
+                return self._process_analysis_response(response_text)
+            tier = stronger
+    
+    def _profile_analysis_contents(self, contents: list) -> Dict[str, int]:
+        """Perfil de tamaño de la edición adjunta (el conteo de instrumentos sólo si hay router)"""
+        pdf_bytes = b''
+        handle = None
+        prompt_chars = 0
+        for content in contents or []:
+            for part in getattr(content, 'parts', None) or []:
+                inline_data = getattr(part, 'inline_data', None)
+                file_data = getattr(part, 'file_data', None)
+                if inline_data is not None and inline_data.data:
+                    pdf_bytes = inline_data.data
+                elif file_data is not None:
+                    handle = self._handle_for_uri(file_data.file_uri)
+                elif getattr(part, 'text', None):
+                    prompt_chars += len(part.text)
+        
+        if handle is not None:
+            # El PDF ya está en Gemini: se usa el perfil calculado al subirlo
+            pages = handle.get('paginas', 0)
+            profile = {'paginas': pages, 'tokens_estimados': pages * TOKENS_PER_PDF_PAGE + prompt_chars // 4}
+            if self.router.enabled:
+                profile['instrumentos_estimados'] = handle.get('instrumentos_estimados', 0)
+            return profile
+        
+        return self.router.profile_document(pdf_bytes, prompt_chars, with_instruments=self.router.enabled)
+    
+    def _check_tier_response(self, tier: Dict[str, Any], profile: Dict[str, int], response_text: str,
+                             seconds: float, call_metrics: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Registra la llamada de un nivel y decide si hay que escalar
+        
+        Usa los tokens reales de call_metrics cuando Gemini los informó; si no, estimaciones.
+        
+        Returns:
+            dict o None: Nivel más fuerte a usar, o None para aceptar la respuesta
+        """
+        try:
+            parsed = self._parse_response(response_text) if response_text else None
+        except json.JSONDecodeError:
+            parsed = None
+        
+        issues = self.router.validation_issues(parsed, profile)
+        call_metrics = call_metrics or {}
+        input_tokens = call_metrics.get('tokens_prompt') or profile.get('tokens_estimados', 0)
+        output_tokens = ((call_metrics.get('tokens_respuesta', 0) + call_metrics.get('tokens_thinking', 0))
+                         or len(response_text or '') // 4)
+        self.router.record(tier, seconds, input_tokens, output_tokens, issues)
+        
+        stronger = self.router.stronger_tier(tier) if issues else None
+        if stronger is not None:
+            error_handler.log_warning('llm_tier_escalated', {
+                'from_tier': tier['name'],
+                'to_tier': stronger['name'],
+                'issues': issues
+            })
+        return stronger
+    
+    def _estimate_request_tokens(self, contents: list) -> int:
+        """
+        Estima los tokens de una solicitud para reservar cuota
+        
+        Gemini cuenta 258 tokens por página de PDF; el texto se aproxima a 4 caracteres
+        por token. Se suma una reserva fija para la respuesta.
+        """
+        tokens = int(os.getenv('GEMINI_ESTIMATED_OUTPUT_TOKENS', '4000'))
+        for content in contents or []:
+            for part in getattr(content, 'parts', None) or []:
+                inline_data = getattr(part, 'inline_data', None)
+                file_data = getattr(part, 'file_data', None)
+                if inline_data is not None and inline_data.data:
+                    tokens += count_pdf_pages(inline_data.data) * TOKENS_PER_PDF_PAGE
+                elif file_data is not None:
+                    tokens += self._handle_for_uri(file_data.file_uri).get('paginas', 0) * TOKENS_PER_PDF_PAGE
+                elif getattr(part, 'text', None):
+                    tokens += len(part.text) // 4
+        return tokens
+    
+    def _make_summary_watcher(self, on_summary: Callable[[str, list], None]) -> Callable[[str], None]:
+        """Crea un callback de stream que dispara on_summary una única vez"""
+        state = {'fired': False}
+        lock = threading.Lock()  # con hedging dos streams pueden alimentar el mismo watcher
+        
+        def _watch(partial_text: str):
+            if state['fired']:
+                return
+            summary = self._extract_summary_fields(partial_text)
+            if summary is None:
+                return
+            with lock:
+                if state['fired']:
+                    return
+                state['fired'] = True
+            try:
+                on_summary(*summary)
+            except Exception as e:
+                # El análisis principal no debe fallar por el callback
+                logger.warning(f"Error en callback de resumen anticipado: {str(e)}")
+        
+        return _watch
+    
+    def _extract_summary_fields(self, partial_text: str) -> Optional[Tuple[str, list]]:
+        """
+        Extrae 'resumen' y 'cambios_principales' de una respuesta JSON parcial
+        
+        El prompt pide esos campos antes que 'impacto_estimado' y 'areas_afectadas',
+        por lo que suelen estar completos bastante antes del final del stream.
+        
+        Returns:
+            tuple o None: (resumen, cambios_principales) si ambos valores ya están completos
+        """
+        decoder = json.JSONDecoder()
+        values = []
+        for field in ('resumen', 'cambios_principales'):
+            match = re.search(rf'"{field}"\s*:\s*', partial_text)
+            if not match:
+                return None
+            try:
+                value, _ = decoder.raw_decode(partial_text, match.end())
+            except json.JSONDecodeError:
+                return None
+            values.append(value)
+        
+        resumen, cambios = values
+        if not isinstance(resumen, str) or not isinstance(cambios, list):
+            return None
+        return resumen, cambios
+    
+    def _create_analysis_config(self, thinking_budget: int = -1):
+        """Configuración de tools y thinking para el análisis de normativa (-1: thinking dinámico)"""
+        tools = [
+            types.Tool(url_context=types.UrlContext()),
+            types.Tool(googleSearch=types.GoogleSearch()),
+        ]
+        
+        return types.GenerateContentConfig(
+            temperature=int(os.getenv('LANGCHAIN_TEMPERATURE', '0')),
+            thinking_config = types.ThinkingConfig(
+                thinking_budget=thinking_budget,
+            ),
+            media_resolution="MEDIA_RESOLUTION_UNSPECIFIED",
+            tools=tools,
+        )
+    
+    def _create_expert_opinions_config(self):
+        """Configuración con búsqueda web para opiniones de expertos"""
+        tools = [
+            types.Tool(googleSearch=types.GoogleSearch())
+        ]
+        
+        return types.GenerateContentConfig(
+            tools=tools,
+            temperature=1,
+        )
+    
     def _create_analysis_contents(self,param_date) -> list:
         """Crea el contenido para análisis en Gemini"""
 
-        #obtiene el pdf de la fecha
-        pdf_base64 = self.crear_sesion_pdf_fecha(param_date)
+        #obtiene el pdf de la fecha (o el archivo ya subido a Gemini)
+        return self._build_analysis_contents(param_date, self._pdf_part(param_date))
+    
+    def _build_analysis_contents(self, param_date: str, pdf_part: types.Part) -> list:
+        """Arma el prompt de análisis con el PDF ya obtenido (inline o por URI de la Files API)"""
 
         prompt_text = f"""
         Analiza los puntos mas importantes de el contenido adjunto de la Primera Sección del Boletín Oficial de la República Argentina - Sección 1 - Legislación y Avisos Oficiales para la Edición adjunto de fecha {param_date}
@@ -296,22 +1066,24 @@ class LLMAnalysisServiceDirect:
             types.Content(
                 role="user",
                 parts=[
-                       types.Part.from_bytes(
-                       mime_type="application/pdf",
-                       data=base64.b64decode(
-                       pdf_base64
-                                            ),
-                        ),
+                        pdf_part,
                         types.Part.from_text(text=prompt_text),
                     ],
                         ),
                 ]
         
-        logger.info( contents)
+        # Sólo con DEBUG, y sin los bytes del PDF
+        error_handler.log_debug('analysis_contents_built', {'fecha': param_date, 'contents': contents})
         return contents
     
-    def _create_expert_opinions_contents(self, fecha_boletin: str, normativa_summary: str, cambios_principales: list) -> list:
-        """Crea el contenido para búsqueda de opiniones de expertos"""
+    def _create_expert_opinions_contents(self, fecha_boletin: str, normativa_summary: str, cambios_principales: list,
+                                         medios: list = None, cambio_foco: dict = None) -> list:
+        """
+        Crea el contenido para búsqueda de opiniones de expertos
+        
+        medios restringe el listado de portales y cambio_foco centra la búsqueda
+        en un único instrumento (ambos se usan en el modo fan-out).
+        """
         
         # Crear resumen de cambios para el contexto
         cambios_texto = ""
@@ -321,6 +1093,15 @@ class LLMAnalysisServiceDirect:
                 for cambio in cambios_principales[:5]  # Limitar a 5 cambios principales
             ])
         
+        medios_texto = "\n".join(f"    - {medio}" for medio in (medios or ALL_OUTLETS))
+        
+        foco_texto = ""
+        if cambio_foco:
+            foco_texto = (
+                f"\n    ENFOQUE: busca únicamente análisis y opiniones sobre "
+                f"{cambio_foco.get('tipo', '')} {cambio_foco.get('numero', '')}: {cambio_foco.get('titulo', '')} "
+                f"({cambio_foco.get('rotulo', '')}).\n"
+            )
         
         
         prompt_text = f"""
@@ -331,18 +1112,10 @@ class LLMAnalysisServiceDirect:
 
     Principales cambios identificados:
     {cambios_texto}
-
+{foco_texto}
     INSTRUCCIONES DE BÚSQUEDA:
     1. Busca en portales argentinos como los del siguiente listado para la fecha {fecha_boletin} :
-    - La Nación (lanacion.com.ar)
-    - Clarín (clarin.com)
-    - Página/12 (pagina12.com.ar)
-    - Ámbito Financiero (ambito.com)
-    - El Cronista (cronista.com)
-    - Infobae (infobae.com)
-    - BAE Negocios (baenegocios.com)
-    - Portales jurídicos especializados.
-    - Sitios de análisis económico y legal
+{medios_texto}
 
     2. 
     -Excluir de las busquedas los sitios: https://www.boletinoficial.gob.ar/ y https://boa.com.ar/ (BOA)
@@ -376,17 +1149,39 @@ class LLMAnalysisServiceDirect:
     - Si no encuentras información, retorna un array vacío []
     """ 
         
+        parts = [types.Part.from_text(text=prompt_text)]
+        
+        # Si la edición ya está subida, el buscador ve el documento y no sólo el resumen
+        handle = self.get_pdf_handle(fecha_boletin) if self.attach_pdf_to_opinions else None
+        if handle:
+            parts.insert(0, self._file_part(handle))
+            parts.append(types.Part.from_text(
+                text="El PDF adjunto es la edición del Boletín Oficial de esa fecha; úsalo para identificar con precisión los instrumentos citados en las opiniones."
+            ))
+        
         contents = [
             types.Content(
                 role="user",
-                parts=[
-                    types.Part.from_text(text=prompt_text),
-                ],
+                parts=parts,
             ),
         ]
         
         return contents
     
+    def _process_analysis_response(self, response_text: str) -> Dict[str, Any]:
+        """Parsea y valida la respuesta completa del análisis"""
+        if not response_text:
+            raise Exception("Respuesta vacía de Gemini")
+        
+        logger.info(f"Respuesta recibida de Gemini: {len(response_text)} caracteres")
+        
+        with timing.span('parseo_respuesta_llm'):
+            # Parsear respuesta JSON
+            analysis_result = self._parse_response(response_text)
+            
+            # Validar estructura de respuesta
+            return self._validate_analysis_response(analysis_result)
+    
     def _parse_response(self, response_text: str) -> Dict[str, Any]:
         """Parsea la respuesta de Gemini"""
         try:
@@ -469,9 +1264,9 @@ class LLMAnalysisServiceDirect:
         logger.info(f"Respuesta validada: {len(validated_cambios)} cambios principales identificados")
         return validated_result
     
-    def _create_error_response(self, error_message: str) -> Dict[str, Any]:
-        """Crea una respuesta de error estructurada"""
-        return {
+    def _create_error_response(self, error_message: str, sin_edicion: bool = False) -> Dict[str, Any]:
+        """Crea una respuesta de error estructurada (sin_edicion: la fecha no tiene boletín)"""
+        response = {
             'resumen': f'Error en el análisis: {error_message}',
             'cambios_principales': [],
             'impacto_estimado': 'No se pudo determinar debido a error',
@@ -479,6 +1274,9 @@ class LLMAnalysisServiceDirect:
             'error': True,
             'error_message': error_message
         }
+        if sin_edicion:
+            response['sin_edicion'] = True
+        return response
     
     def _parse_expert_opinions_response(self, response_text: str) -> list:
         """Parsea la respuesta de opiniones de expertos"""
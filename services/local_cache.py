@@ -0,0 +1,305 @@
+"""
+Local cache tiers in front of MongoDB.
+Module globals survive only while the container is warm, but /tmp is often
+still there when a recycled container reuses the same sandbox. Analyses and
+edition PDFs are kept in a small in-memory tier and in a disk tier under
+/tmp; both store serialized bytes, are bounded by total size and evict the
+least recently used entries. Every tier implements the same interface
+(get/put/delete), and TieredCache chains them, so callers do not care where
+a hit came from.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+
+from utils import file_lock, metrics
+from utils.error_handler import error_handler
+
+_JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+
+def analysis_key(fecha: str) -> str:
+    return f'analisis:{fecha}'
+
+
+def pdf_key(fecha: str) -> str:
+    return f'pdf:{fecha}'
+
+
+def dump_document(document: Dict[str, Any]) -> bytes:
+    """Serialize a MongoDB document (keeps datetimes and ObjectIds)."""
+    return json_util.dumps(document, json_options=_JSON_OPTIONS).encode('utf-8')
+
+
+def load_document(data: bytes) -> Dict[str, Any]:
+    return json_util.loads(data.decode('utf-8'), json_options=_JSON_OPTIONS)
+
+
+class CacheTier:
+    """Interface shared by the cache tiers: bytes values keyed by strings."""
+
+    name = 'tier'
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.lookup(key)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        """Value and expiry timestamp (None: never expires) of a key, or None if it is not cached."""
+        raise NotImplementedError
+
+    def put(self, key: str, value: bytes, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def get_document(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached document, deserialized (a fresh copy on every call)."""
+        data = self.get(key)
+        return load_document(data) if data is not None else None
+
+    def put_document(self, key: str, document: Dict[str, Any], ttl: Optional[int] = None):
+        self.put(key, dump_document(document), ttl)
+
+
+class MemoryCacheTier(CacheTier):
+    """In-process LRU bounded by total bytes."""
+
+    name = 'memoria'
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: Size limit of the stored values (LOCAL_CACHE_MEMORY_MAX_BYTES)
+        """
+        self.max_bytes = (int(os.getenv('LOCAL_CACHE_MEMORY_MAX_BYTES', str(32 * 1024 * 1024)))
+                          if max_bytes is None else max_bytes)
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, value: bytes, ttl: Optional[int] = None):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+
+class DiskCacheTier(CacheTier):
+    """
+    LRU on local disk bounded by total bytes.
+
+    Each value is a file named after the hash of its key; a compact JSON index
+    (key -> [file, bytes, last access, expiry]) is rewritten atomically on every
+    change, so a container reusing /tmp finds the cache where the last one left it.
+    Values are read through mmap.
+    """
+
+    name = 'disco'
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Cache directory (LOCAL_CACHE_DIR)
+            max_bytes: Size limit of the stored files (LOCAL_CACHE_DISK_MAX_BYTES)
+        """
+        # One directory per process: worker processes of http_server would otherwise overwrite
+        # each other's index and delete each other's files as unindexed
+        self.directory = file_lock.claim_directory(directory or os.getenv('LOCAL_CACHE_DIR', '/tmp/boletin-cache'))
+        self.max_bytes = (int(os.getenv('LOCAL_CACHE_DISK_MAX_BYTES', str(256 * 1024 * 1024)))
+                          if max_bytes is None else max_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = self._load_index()
+        self._bytes = sum(entry[1] for entry in self._index.values())
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def _load_index(self) -> 'OrderedDict[str, List[Any]]':
+        """Index left by an earlier container, without entries whose file is gone."""
+        try:
+            with open(self._index_path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = {}
+        except (ValueError, OSError) as e:
+            error_handler.log_warning('local_cache_index_unreadable', {'error': str(e)})
+            stored = {}
+
+        entries = sorted(stored.items(), key=lambda item: item[1][2])
+        index = OrderedDict((key, entry) for key, entry in entries
+                            if os.path.exists(os.path.join(self.directory, entry[0])))
+
+        # Files written by a container that died before updating the index
+        known = {entry[0] for entry in index.values()} | {self.INDEX_FILE, file_lock.OWNER_LOCK_FILE}
+        for name in os.listdir(self.directory):
+            if name not in known:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+        if index:
+            error_handler.log_info('local_cache_index_loaded', {
+                'entries': len(index),
+                'bytes': sum(entry[1] for entry in index.values())
+            })
+        return index
+
+    def _save_index(self):
+        temp_path = self._index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, separators=(',', ':'))
+        os.replace(temp_path, self._index_path)
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + '.bin'
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            if entry[3] is not None and entry[3] <= time.time():
+                self._remove(key)
+                self._save_index()
+                return None
+            # Access times are persisted with the next change of the index
+            entry[2] = time.time()
+            self._index.move_to_end(key)
+            path = os.path.join(self.directory, entry[0])
+            expires_at = entry[3]
+
+        try:
+            with open(path, 'rb') as f:
+                if entry[1] == 0:
+                    return b'', expires_at
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return mapped[:], expires_at
+        except (OSError, ValueError):
+            self.delete(key)
+            return None
+
+    def put(self, key: str, value: bytes, ttl: Optional[int] = None):
+        if len(value) > self.max_bytes:
+            return
+        file_name = self._file_name(key)
+        path = os.path.join(self.directory, file_name)
+        temp_path = path + '.tmp'
+        with self._lock:
+            with open(temp_path, 'wb') as f:
+                f.write(value)
+            os.replace(temp_path, path)
+
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            now = time.time()
+            self._index[key] = [file_name, len(value), now, now + ttl if ttl else None]
+            self._bytes += len(value)
+
+            evicted = 0
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._index)))
+                evicted += 1
+            self._save_index()
+
+        if evicted:
+            error_handler.log_info('local_cache_evicted', {'entries': evicted, 'bytes': self._bytes})
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+                self._save_index()
+
+    def _remove(self, key: str):
+        entry = self._index.pop(key)
+        self._bytes -= entry[1]
+        try:
+            os.remove(os.path.join(self.directory, entry[0]))
+        except FileNotFoundError:
+            pass
+
+
+class TieredCache(CacheTier):
+    """Chain of tiers, fastest first; hits in a slower tier are copied to the faster ones."""
+
+    name = 'niveles'
+
+    def __init__(self, tiers: List[CacheTier]):
+        self.tiers = tiers
+        self.stats = {'misses': 0, **{tier.name: 0 for tier in tiers}}
+
+    def hit_ratio(self) -> Optional[float]:
+        """Share of lookups answered by some tier (since the container started)."""
+        lookups = sum(self.stats.values())
+        return round(1 - self.stats['misses'] / lookups, 3) if lookups else None
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        for position, tier in enumerate(self.tiers):
+            entry = tier.lookup(key)
+            if entry is None:
+                continue
+            value, expires_at = entry
+            ttl = None if expires_at is None else max(expires_at - time.time(), 1)
+            for faster in self.tiers[:position]:
+                faster.put(key, value, ttl)
+            self.stats[tier.name] += 1
+            metrics.increment('CacheHits')
+            metrics.increment(f'CacheHits.{tier.name}')
+            error_handler.log_info('local_cache_hit', {'key': key, 'tier': tier.name})
+            return entry
+        self.stats['misses'] += 1
+        metrics.increment('CacheMisses')
+        return None
+
+    def put(self, key: str, value: bytes, ttl: Optional[int] = None):
+        for tier in self.tiers:
+            try:
+                tier.put(key, value, ttl)
+            except OSError as e:
+                # A full /tmp must not fail the request: the entry is simply not cached there
+                error_handler.log_warning('local_cache_write_failed', {'key': key, 'tier': tier.name, 'error': str(e)})
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
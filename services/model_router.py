@@ -0,0 +1,162 @@
+"""
+Model tier routing for the bulletin analysis.
+Sizes each edition (pages, estimated tokens, instrument count) and picks the
+Gemini model and thinking budget; a stronger tier is used only when the
+response of a lighter one fails validation. Latency and estimated cost are
+recorded per tier.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.hedging import LatencyTracker
+from utils.error_handler import error_handler
+from utils.pdf_utils import count_instruments, count_pdf_pages, TOKENS_PER_PDF_PAGE
+
+# List prices in USD per million tokens (input, output); thinking tokens bill as output
+MODEL_PRICES_USD_PER_MTOK = {
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.5-pro': (1.25, 10.00),
+}
+
+REQUIRED_ANALYSIS_FIELDS = ('resumen', 'cambios_principales', 'impacto_estimado', 'areas_afectadas')
+
+
+def _default_tiers() -> List[Dict[str, Any]]:
+    """Tiers from lightest to strongest; the last one is the original configuration."""
+    return [
+        {
+            'name': 'ligero',
+            'model': os.getenv('LLM_TIER_LIGERO_MODEL', 'gemini-2.5-flash-lite'),
+            'thinking_budget': int(os.getenv('LLM_TIER_LIGERO_THINKING', '1024')),
+        },
+        {
+            'name': 'estandar',
+            'model': os.getenv('LLM_TIER_ESTANDAR_MODEL', 'gemini-2.5-flash'),
+            'thinking_budget': int(os.getenv('LLM_TIER_ESTANDAR_THINKING', '8192')),
+        },
+        {
+            'name': 'completo',
+            'model': os.getenv('LLM_TIER_COMPLETO_MODEL', os.getenv('LANGCHAIN_MODEL', 'gemini-2.5-flash')),
+            'thinking_budget': int(os.getenv('LLM_TIER_COMPLETO_THINKING', '-1')),
+        },
+    ]
+
+
+class ModelRouter:
+    """Chooses the model tier for an edition and tracks per-tier latency and cost."""
+
+    def __init__(self, enabled: Optional[bool] = None, tiers: Optional[List[Dict[str, Any]]] = None,
+                 small_pages: Optional[int] = None, large_pages: Optional[int] = None,
+                 small_instruments: Optional[int] = None):
+        """
+        Args:
+            enabled: Enable routing (LLM_ROUTER_ENABLED); disabled always uses the strongest tier
+            tiers: Tier definitions ordered from lightest to strongest
+            small_pages: Editions up to this many pages use the light tier (LLM_ROUTER_SMALL_PAGES)
+            large_pages: Editions above this many pages use the strongest tier (LLM_ROUTER_LARGE_PAGES)
+            small_instruments: Instrument count above which a small edition is not light (LLM_ROUTER_SMALL_INSTRUMENTS)
+        """
+        self.enabled = (os.getenv('LLM_ROUTER_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+                        if enabled is None else enabled)
+        self.tiers = tiers or _default_tiers()
+        self.small_pages = int(os.getenv('LLM_ROUTER_SMALL_PAGES', '16')) if small_pages is None else small_pages
+        self.large_pages = int(os.getenv('LLM_ROUTER_LARGE_PAGES', '80')) if large_pages is None else large_pages
+        self.small_instruments = (int(os.getenv('LLM_ROUTER_SMALL_INSTRUMENTS', '20'))
+                                  if small_instruments is None else small_instruments)
+
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self.stats = {
+            tier['name']: {'calls': 0, 'failed_validation': 0, 'total_seconds': 0.0, 'estimated_cost_usd': 0.0}
+            for tier in self.tiers
+        }
+
+    @staticmethod
+    def profile_document(pdf_bytes: bytes, prompt_chars: int = 0, with_instruments: bool = True) -> Dict[str, int]:
+        """Size of an edition as seen by Gemini (the instrument scan decompresses every stream)."""
+        pages = count_pdf_pages(pdf_bytes)
+        profile = {
+            'paginas': pages,
+            'tokens_estimados': pages * TOKENS_PER_PDF_PAGE + prompt_chars // 4,
+        }
+        if with_instruments:
+            profile['instrumentos_estimados'] = count_instruments(pdf_bytes)
+        return profile
+
+    def select_tier(self, profile: Dict[str, int]) -> Dict[str, Any]:
+        """Lightest tier expected to handle the edition."""
+        if not self.enabled:
+            return self.tiers[-1]
+
+        pages = profile.get('paginas', 0)
+        instruments = profile.get('instrumentos_estimados', 0)
+
+        if pages > self.large_pages:
+            index = len(self.tiers) - 1
+        elif pages <= self.small_pages and instruments <= self.small_instruments:
+            index = 0
+        else:
+            index = min(1, len(self.tiers) - 1)
+
+        tier = self.tiers[index]
+        error_handler.log_info('llm_tier_selected', {'tier': tier['name'], 'model': tier['model'], **profile})
+        return tier
+
+    def stronger_tier(self, tier: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Next tier up, or None when already at the strongest."""
+        index = self.tiers.index(tier)
+        return self.tiers[index + 1] if index + 1 < len(self.tiers) else None
+
+    @staticmethod
+    def validation_issues(parsed: Optional[Dict[str, Any]], profile: Dict[str, int]) -> List[str]:
+        """
+        Problems that justify escalating to a stronger tier.
+
+        Args:
+            parsed: Parsed JSON response (None if it could not be parsed)
+            profile: Document profile from profile_document
+        """
+        if not isinstance(parsed, dict):
+            return ['json_invalido']
+
+        issues = []
+        missing = [field for field in REQUIRED_ANALYSIS_FIELDS if field not in parsed]
+        if missing:
+            issues.append('campos_faltantes:' + ','.join(missing))
+
+        cambios = parsed.get('cambios_principales')
+        if not isinstance(cambios, list) or (not cambios and profile.get('instrumentos_estimados', 0) > 0):
+            issues.append('sin_cambios_principales')
+
+        return issues
+
+    def record(self, tier: Dict[str, Any], seconds: float, input_tokens: int, output_tokens: int,
+               issues: List[str]):
+        """Record one call made with a tier."""
+        price_in, price_out = MODEL_PRICES_USD_PER_MTOK.get(tier['model'], (0.0, 0.0))
+        cost = (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+        with self._lock:
+            stats = self.stats.setdefault(tier['name'], {'calls': 0, 'failed_validation': 0,
+                                                         'total_seconds': 0.0, 'estimated_cost_usd': 0.0})
+            stats['calls'] += 1
+            stats['total_seconds'] += seconds
+            stats['estimated_cost_usd'] += cost
+            if issues:
+                stats['failed_validation'] += 1
+        self.latencies.record(tier['name'], seconds)
+
+        error_handler.log_info('llm_tier_call', {
+            'tier': tier['name'],
+            'model': tier['model'],
+            'thinking_budget': tier['thinking_budget'],
+            'seconds': round(seconds, 3),
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'estimated_cost_usd': round(cost, 6),
+            'p50_seconds': self.latencies.percentile(tier['name'], 50, 1),
+            'validation_issues': issues
+        })
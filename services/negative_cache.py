@@ -0,0 +1,122 @@
+"""
+Negative-result cache for bulletin analyses.
+Dates with no edition and dates whose analysis failed are remembered in
+MongoDB for a short TTL, so repeated requests are answered at once instead of
+repeating the scraper and Gemini calls. Consecutive failures back off
+exponentially.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from utils.error_handler import error_handler
+
+NO_EDITION = 'sin_edicion'
+FAILURE = 'error'
+
+
+class NegativeResultCache:
+    """Short-lived records of dates that have no analysis to return."""
+
+    def __init__(self, collection, no_edition_ttl: Optional[int] = None, today_ttl: Optional[int] = None,
+                 failure_ttl: Optional[int] = None, failure_max_ttl: Optional[int] = None):
+        """
+        Args:
+            collection: MongoDB collection for the records (one document per date)
+            no_edition_ttl: Seconds a past date without edition is cached (NEGATIVE_CACHE_NO_EDITION_TTL)
+            today_ttl: Seconds today's missing edition is cached, as it may still be published (NEGATIVE_CACHE_TODAY_TTL)
+            failure_ttl: Seconds the first failure is cached, doubled per consecutive failure (NEGATIVE_CACHE_FAILURE_TTL)
+            failure_max_ttl: Maximum seconds a failure is cached (NEGATIVE_CACHE_FAILURE_MAX_TTL)
+        """
+        self._collection = collection
+        self.no_edition_ttl = (int(os.getenv('NEGATIVE_CACHE_NO_EDITION_TTL', '604800'))
+                               if no_edition_ttl is None else no_edition_ttl)
+        self.today_ttl = int(os.getenv('NEGATIVE_CACHE_TODAY_TTL', '900')) if today_ttl is None else today_ttl
+        self.failure_ttl = int(os.getenv('NEGATIVE_CACHE_FAILURE_TTL', '120')) if failure_ttl is None else failure_ttl
+        self.failure_max_ttl = (int(os.getenv('NEGATIVE_CACHE_FAILURE_MAX_TTL', '3600'))
+                                if failure_max_ttl is None else failure_max_ttl)
+        self._indexes_created = False
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        try:
+            # Records outlive their TTL for a while so consecutive failures keep backing off
+            self._collection.create_index('eliminar_en', expireAfterSeconds=0)
+        except Exception as e:
+            error_handler.log_warning('negative_cache_index_creation_failed', {'error': str(e)})
+        self._indexes_created = True
+
+    def get(self, fecha: str) -> Optional[Dict[str, Any]]:
+        """Active record for a date (None if there is none or it expired)."""
+        try:
+            return self._collection.find_one({'_id': fecha, 'expira_en': {'$gt': datetime.utcnow()}})
+        except Exception as e:
+            error_handler.log_warning('negative_cache_lookup_failed', {'fecha': fecha, 'error': str(e)})
+            return None
+
+    def no_edition_dates(self, fecha_desde: str, fecha_hasta: str) -> List[str]:
+        """Dates of the range recently found to have no edition."""
+        try:
+            cursor = self._collection.find({
+                '_id': {'$gte': fecha_desde, '$lte': fecha_hasta},
+                'motivo': NO_EDITION,
+                'expira_en': {'$gt': datetime.utcnow()}
+            }, {'_id': 1})
+            return [doc['_id'] for doc in cursor]
+        except Exception as e:
+            error_handler.log_warning('negative_cache_lookup_failed', {'fecha_desde': fecha_desde, 'error': str(e)})
+            return []
+
+    def record_no_edition(self, fecha: str) -> Optional[Dict[str, Any]]:
+        """Remember that a date has no edition."""
+        is_today = fecha == datetime.now().strftime('%Y-%m-%d')
+        return self._record(fecha, NO_EDITION, 'No hay edición del Boletín Oficial para esta fecha',
+                            self.today_ttl if is_today else self.no_edition_ttl)
+
+    def record_failure(self, fecha: str, error_message: str) -> Optional[Dict[str, Any]]:
+        """Remember a failed analysis; each consecutive failure doubles the TTL."""
+        previous = None
+        try:
+            previous = self._collection.find_one({'_id': fecha, 'motivo': FAILURE}, {'intentos': 1})
+        except Exception as e:
+            error_handler.log_warning('negative_cache_lookup_failed', {'fecha': fecha, 'error': str(e)})
+        attempts = (previous or {}).get('intentos', 0) + 1
+        ttl = min(self.failure_ttl * 2 ** (attempts - 1), self.failure_max_ttl)
+        return self._record(fecha, FAILURE, error_message, ttl, attempts)
+
+    def clear(self, fecha: str):
+        """Forget a date (e.g. after a successful analysis)."""
+        try:
+            self._collection.delete_one({'_id': fecha})
+        except Exception as e:
+            error_handler.log_warning('negative_cache_clear_failed', {'fecha': fecha, 'error': str(e)})
+
+    def _record(self, fecha: str, motivo: str, error_message: str, ttl: int,
+                attempts: int = 1) -> Optional[Dict[str, Any]]:
+        self._ensure_indexes()
+        now = datetime.utcnow()
+        record = {
+            'fecha': fecha,
+            'motivo': motivo,
+            'error_message': error_message[:500],
+            'intentos': attempts,
+            'expira_en': now + timedelta(seconds=ttl),
+            'eliminar_en': now + timedelta(seconds=ttl + self.failure_max_ttl),
+            'actualizado_en': now
+        }
+        try:
+            self._collection.replace_one({'_id': fecha}, record, upsert=True)
+        except Exception as e:
+            # The cache is an optimisation: a failed write only means the next request retries
+            error_handler.log_warning('negative_cache_write_failed', {'fecha': fecha, 'error': str(e)})
+            return None
+
+        error_handler.log_info('negative_cache_recorded', {
+            'fecha': fecha,
+            'motivo': motivo,
+            'intentos': attempts,
+            'ttl_seconds': ttl
+        })
+        return {'_id': fecha, **record}
@@ -0,0 +1,262 @@
+"""
+Opt-in cProfile and tracemalloc capture of single invocations.
+With PROFILING_ENABLED on, a request is profiled when it carries the
+X-Debug-Profile header with PROFILING_TOKEN, or when PROFILING_SAMPLE_RATE
+picks it from regular traffic. The gzip'd pstats profile and a JSON summary
+(slowest functions by cumulative time, top allocation sites, peak memory) are
+stored under the request id in /tmp or in a GridFS bucket, and read back with
+the list_profiles and get_profile actions.
+
+cProfile only sees the thread that handles the request (work submitted to
+executors shows up as the time spent waiting for it), and tracemalloc traces
+the whole process, so concurrent requests in the same process share the
+allocation figures; tracing stays on until the last of them ends.
+"""
+
+import base64
+import cProfile
+import gzip
+import hmac
+import json
+import marshal
+import os
+import pstats
+import random
+import re
+import time
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.error_handler import error_handler
+
+PROFILE_HEADER = 'X-Debug-Profile'
+
+# Actions that read stored profiles (never profiled themselves)
+PROFILE_ACTIONS = ('list_profiles', 'get_profile')
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,100}$')
+
+# Captures in progress in this process (http_server runs requests concurrently) and whether
+# tracemalloc was started by them rather than by PYTHONTRACEMALLOC
+_tracing_lock = threading.Lock()
+_tracing = {'captures': 0, 'started_here': False}
+
+
+def profiling_enabled() -> bool:
+    return os.getenv('PROFILING_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+
+
+def _header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    """Header value regardless of case (Function URLs lowercase header names)."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def authorized(headers: Optional[Dict[str, str]]) -> bool:
+    """Whether the request carries PROFILING_TOKEN (never true without a configured token)."""
+    token = os.getenv('PROFILING_TOKEN', '')
+    value = _header(headers, PROFILE_HEADER)
+    return profiling_enabled() and bool(token) and value is not None and hmac.compare_digest(value, token)
+
+
+def profile_reason(headers: Optional[Dict[str, str]]) -> Optional[str]:
+    """
+    Decide whether to profile a request
+
+    Returns:
+        str or None: 'header' (asked for with the token), 'muestreo' (PROFILING_SAMPLE_RATE) or None
+    """
+    if not profiling_enabled():
+        return None
+    if authorized(headers):
+        return 'header'
+    if random.random() < float(os.getenv('PROFILING_SAMPLE_RATE', '0')):
+        return 'muestreo'
+    return None
+
+
+class ProfileCapture:
+    """cProfile and tracemalloc around one invocation."""
+
+    def __init__(self, top_n: Optional[int] = None):
+        self.top_n = int(os.getenv('PROFILING_TOP_N', '30')) if top_n is None else top_n
+        self._profiler = cProfile.Profile()
+        self._started = 0.0
+        self.duration = 0.0
+        self.snapshot = None
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        with _tracing_lock:
+            if _tracing['captures'] == 0:
+                if tracemalloc.is_tracing():
+                    tracemalloc.reset_peak()
+                else:
+                    tracemalloc.start(int(os.getenv('PROFILING_TRACEMALLOC_FRAMES', '1')))
+                    _tracing['started_here'] = True
+            _tracing['captures'] += 1
+        self._started = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        self.duration = time.perf_counter() - self._started
+        with _tracing_lock:
+            self.snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            _tracing['captures'] -= 1
+            if _tracing['captures'] == 0 and _tracing['started_here']:
+                tracemalloc.stop()
+                _tracing['started_here'] = False
+        return False
+
+    def profile_bytes(self) -> bytes:
+        """gzip'd profile in pstats format (gunzip, then `python -m pstats` or snakeviz)."""
+        self._profiler.create_stats()
+        return gzip.compress(marshal.dumps(self._profiler.stats))
+
+    def top_functions(self) -> List[Dict[str, Any]]:
+        """Slowest functions by cumulative time."""
+        stats = pstats.Stats(self._profiler).sort_stats('cumulative')
+        functions = []
+        for func in stats.fcn_list[:self.top_n]:
+            primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+            functions.append({
+                'funcion': pstats.func_std_string(func),
+                'llamadas': calls,
+                'propio_ms': round(total_time * 1000, 2),
+                'acumulado_ms': round(cumulative_time * 1000, 2)
+            })
+        return functions
+
+    def top_allocations(self) -> List[Dict[str, Any]]:
+        """Lines holding the most memory allocated during the invocation and still alive at its end."""
+        return [
+            {
+                'sitio': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                'kib': round(stat.size / 1024, 1),
+                'bloques': stat.count
+            }
+            for stat in self.snapshot.statistics('lineno')[:self.top_n]
+        ]
+
+    def summary(self, request_id: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            'request_id': request_id,
+            'fecha_captura': datetime.utcnow().isoformat(),
+            **(metadata or {}),
+            'duracion_ms': round(self.duration * 1000, 1),
+            'memoria_pico_kib': round(self.peak_bytes / 1024, 1),
+            'funciones': self.top_functions(),
+            'asignaciones': self.top_allocations()
+        }
+
+
+def _listing(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary without the function and allocation tables."""
+    return {key: value for key, value in summary.items() if key not in ('funciones', 'asignaciones')}
+
+
+class LocalProfileStore:
+    """Profiles as <request_id>.json and <request_id>.prof.gz files, newest PROFILING_MAX_PROFILES kept."""
+
+    def __init__(self, directory: Optional[str] = None, max_profiles: Optional[int] = None):
+        self.directory = directory or os.getenv('PROFILING_DIR', '/tmp/boletin-profiles')
+        self.max_profiles = (int(os.getenv('PROFILING_MAX_PROFILES', '20'))
+                             if max_profiles is None else max_profiles)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _summaries(self) -> List[str]:
+        """Summary files, newest first."""
+        stamped = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stamped.append((os.stat(path).st_mtime_ns, path))
+                except FileNotFoundError:
+                    continue
+        return [path for _, path in sorted(stamped, reverse=True)]
+
+    def save(self, summary: Dict[str, Any], profile: bytes):
+        base = os.path.join(self.directory, summary['request_id'])
+        with open(base + '.prof.gz', 'wb') as f:
+            f.write(profile)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+
+        for path in self._summaries()[self.max_profiles:]:
+            for stale in (path, path[:-len('.json')] + '.prof.gz'):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    # Pruned meanwhile by another worker process sharing the directory
+                    pass
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        listed = []
+        for path in self._summaries()[:limit]:
+            with open(path, encoding='utf-8') as f:
+                listed.append(_listing(json.load(f)))
+        return listed
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        base = os.path.join(self.directory, request_id)
+        if not os.path.exists(base + '.json'):
+            return None
+        with open(base + '.json', encoding='utf-8') as f:
+            summary = json.load(f)
+        with open(base + '.prof.gz', 'rb') as f:
+            summary['perfil_gzip_base64'] = base64.b64encode(f.read()).decode('ascii')
+        return summary
+
+
+class GridFSProfileStore:
+    """Profiles in a GridFS bucket of the analyses database, the summary as file metadata."""
+
+    def __init__(self, database, bucket_name: Optional[str] = None):
+        import gridfs
+        self.bucket = gridfs.GridFSBucket(database, bucket_name=bucket_name or
+                                          os.getenv('PROFILING_GRIDFS_BUCKET', 'perfiles'))
+
+    def save(self, summary: Dict[str, Any], profile: bytes):
+        self.bucket.upload_from_stream(f"{summary['request_id']}.prof.gz", profile, metadata=summary)
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return [_listing(grid_out.metadata) for grid_out in
+                self.bucket.find({}).sort('uploadDate', -1).limit(limit)]
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        for grid_out in self.bucket.find({'filename': f'{request_id}.prof.gz'}).sort('uploadDate', -1).limit(1):
+            summary = dict(grid_out.metadata)
+            summary['perfil_gzip_base64'] = base64.b64encode(grid_out.read()).decode('ascii')
+            return summary
+        return None
+
+
+def create_profile_store(database_service=None):
+    """Store selected by PROFILING_STORAGE: 'local' (default) or 'gridfs' (needs the database service)."""
+    if os.getenv('PROFILING_STORAGE', 'local').lower() == 'gridfs':
+        collection = database_service.get_collection(os.getenv('PROFILING_GRIDFS_BUCKET', 'perfiles') + '.files')
+        return GridFSProfileStore(collection.database)
+    return LocalProfileStore()
+
+
+def save_capture(store, capture: ProfileCapture, request_id: str, metadata: Dict[str, Any]) -> bool:
+    """Store a capture, logging instead of failing the request it belongs to."""
+    try:
+        summary = capture.summary(request_id, metadata)
+        store.save(summary, capture.profile_bytes())
+        error_handler.log_info('request_profile_saved', _listing(summary))
+        return True
+    except Exception as e:
+        error_handler.log_warning('request_profile_save_failed', {'request_id': request_id, 'error': str(e)})
+        return False
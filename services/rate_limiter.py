@@ -0,0 +1,249 @@
+"""
+Rate limiting for Gemini API calls.
+Combines an in-process token bucket with a per-minute counter document in
+MongoDB shared by every Lambda container, so bursts queue briefly for a slot
+instead of failing with 429 (LLM_QUOTA_ERROR).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from utils.error_handler import error_handler
+
+
+class RateLimitExceededError(Exception):
+    """Raised when no Gemini slot became available within the maximum wait."""
+
+
+class TokenBucket:
+    """Thread-safe in-process token bucket."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take `amount` tokens if available.
+
+        Returns:
+            float: 0 if acquired, otherwise seconds until enough tokens refill
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.refill_per_second
+
+    def refund(self, amount: float = 1):
+        """Give back tokens taken by a call that was not made."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + min(float(amount), self.capacity))
+
+
+class MongoWindowCounter:
+    """Per-minute request/token counters in one MongoDB document per window."""
+
+    def __init__(self, collection, key_prefix: str = 'gemini'):
+        self._collection = collection
+        self._key_prefix = key_prefix
+        self._indexes_created = False
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        try:
+            # Expired windows are removed by MongoDB
+            self._collection.create_index('expira_en', expireAfterSeconds=0)
+        except Exception as e:
+            error_handler.log_warning('rate_limit_index_creation_failed', {'error': str(e)})
+        self._indexes_created = True
+
+    def try_acquire(self, tokens: int, rpm: int, tpm: int) -> float:
+        """
+        Atomically reserve one request and `tokens` tokens in the current window.
+
+        Returns:
+            float: 0 if reserved, otherwise seconds until the next window
+        """
+        self._ensure_indexes()
+
+        now = datetime.utcnow()
+        window_start = now.replace(second=0, microsecond=0)
+        window_end = window_start + timedelta(minutes=1)
+        tokens = min(int(tokens), tpm) if tpm else int(tokens)
+
+        query: Dict[str, Any] = {
+            '_id': f"{self._key_prefix}:{window_start.strftime('%Y%m%d%H%M')}",
+            'requests': {'$lte': rpm - 1}
+        }
+        if tpm:
+            query['tokens'] = {'$lte': tpm - tokens}
+
+        try:
+            self._collection.find_one_and_update(
+                query,
+                {
+                    '$inc': {'requests': 1, 'tokens': tokens},
+                    '$setOnInsert': {'expira_en': window_end + timedelta(minutes=5)}
+                },
+                upsert=True
+            )
+            return 0.0
+        except DuplicateKeyError:
+            # The window document exists but is already at its limit
+            return max((window_end - now).total_seconds(), 0.05)
+
+
+class GeminiRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter for Gemini calls."""
+
+    def __init__(self, collection=None, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                 max_wait_seconds: Optional[float] = None, shared_counter=None):
+        """
+        Args:
+            collection: MongoDB collection for the shared counters (None: in-process only)
+            shared_counter: Shared window counter to use instead of the MongoDB one (e.g. RedisWindowCounter)
+            rpm: Requests per minute (0 disables the limiter)
+            tpm: Tokens per minute (0 disables the token limit)
+            max_wait_seconds: Maximum time a call queues for a slot
+        """
+        self.rpm = int(os.getenv('GEMINI_RPM', '0')) if rpm is None else rpm
+        self.tpm = int(os.getenv('GEMINI_TPM', '0')) if tpm is None else tpm
+        self.max_wait_seconds = (float(os.getenv('GEMINI_RATE_LIMIT_MAX_WAIT', '20'))
+                                 if max_wait_seconds is None else max_wait_seconds)
+
+        self._request_bucket = TokenBucket(self.rpm, self.rpm / 60.0) if self.rpm else None
+        self._token_bucket = TokenBucket(self.tpm, self.tpm / 60.0) if self.tpm else None
+        if shared_counter is None and collection is not None:
+            shared_counter = MongoWindowCounter(collection)
+        self._shared = shared_counter if self.rpm else None
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'acquired': 0, 'queued': 0, 'rejected': 0, 'total_wait_seconds': 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm)
+
+    def _try_acquire(self, tokens: int) -> float:
+        """One non-blocking attempt; returns the suggested wait (0 on success)."""
+        wait = self._request_bucket.try_acquire(1)
+        if wait:
+            return wait
+
+        if self._token_bucket is not None:
+            wait = self._token_bucket.try_acquire(tokens)
+            if wait:
+                self._request_bucket.refund(1)
+                return wait
+
+        if self._shared is not None:
+            try:
+                wait = self._shared.try_acquire(tokens, self.rpm, self.tpm)
+            except Exception as e:
+                # Fail open: the local bucket still smooths this container
+                error_handler.log_warning('shared_rate_limit_unavailable', {'error': str(e)})
+                wait = 0.0
+            if wait:
+                self._request_bucket.refund(1)
+                if self._token_bucket is not None:
+                    self._token_bucket.refund(tokens)
+                return wait
+
+        return 0.0
+
+    def _next_sleep(self, wait: float, waited: float) -> float:
+        remaining = self.max_wait_seconds - waited
+        if remaining <= 0:
+            return 0.0
+        # Re-check at least every 2s so freed local tokens are picked up promptly
+        return min(wait, remaining, 2.0)
+
+    def _record(self, waited: float, queued: bool, operation: str, tokens: int):
+        with self._stats_lock:
+            self.stats['acquired'] += 1
+            if queued:
+                self.stats['queued'] += 1
+                self.stats['total_wait_seconds'] += waited
+
+        if queued:
+            error_handler.log_info('llm_rate_limit_wait', {
+                'operation': operation,
+                'wait_seconds': round(waited, 3),
+                'estimated_tokens': tokens
+            })
+
+    def _reject(self, waited: float, operation: str):
+        with self._stats_lock:
+            self.stats['rejected'] += 1
+        raise RateLimitExceededError(
+            f"Gemini rate limit: no slot available for {operation} after {waited:.1f}s (quota)"
+        )
+
+    def acquire(self, estimated_tokens: int = 0, operation: str = 'generate') -> float:
+        """
+        Block until a slot is available.
+
+        Returns:
+            float: Seconds spent queued
+
+        Raises:
+            RateLimitExceededError: If no slot was granted within max_wait_seconds
+        """
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        queued = False
+        while True:
+            wait = self._try_acquire(estimated_tokens)
+            waited = time.monotonic() - start
+            if not wait:
+                self._record(waited, queued, operation, estimated_tokens)
+                return waited if queued else 0.0
+            sleep_for = self._next_sleep(wait, waited)
+            if not sleep_for:
+                self._reject(waited, operation)
+            queued = True
+            time.sleep(sleep_for)
+
+    async def acquire_async(self, estimated_tokens: int = 0, operation: str = 'generate') -> float:
+        """Async variant of acquire() that yields the event loop while queued."""
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        queued = False
+        while True:
+            if self._shared is not None:
+                # The shared counter is a blocking pymongo call
+                wait = await asyncio.to_thread(self._try_acquire, estimated_tokens)
+            else:
+                wait = self._try_acquire(estimated_tokens)
+            waited = time.monotonic() - start
+            if not wait:
+                self._record(waited, queued, operation, estimated_tokens)
+                return waited if queued else 0.0
+            sleep_for = self._next_sleep(wait, waited)
+            if not sleep_for:
+                self._reject(waited, operation)
+            queued = True
+            await asyncio.sleep(sleep_for)
+
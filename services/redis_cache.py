@@ -0,0 +1,185 @@
+"""
+Shared cache tier on a Redis-protocol server (Redis, Valkey, ElastiCache...).
+Local tiers only help the container that filled them; this tier is shared by
+every container, so an analysis read from or written to MongoDB by one of them
+is served to the others without touching Atlas. It also provides the
+per-minute Gemini quota counters and short locks. Every Redis error fails
+open: the request falls through to MongoDB (or runs unlocked) and is logged.
+The `redis` package is only needed when REDIS_CACHE_URL is set.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from services.local_cache import CacheTier
+from utils import metrics
+from utils.error_handler import error_handler
+
+# Reserve one request and `tokens` tokens of the window unless a limit would be exceeded
+_WINDOW_SCRIPT = """
+local requests = tonumber(redis.call('HGET', KEYS[1], 'requests') or '0')
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or '0')
+local rpm, tpm, amount = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+if requests >= rpm or (tpm > 0 and tokens + amount > tpm) then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'requests', 1)
+redis.call('HINCRBY', KEYS[1], 'tokens', amount)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Delete the lock only if it still holds our token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def create_redis_client(url: Optional[str] = None):
+    """
+    Redis client for REDIS_CACHE_URL (None if it is not set or `redis` is not installed)
+    """
+    url = url or os.getenv('REDIS_CACHE_URL')
+    if not url:
+        return None
+    try:
+        import redis
+    except ImportError as e:
+        error_handler.log_warning('redis_client_unavailable', {'error': str(e)})
+        return None
+
+    timeout = int(os.getenv('REDIS_CACHE_TIMEOUT_MS', '200')) / 1000
+    return redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+
+class RedisCacheTier(CacheTier):
+    """Cache tier shared by every container, with a TTL per key type and hit-ratio counters."""
+
+    name = 'redis'
+
+    def __init__(self, client, prefix: Optional[str] = None, key_ttls: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            client: redis.Redis (or compatible) client
+            prefix: Namespace of the keys (REDIS_CACHE_PREFIX)
+            key_ttls: Seconds per key type, the part of the key before ':' (REDIS_CACHE_*_TTL_SECONDS)
+        """
+        self.client = client
+        self.prefix = prefix or os.getenv('REDIS_CACHE_PREFIX', 'boletin')
+        if key_ttls is None:
+            # 0: the key type is not stored in Redis (PDFs are several MB, each container keeps its own in /tmp)
+            key_ttls = {
+                'analisis': int(os.getenv('REDIS_CACHE_ANALYSIS_TTL_SECONDS', '3600')),
+                'pdf': int(os.getenv('REDIS_CACHE_PDF_TTL_SECONDS', '0'))
+            }
+        self.key_ttls = key_ttls
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}:{key}'
+
+    def _ttl(self, key: str, ttl: Optional[int]) -> Optional[int]:
+        return self.key_ttls.get(key.split(':', 1)[0], ttl)
+
+    def _count(self, outcome: str):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def _failed(self, operation: str, key: str, error: Exception):
+        self._count('errors')
+        metrics.increment('RedisErrors')
+        error_handler.log_warning('redis_cache_unavailable', {
+            'operation': operation,
+            'key': key,
+            'error': str(error)
+        })
+
+    def hit_ratio(self) -> Optional[float]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return round(self.stats['hits'] / lookups, 3) if lookups else None
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        if self._ttl(key, None) == 0:
+            return None
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.get(self._key(key))
+            pipeline.pttl(self._key(key))
+            value, remaining_ms = pipeline.execute()
+        except Exception as e:
+            self._failed('get', key, e)
+            return None
+
+        if value is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return value, time.time() + remaining_ms / 1000 if remaining_ms > 0 else None
+
+    def put(self, key: str, value: bytes, ttl: Optional[int] = None):
+        ttl = self._ttl(key, ttl)
+        if ttl == 0:
+            return
+        try:
+            self.client.set(self._key(key), value, ex=ttl or None)
+        except Exception as e:
+            self._failed('set', key, e)
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._failed('delete', key, e)
+
+    def lock(self, name: str, ttl_seconds: int) -> Optional[str]:
+        """
+        Take a short lock shared by every container.
+
+        Returns:
+            str or None: Token to release the lock, None if another container holds it.
+                When Redis is unavailable a token is returned anyway (the work runs unlocked).
+        """
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(self._key(f'lock:{name}'), token, nx=True, ex=ttl_seconds):
+                return token
+            return None
+        except Exception as e:
+            self._failed('lock', name, e)
+            return token
+
+    def unlock(self, name: str, token: str):
+        try:
+            self.client.eval(_RELEASE_SCRIPT, 1, self._key(f'lock:{name}'), token)
+        except Exception as e:
+            self._failed('unlock', name, e)
+
+
+class RedisWindowCounter:
+    """Per-minute Gemini request/token counters in Redis (same contract as MongoWindowCounter)."""
+
+    def __init__(self, client, key_prefix: Optional[str] = None):
+        self.client = client
+        self._key_prefix = key_prefix or f"{os.getenv('REDIS_CACHE_PREFIX', 'boletin')}:gemini"
+
+    def try_acquire(self, tokens: int, rpm: int, tpm: int) -> float:
+        """
+        Atomically reserve one request and `tokens` tokens in the current window.
+
+        Returns:
+            float: 0 if reserved, otherwise seconds until the next window
+        """
+        now = time.time()
+        window = int(now // 60)
+        tokens = min(int(tokens), tpm) if tpm else int(tokens)
+        granted = self.client.eval(_WINDOW_SCRIPT, 1, f'{self._key_prefix}:{window}', rpm, tpm, tokens, 120)
+        if granted:
+            return 0.0
+        return max((window + 1) * 60 - now, 0.05)
@@ -0,0 +1,182 @@
+"""
+Write-behind persistence of analyses.
+Each analysis is first written to a file on local disk (atomic rename), the
+response is returned, and a background thread upserts the buffered documents
+into MongoDB. Files are deleted only after a successful write, so every
+analysis reaches the database at least once; saves are upserts by fecha, so
+repeating one is harmless. Files left behind by a frozen or failed flush are
+written by the next invocation of the container. Worker processes sharing the
+directory (http_server) take turns to flush it under a file lock.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import json_util
+
+from utils import file_lock
+from utils.error_handler import error_handler
+
+_JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+
+def _remove_if_present(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class WriteBehindQueue:
+    """Durable local buffer of analyses waiting to be written to MongoDB."""
+
+    FLUSH_LOCK_FILE = '.flush.lock'
+
+    def __init__(self, save_fn: Callable[[Dict[str, Any]], Any], directory: Optional[str] = None,
+                 max_attempts: Optional[int] = None):
+        """
+        Args:
+            save_fn: Idempotent save of one analysis (MongoDBService.save_analysis)
+            directory: Buffer directory (WRITE_BEHIND_DIR)
+            max_attempts: Failed writes of a file before it is moved aside (WRITE_BEHIND_MAX_ATTEMPTS)
+        """
+        self.save_fn = save_fn
+        self.directory = directory or os.getenv('WRITE_BEHIND_DIR', '/tmp/boletin-write-behind')
+        self.max_attempts = (int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', '5'))
+                             if max_attempts is None else max_attempts)
+        self.failed_directory = os.path.join(self.directory, 'fallidos')
+        os.makedirs(self.failed_directory, exist_ok=True)
+
+        self._attempts: Dict[str, int] = {}
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def _files(self, fecha: Optional[str] = None) -> List[str]:
+        """Buffered files, oldest first (names start with a nanosecond timestamp)."""
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        if fecha is not None:
+            names = [name for name in names if name.split('_')[1] == fecha]
+        return [os.path.join(self.directory, name) for name in names]
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Any]:
+        with open(path, encoding='utf-8') as f:
+            return json_util.loads(f.read(), json_options=_JSON_OPTIONS)
+
+    def enqueue(self, document: Dict[str, Any]) -> str:
+        """
+        Buffer an analysis on disk.
+
+        Returns:
+            str: Path of the buffered file
+        """
+        fecha = document['fecha']
+        path = os.path.join(self.directory, f'{time.time_ns():020d}_{fecha}_{uuid.uuid4().hex[:8]}.json')
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json_util.dumps(document, json_options=_JSON_OPTIONS))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        error_handler.log_info('analysis_buffered', {'fecha': fecha, 'file': os.path.basename(path)})
+        return path
+
+    def pending(self, fecha: str) -> Optional[Dict[str, Any]]:
+        """Latest buffered analysis of a date not yet written to MongoDB."""
+        for path in reversed(self._files(fecha)):
+            try:
+                return self._read(path)
+            except FileNotFoundError:
+                # Written and removed by the flusher meanwhile
+                continue
+        return None
+
+    def flush(self, fecha: Optional[str] = None) -> Dict[str, int]:
+        """
+        Write buffered analyses to MongoDB (only the newest file of each date).
+
+        Args:
+            fecha: Only flush this date (None: every date)
+
+        Returns:
+            dict: Files written, superseded by a newer one, and failed
+        """
+        counts = {'written': 0, 'superseded': 0, 'failed': 0}
+        # Worker processes of http_server share the directory: one flush at a time, so an older
+        # buffer of a date is never written after a newer one
+        with self._flush_lock, file_lock.locked(os.path.join(self.directory, self.FLUSH_LOCK_FILE)):
+            files = self._files(fecha)
+            newest = {}
+            for path in files:
+                newest[os.path.basename(path).split('_')[1]] = path
+
+            for path in files:
+                date = os.path.basename(path).split('_')[1]
+                if newest[date] != path:
+                    # Saves replace the whole document: an older buffer adds nothing
+                    _remove_if_present(path)
+                    counts['superseded'] += 1
+                    continue
+                try:
+                    document = self._read(path)
+                except FileNotFoundError:
+                    # Already written by another process
+                    continue
+                try:
+                    self.save_fn(document)
+                    _remove_if_present(path)
+                    self._attempts.pop(path, None)
+                    counts['written'] += 1
+                except Exception as e:
+                    counts['failed'] += 1
+                    self._record_failure(path, date, e)
+
+        if any(counts.values()):
+            error_handler.log_info('write_behind_flushed', {'fecha': fecha, **counts})
+        return counts
+
+    def _record_failure(self, path: str, fecha: str, error: Exception):
+        attempts = self._attempts.get(path, 0) + 1
+        self._attempts[path] = attempts
+        error_handler.log_warning('write_behind_write_failed', {
+            'fecha': fecha,
+            'attempt': attempts,
+            'error': str(error)
+        })
+        if attempts >= self.max_attempts or isinstance(error, ValueError):
+            # Invalid documents or persistent failures are kept aside for inspection
+            try:
+                os.replace(path, os.path.join(self.failed_directory, os.path.basename(path)))
+            except FileNotFoundError:
+                pass
+            self._attempts.pop(path, None)
+            error_handler.log_warning('write_behind_file_set_aside', {'fecha': fecha, 'file': os.path.basename(path)})
+
+    def flush_in_background(self):
+        """Start a flush thread unless one is already running."""
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._flush_safely, daemon=True, name='write-behind')
+            self._thread.start()
+
+    def _flush_safely(self):
+        try:
+            # Keep going while writes succeed, so files buffered during a flush are not left behind
+            while True:
+                counts = self.flush()
+                if not counts['written'] and not counts['superseded']:
+                    break
+        except Exception as e:
+            error_handler.log_warning('write_behind_flush_failed', {'error': str(e)})
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for the running flush thread (used at shutdown and in tests)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
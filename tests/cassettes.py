@@ -0,0 +1,188 @@
+"""
+Grabación y reproducción de tráfico de Gemini y del sitio del Boletín (cassettes)
+
+Una cassette guarda, comprimida con gzip, el PDF de cada edición descargada y cada
+llamada streaming a Gemini chunk por chunk con el tiempo en que llegó. Al
+reproducirla, LLMAnalysisServiceDirect recibe exactamente los mismos bytes y chunks
+(a la velocidad original o acelerada), así que cambios en prompts, parseo,
+validación o concurrencia se pueden medir sin red ni cuota.
+
+Las llamadas se reproducen en el orden grabado dentro de cada tipo: 'analisis'
+(configuración con thinking) y 'opiniones', porque ambas pueden correr en paralelo.
+"""
+
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from services.llm_service_direct import EditionNotAvailableError
+from tests.fakes import FakeChunk, FakeFiles
+
+USAGE_FIELDS = ('prompt_token_count', 'candidates_token_count', 'thoughts_token_count',
+                'cached_content_token_count', 'total_token_count')
+
+
+def call_kind(config) -> str:
+    """Tipo de llamada según su configuración (sólo el análisis usa thinking)"""
+    return 'analisis' if getattr(config, 'thinking_config', None) is not None else 'opiniones'
+
+
+class Cassette:
+    """PDFs y llamadas a Gemini grabados"""
+
+    def __init__(self, pdfs: Optional[Dict[str, str]] = None, calls: Optional[List[Dict[str, Any]]] = None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.pdfs = pdfs or {}
+        self.calls = calls or []
+        self.metadata = metadata or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('pdfs'), data.get('llamadas'), data.get('metadatos'))
+
+    def save(self, path: str):
+        self.metadata.setdefault('grabada_en', datetime.utcnow().isoformat(timespec='seconds'))
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump({'metadatos': self.metadata, 'pdfs': self.pdfs, 'llamadas': self.calls}, f, ensure_ascii=False,
+                      default=str)
+
+    def add_call(self, call: Dict[str, Any]):
+        with self._lock:
+            self.calls.append(call)
+
+    def calls_of(self, kind: str) -> List[Dict[str, Any]]:
+        return [call for call in self.calls if call['tipo'] == kind]
+
+
+class _RecordingModels:
+    def __init__(self, models, cassette: Cassette):
+        self._models = models
+        self._cassette = cassette
+
+    def generate_content_stream(self, model: str, contents, config):
+        stream = self._models.generate_content_stream(model=model, contents=contents, config=config)
+        return self._record(stream, model, config)
+
+    def _record(self, stream, model, config):
+        call = {'tipo': call_kind(config), 'modelo': model, 'chunks': [], 'usage': None, 'completa': False}
+        started = time.monotonic()
+        try:
+            for chunk in stream:
+                call['chunks'].append({'t': round(time.monotonic() - started, 4), 'texto': chunk.text or ''})
+                usage = getattr(chunk, 'usage_metadata', None)
+                if usage is not None:
+                    call['usage'] = {field: getattr(usage, field, None) for field in USAGE_FIELDS}
+                yield chunk
+            call['completa'] = True
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+            self._cassette.add_call(call)
+
+
+class RecordingGenaiClient:
+    """Envuelve el cliente real de google-genai y graba cada stream en la cassette"""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self.models = _RecordingModels(client.models, cassette)
+        self.files = client.files
+
+
+class _ReplayModels:
+    def __init__(self, client: 'ReplayGenaiClient'):
+        self._client = client
+
+    def generate_content_stream(self, model: str, contents, config):
+        return self._client._replay(self._client._next_call(call_kind(config)))
+
+
+class ReplayGenaiClient:
+    """
+    Cliente Gemini que reproduce las llamadas de una cassette
+
+    Args:
+        cassette: Cassette grabada
+        speed: Multiplicador de velocidad (1: tiempos originales, 10: diez veces más rápido,
+            0: sin esperas)
+        loop: Volver a empezar cuando se agotan las llamadas de un tipo (benchmarks)
+    """
+
+    def __init__(self, cassette: Cassette, speed: float = 1.0, loop: bool = False):
+        self.cassette = cassette
+        self.speed = speed
+        self.loop = loop
+        self.models = _ReplayModels(self)
+        self.files = FakeFiles()
+        self.calls = 0
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _next_call(self, kind: str) -> Dict[str, Any]:
+        recorded = self.cassette.calls_of(kind)
+        with self._lock:
+            position = self._positions.get(kind, 0)
+            if position >= len(recorded):
+                if not self.loop or not recorded:
+                    raise LookupError(f"La cassette no tiene más llamadas de tipo '{kind}' ({len(recorded)} grabadas)")
+                position = 0
+            self._positions[kind] = position + 1
+            self.calls += 1
+        return recorded[position]
+
+    def _replay(self, call: Dict[str, Any]):
+        usage = SimpleNamespace(**call['usage']) if call.get('usage') else None
+        started = time.monotonic()
+        last = len(call['chunks']) - 1
+        for index, chunk in enumerate(call['chunks']):
+            if self.speed:
+                delay = chunk['t'] / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield FakeChunk(chunk['texto'], usage if index == last else None)
+        if not call.get('completa', True):
+            raise ConnectionError('Stream cortado durante la grabación')
+
+
+def record(service, cassette: Cassette):
+    """Graba el tráfico de un LLMAnalysisServiceDirect (cliente de Gemini y descarga del PDF)"""
+    service.client = RecordingGenaiClient(service.client, cassette)
+    download = service.crear_sesion_pdf_fecha
+
+    def recording_download(fecha_boletin: str = None) -> str:
+        try:
+            pdf_base64 = download(fecha_boletin)
+        except EditionNotAvailableError:
+            # None: la fecha no tiene edición
+            cassette.pdfs[fecha_boletin] = None
+            raise
+        cassette.pdfs[fecha_boletin] = pdf_base64
+        return pdf_base64
+
+    service.crear_sesion_pdf_fecha = recording_download
+
+
+def replay(service, cassette: Cassette, speed: float = 1.0, loop: bool = False) -> ReplayGenaiClient:
+    """Hace que un LLMAnalysisServiceDirect responda desde la cassette, sin red"""
+    client = ReplayGenaiClient(cassette, speed=speed, loop=loop)
+    service.client = client
+
+    def replayed_download(fecha_boletin: str = None) -> str:
+        if fecha_boletin in cassette.pdfs:
+            if cassette.pdfs[fecha_boletin] is None:
+                raise EditionNotAvailableError(f"No hay edición del Boletín Oficial para {fecha_boletin}")
+            return cassette.pdfs[fecha_boletin]
+        if loop and cassette.pdfs:
+            return next(iter(cassette.pdfs.values()))
+        raise LookupError(f'La cassette no tiene el PDF de {fecha_boletin}')
+
+    service.crear_sesion_pdf_fecha = replayed_download
+    return client
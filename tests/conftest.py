@@ -0,0 +1,88 @@
+"""
+Fixtures compartidas para los tests unitarios (sin servicios externos)
+"""
+
+import base64
+import json
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+# Agregar directorio raíz al path para importar lambda_function y services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class MockLambdaContext:
+    """Mock mínimo del contexto de AWS Lambda"""
+    
+    def __init__(self, remaining_time_in_millis=300000):
+        self.function_name = "boletin-oficial-analyzer-test"
+        self.aws_request_id = "test-request-id"
+        self.remaining_time_in_millis = remaining_time_in_millis
+    
+    def get_remaining_time_in_millis(self):
+        return self.remaining_time_in_millis
+
+
+@pytest.fixture
+def lambda_context():
+    """Contexto Lambda con 5 minutos disponibles"""
+    return MockLambdaContext()
+
+
+@pytest.fixture
+def llm_service(monkeypatch):
+    """LLMAnalysisServiceDirect con una API key ficticia (no hace llamadas de red al crearse)"""
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-api-key')
+    from services.llm_service_direct import LLMAnalysisServiceDirect
+    return LLMAnalysisServiceDirect()
+
+
+@pytest.fixture
+def database_service(monkeypatch):
+    """MongoDBService real sobre una base en memoria (mongomock)"""
+    import mongomock
+    from services import database_service as database_module
+    monkeypatch.setattr(database_module, 'MongoClient', mongomock.MongoClient)
+    monkeypatch.setenv('MONGODB_CONNECTION_STRING', 'mongodb://localhost')
+    monkeypatch.setenv('MONGODB_DATABASE', 'boletin_test')
+    monkeypatch.setenv('MONGODB_COLLECTION', 'analisis')
+    return database_module.MongoDBService()
+
+
+ANALYSIS_JSON = json.dumps({
+    'resumen': 'Resumen',
+    'cambios_principales': [{'tipo': 'decreto', 'numero': '1/2025'}],
+    'impacto_estimado': 'Bajo',
+    'areas_afectadas': ['laboral']
+})
+PDF_BASE64 = base64.b64encode(b'%PDF-1.7\n<< /Type /Page >>\n').decode()
+
+
+def api_event(body):
+    """Evento HTTP de API Gateway con el body en JSON"""
+    return {'httpMethod': 'POST', 'body': json.dumps(body), 'headers': {'Content-Type': 'application/json'}}
+
+
+@pytest.fixture
+def lambda_with_fakes(monkeypatch, llm_service):
+    """Lambda con Gemini falso (50 ms hasta el primer chunk), PDF fijo y MongoDB simulado"""
+    import lambda_function
+    from tests.fakes import FakeGenaiClient
+    monkeypatch.setattr(llm_service, 'crear_sesion_pdf_fecha', lambda fecha: PDF_BASE64)
+    llm_service.client = FakeGenaiClient(ANALYSIS_JSON, chunk_size=40, latency_sampler=lambda: (0.05, 0.001))
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    db.get_pdf_handle.return_value = None
+    db.save_analysis.return_value = 'doc-id'
+    negative_cache = Mock()
+    negative_cache.get.return_value = None
+    monkeypatch.setattr(lambda_function, 'initialize_services', lambda: None)
+    monkeypatch.setattr(lambda_function, 'llm_service', llm_service)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'negative_cache', negative_cache)
+    monkeypatch.setattr(lambda_function, 'write_behind', None)
+    monkeypatch.setattr(lambda_function, 'tiered_cache', None)
+    return db
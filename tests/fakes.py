@@ -0,0 +1,191 @@
+"""
+Dobles de prueba para el cliente de Gemini y el sitio del Boletín Oficial (sin red)
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+class FakeChunk:
+    """Chunk de stream con la misma forma que los de google-genai"""
+
+    def __init__(self, text: str, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeModels:
+    """Implementa models.generate_content_stream con latencia simulada"""
+
+    def __init__(self, client: 'FakeGenaiClient'):
+        self._client = client
+
+    def generate_content_stream(self, model: str, contents, config):
+        return self._client._stream(model, contents, config)
+
+
+class FakeUploadedFile:
+    """Resultado de files.upload"""
+
+    def __init__(self, name: str, mime_type: str, expiration_time):
+        self.name = name
+        self.uri = f'https://generativelanguage.googleapis.com/v1beta/{name}'
+        self.mime_type = mime_type
+        self.expiration_time = expiration_time
+
+
+class FakeFiles:
+    """Implementa files.upload (el archivo vence a las 48 horas, como en la Files API)"""
+
+    def __init__(self):
+        self.uploads = []
+
+    def upload(self, file, config=None):
+        self.uploads.append(file.read())
+        return FakeUploadedFile(f'files/fake-{len(self.uploads)}', getattr(config, 'mime_type', None),
+                                datetime.now(timezone.utc) + timedelta(hours=48))
+
+
+class FakeGenaiClient:
+    """
+    Cliente Gemini falso
+
+    Args:
+        response_text: Texto que se devuelve en cada llamada (o lista con uno por llamada,
+            la última se repite, o función que recibe (model, contents, config))
+        chunk_size: Caracteres por chunk
+        latency_sampler: Función que devuelve (segundos hasta el primer chunk, segundos entre chunks)
+        usage_metadata: usage_metadata que se adjunta al último chunk
+    """
+
+    def __init__(self, response_text: str = '{}', chunk_size: int = 200,
+                 latency_sampler: Optional[Callable[[], Tuple[float, float]]] = None,
+                 usage_metadata=None):
+        self.response_text = response_text
+        self.usage_metadata = usage_metadata
+        self.chunk_size = chunk_size
+        self.latency_sampler = latency_sampler or (lambda: (0.0, 0.0))
+        self.models = FakeModels(self)
+        self.files = FakeFiles()
+        self.contents_sent = []
+        self.calls = 0
+        self.models_used = []
+        self.closed_streams = 0
+        self._lock = threading.Lock()
+
+    def _stream(self, model, contents, config):
+        with self._lock:
+            call_index = self.calls
+            self.calls += 1
+            self.models_used.append(model)
+            self.contents_sent.append(contents)
+        if callable(self.response_text):
+            text = self.response_text(model, contents, config)
+        elif isinstance(self.response_text, list):
+            text = self.response_text[min(call_index, len(self.response_text) - 1)]
+        else:
+            text = self.response_text
+        first_chunk_delay, chunk_delay = self.latency_sampler()
+        try:
+            time.sleep(first_chunk_delay)
+            for start in range(0, len(text), self.chunk_size):
+                if start:
+                    time.sleep(chunk_delay)
+                is_last = start + self.chunk_size >= len(text)
+                yield FakeChunk(text[start:start + self.chunk_size],
+                                self.usage_metadata if is_last else None)
+        finally:
+            with self._lock:
+                self.closed_streams += 1
+
+
+class FakeBoletinServer:
+    """
+    Sitio del Boletín Oficial falso en un puerto local
+
+    Implementa lo que usa crear_sesion_pdf_fecha: /seccion/primera, /edicion/actualizar/DD-MM-YYYY
+    (fija la edición en una cookie de sesión, 404 si no hay edición) y /pdf/download_section.
+    Se usa con BOLETIN_BASE_URL=server.url.
+
+    Args:
+        pdf_bytes: PDF que se devuelve para cualquier edición
+        missing_dates: Fechas (YYYY-MM-DD) sin edición
+        latency: Segundos que tarda cada respuesta
+    """
+
+    def __init__(self, pdf_bytes: bytes = b'%PDF-1.7\n<< /Type /Page >>\n', missing_dates: Iterable[str] = (),
+                 latency: float = 0.0):
+        self.pdf_base64 = base64.b64encode(pdf_bytes).decode()
+        self.missing_dates = set(missing_dates)
+        self.latency = latency
+        self.requests: Dict[str, int] = {}
+        self.editions: Dict[str, int] = {}  # fecha -> veces que se pidió la edición
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def __enter__(self) -> 'FakeBoletinServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', content_type: str = 'text/html', cookie: str = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if cookie:
+                    self.send_header('Set-Cookie', cookie)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(site.latency)
+                if self.path == '/seccion/primera':
+                    site._count('seccion')
+                    return self._send(200, b'<html></html>')
+                if self.path.startswith('/edicion/actualizar/'):
+                    site._count('edicion')
+                    fecha = datetime.strptime(self.path.rsplit('/', 1)[1], '%d-%m-%Y').strftime('%Y-%m-%d')
+                    with site._lock:
+                        site.editions[fecha] = site.editions.get(fecha, 0) + 1
+                    if fecha in site.missing_dates:
+                        return self._send(404)
+                    return self._send(200, b'<html></html>', cookie=f'edicion={fecha}; Path=/')
+                self._send(404)
+
+            def do_POST(self):
+                time.sleep(site.latency)
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if self.path != '/pdf/download_section':
+                    return self._send(404)
+                site._count('pdf')
+                has_edition = 'edicion=' in (self.headers.get('Cookie') or '')
+                body = json.dumps({'pdfBase64': site.pdf_base64 if has_edition else ''}).encode()
+                self._send(200, body, content_type='application/json')
+
+        return Handler
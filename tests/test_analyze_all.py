@@ -0,0 +1,119 @@
+"""
+Tests de la acción analyze_all (análisis y opiniones de expertos en paralelo)
+"""
+
+import threading
+from unittest.mock import Mock
+
+import lambda_function
+
+
+RESPUESTA_PARCIAL = (
+    '```json\n{"resumen": "Resumen del día", '
+    '"cambios_principales": [{"tipo": "decreto", "numero": "1/2025", "impacto": "alto"}], '
+    '"impacto_estimado": "Al'
+)
+
+
+def test_extract_summary_fields_from_partial_stream(llm_service):
+    """Extrae resumen y cambios aunque el JSON todavía no esté completo"""
+    resumen, cambios = llm_service._extract_summary_fields(RESPUESTA_PARCIAL)
+    assert resumen == "Resumen del día"
+    assert cambios[0]['numero'] == "1/2025"
+
+
+def test_extract_summary_fields_incomplete_array(llm_service):
+    """No dispara mientras el array de cambios no terminó de llegar"""
+    partial = '{"resumen": "Resumen", "cambios_principales": [{"tipo": "dec'
+    assert llm_service._extract_summary_fields(partial) is None
+
+
+def test_summary_watcher_fires_once(llm_service):
+    """El callback de resumen se dispara una sola vez durante el stream"""
+    on_summary = Mock()
+    watcher = llm_service._make_summary_watcher(on_summary)
+    watcher(RESPUESTA_PARCIAL)
+    watcher(RESPUESTA_PARCIAL + 'to"}')
+    on_summary.assert_called_once()
+
+
+def test_analyze_all_overlaps_calls_and_saves_once(monkeypatch, lambda_context):
+    """Las opiniones arrancan antes de que termine el análisis y se guarda todo en una escritura"""
+    opinions_started = threading.Event()
+    analysis = {
+        'resumen': 'Resumen del día',
+        'cambios_principales': [{'tipo': 'decreto', 'numero': '1/2025'}],
+        'impacto_estimado': 'Alto',
+        'areas_afectadas': ['administrativo']
+    }
+    
+    def fake_analyze(fecha, on_summary=None, call_log=None, pdf_part=None):
+        on_summary(analysis['resumen'], analysis['cambios_principales'])
+        # El análisis sólo termina cuando las opiniones ya empezaron
+        assert opinions_started.wait(timeout=5)
+        return analysis
+    
+    def fake_opinions(resumen, cambios, fecha, call_log=None):
+        opinions_started.set()
+        return [{'medio': 'Infobae', 'titulo': 'Análisis', 'relevancia': 'alta'}]
+    
+    llm = Mock()
+    llm.analyze_normativa.side_effect = fake_analyze
+    llm.get_expert_opinions.side_effect = fake_opinions
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    db.save_analysis.return_value = 'doc-id'
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    
+    result = lambda_function.process_full_analysis('2025-08-01', False, lambda_context)
+    
+    assert result['opiniones_expertos'][0]['medio'] == 'Infobae'
+    assert result['metadatos']['desde_cache'] is False
+    db.save_analysis.assert_called_once()
+    saved = db.save_analysis.call_args[0][0]
+    assert saved['opiniones_expertos'] and saved['analisis'] == analysis
+    db.update_analysis_expert_opinions.assert_not_called()
+
+
+def test_analyze_all_returns_cached_analysis_with_opinions(monkeypatch, lambda_context):
+    """Con análisis y opiniones en cache no se llama a Gemini"""
+    llm = Mock()
+    db = Mock()
+    db.get_analysis_by_date.return_value = {
+        'fecha': '2025-08-01',
+        'analisis': {'resumen': 'R'},
+        'opiniones_expertos': [{'medio': 'Clarín'}],
+        'metadatos': {}
+    }
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    
+    result = lambda_function.process_full_analysis('2025-08-01', False, lambda_context)
+    
+    assert result['metadatos']['desde_cache'] is True
+    llm.analyze_normativa.assert_not_called()
+    llm.get_expert_opinions.assert_not_called()
+
+
+def test_analyze_all_with_cached_analysis_and_new_opinions_is_not_from_cache(monkeypatch, lambda_context):
+    """Si sólo faltaban las opiniones, la respuesta se calculó con Gemini: no cuenta como cache"""
+    llm = Mock()
+    llm.get_expert_opinions.return_value = [{'medio': 'La Nación', 'relevancia': 'alta'}]
+    db = Mock()
+    db.get_analysis_by_date.return_value = {
+        'fecha': '2025-08-01',
+        'analisis': {'resumen': 'R', 'cambios_principales': []},
+        'opiniones_expertos': [],
+        'metadatos': {}
+    }
+    db.update_analysis_expert_opinions.return_value = True
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    
+    result = lambda_function.process_full_analysis('2025-08-01', False, lambda_context)
+    
+    assert result['opiniones_expertos'][0]['medio'] == 'La Nación'
+    assert result['metadatos']['desde_cache'] is False
+    assert result['metadatos']['analisis_desde_cache'] is True
+    llm.analyze_normativa.assert_not_called()
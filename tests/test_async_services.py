@@ -0,0 +1,166 @@
+"""
+Tests del camino asyncio (servicios async y análisis de varias fechas)
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+import lambda_function
+
+
+def test_stream_generate_async_accumulates_chunks(monkeypatch):
+    """El stream async concatena los chunks y notifica el texto acumulado"""
+    monkeypatch.setenv('GEMINI_API_KEY', 'test-api-key')
+    from services.llm_service_async import AsyncLLMAnalysisService
+    service = AsyncLLMAnalysisService()
+    
+    async def fake_stream():
+        for text in ['{"resumen": ', '"R"}', None]:
+            yield SimpleNamespace(text=text)
+    
+    fake_aio = SimpleNamespace(models=SimpleNamespace(
+        generate_content_stream=AsyncMock(return_value=fake_stream())
+    ))
+    monkeypatch.setattr(service, 'client', SimpleNamespace(aio=fake_aio))
+    seen = []
+    
+    text = asyncio.run(service._stream_generate_async([], None, on_chunk=seen.append))
+    
+    assert text == '{"resumen": "R"}'
+    assert seen == ['{"resumen": ', '{"resumen": "R"}']
+
+
+def test_multiple_dates_uses_one_cache_query_and_runs_concurrently(monkeypatch, lambda_context):
+    """Las fechas en cache se resuelven con una consulta y el resto se analiza en paralelo"""
+    running = {'now': 0, 'max': 0}
+    
+    async def fake_analyze(fecha, call_log=None):
+        running['now'] += 1
+        running['max'] = max(running['max'], running['now'])
+        await asyncio.sleep(0.01)
+        running['now'] -= 1
+        return {'resumen': f'R {fecha}', 'cambios_principales': [], 'impacto_estimado': '', 'areas_afectadas': []}
+    
+    db = Mock()
+    db.get_analyses_by_dates = AsyncMock(return_value={
+        '2025-08-01': {'fecha': '2025-08-01', 'analisis': {}, 'metadatos': {}}
+    })
+    db.save_analysis = AsyncMock(return_value='id')
+    llm = Mock()
+    llm.analyze_normativa_async = AsyncMock(side_effect=fake_analyze)
+    monkeypatch.setattr(lambda_function, 'async_database_service', db)
+    monkeypatch.setattr(lambda_function, 'async_llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'initialize_async_services', lambda: None)
+    
+    fechas = ['2025-08-01', '2025-08-04', '2025-08-05']
+    result = lambda_function.run_async(
+        lambda_function.process_multiple_dates_async(fechas, False, lambda_context)
+    )
+    
+    db.get_analyses_by_dates.assert_awaited_once_with(fechas)
+    assert result['resultados']['2025-08-01']['metadatos']['desde_cache'] is True
+    assert result['resultados']['2025-08-05']['analisis']['resumen'] == 'R 2025-08-05'
+    assert db.save_analysis.await_count == 2
+    assert running['max'] == 2
+
+
+def test_multiple_dates_reads_and_writes_through_the_local_tiers(monkeypatch, lambda_context, tmp_path):
+    """Como check_existing_analysis: write-behind, cache local y después MongoDB sólo por lo que falta"""
+    from services.local_cache import MemoryCacheTier, TieredCache, analysis_key
+    from services.write_behind import WriteBehindQueue
+    
+    def stored(fecha):
+        return {'fecha': fecha, 'analisis': {'resumen': f'R {fecha}'}, 'metadatos': {}}
+    
+    queue = WriteBehindQueue(Mock(), directory=str(tmp_path))
+    queue.enqueue(stored('2025-08-01'))
+    monkeypatch.setattr(queue, 'flush_in_background', Mock())
+    cache = TieredCache([MemoryCacheTier()])
+    cache.put_document(analysis_key('2025-08-04'), stored('2025-08-04'))
+    
+    db = Mock()
+    db.get_analyses_by_dates = AsyncMock(return_value={'2025-08-05': stored('2025-08-05')})
+    db.save_analysis = AsyncMock(return_value='id')
+    llm = Mock(pdf_upload_enabled=False)
+    llm.get_pdf_handle.return_value = None
+    llm.analyze_normativa_async = AsyncMock(return_value={
+        'resumen': 'Nuevo', 'cambios_principales': [], 'impacto_estimado': '', 'areas_afectadas': []
+    })
+    monkeypatch.setattr(lambda_function, 'write_behind', queue)
+    monkeypatch.setattr(lambda_function, 'tiered_cache', cache)
+    monkeypatch.setattr(lambda_function, 'negative_cache', None)
+    monkeypatch.setattr(lambda_function, 'async_database_service', db)
+    monkeypatch.setattr(lambda_function, 'async_llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'initialize_async_services', lambda: None)
+    
+    fechas = ['2025-08-01', '2025-08-04', '2025-08-05', '2025-08-06']
+    result = lambda_function.run_async(
+        lambda_function.process_multiple_dates_async(fechas, False, lambda_context)
+    )
+    
+    db.get_analyses_by_dates.assert_awaited_once_with(['2025-08-05', '2025-08-06'])
+    assert result['metadatos']['fechas_desde_cache'] == 3
+    assert result['resultados']['2025-08-01']['analisis']['resumen'] == 'R 2025-08-01'
+    assert result['resultados']['2025-08-04']['metadatos']['desde_cache'] is True
+    # Lo leído de MongoDB y lo analizado quedan en el cache local; lo nuevo va al buffer write-behind
+    assert cache.get_document(analysis_key('2025-08-05'))['analisis']['resumen'] == 'R 2025-08-05'
+    assert cache.get_document(analysis_key('2025-08-06'))['analisis']['resumen'] == 'Nuevo'
+    assert queue.pending('2025-08-06')['analisis']['resumen'] == 'Nuevo'
+    queue.flush_in_background.assert_called_once()
+    db.save_analysis.assert_not_awaited()
+
+
+def test_run_async_from_several_threads_runs_coroutines_together():
+    """Los requests concurrentes de http_server comparten el event loop sin esperar uno al otro"""
+    async def slow(valor):
+        await asyncio.sleep(0.2)
+        return valor
+    
+    results = []
+    threads = [threading.Thread(target=lambda v=v: results.append(lambda_function.run_async(slow(v))))
+               for v in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(results) == [0, 1, 2]
+    assert time.monotonic() - start < 0.5
+
+
+def test_async_services_are_created_once_under_concurrency(monkeypatch):
+    """Dos threads inicializando a la vez crean un único servicio async de cada tipo"""
+    from services import database_service_async, llm_service_async
+    created = []
+    
+    def slow_service(*args, **kwargs):
+        time.sleep(0.05)
+        created.append(1)
+        return Mock()
+    
+    monkeypatch.setattr(database_service_async, 'AsyncMongoDBService', slow_service)
+    monkeypatch.setattr(llm_service_async, 'AsyncLLMAnalysisService', slow_service)
+    monkeypatch.setattr(lambda_function, 'llm_service', Mock())
+    monkeypatch.setattr(lambda_function, 'async_database_service', None)
+    monkeypatch.setattr(lambda_function, 'async_llm_service', None)
+    
+    threads = [threading.Thread(target=lambda_function.initialize_async_services) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(created) == 2
+
+
+def test_analyze_dates_requires_list():
+    """analyze_dates valida la lista de fechas"""
+    request = {'method': 'POST', 'body': {'action': 'analyze_dates', 'fechas': '2025-08-01'}}
+    with pytest.raises(ValueError, match='fechas'):
+        lambda_function.validate_request_parameters(request)
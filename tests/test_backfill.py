@@ -0,0 +1,163 @@
+"""
+Tests del backfill por rango de fechas (MongoDB simulado con mongomock)
+"""
+
+import threading
+
+import lambda_function
+from services.backfill_service import BackfillService
+from services.llm_service_direct import EditionNotAvailableError
+from utils.edition_calendar import edition_dates
+
+
+ANALISIS = {
+    'resumen': 'Resumen',
+    'cambios_principales': [],
+    'impacto_estimado': {},
+    'areas_afectadas': []
+}
+
+
+class FakeLLMService:
+    """Descarga y análisis falsos; falla en las fechas indicadas"""
+
+    def __init__(self, failing=(), without_edition=()):
+        self.failing = set(failing)
+        self.without_edition = set(without_edition)
+        self.fetched = []
+        self.analysed = []
+        self._lock = threading.Lock()
+
+    def fetch_pdf_part(self, fecha):
+        with self._lock:
+            self.fetched.append(fecha)
+        if fecha in self.without_edition:
+            raise EditionNotAvailableError(f'No hay edición del Boletín Oficial para {fecha}')
+        return {'fecha': fecha}
+
+    def analyze_normativa(self, fecha, call_log=None, pdf_part=None):
+        assert pdf_part == {'fecha': fecha}
+        with self._lock:
+            self.analysed.append(fecha)
+        if fecha in self.failing:
+            return {'error': True, 'error_message': 'respuesta vacía'}
+        return dict(ANALISIS)
+
+    def get_pdf_handle(self, fecha):
+        return None
+
+
+def _backfill(database_service, llm_service, **overrides):
+    options = dict(fetch_concurrency=2, analysis_concurrency=2, batch_size=2, max_attempts=2)
+    options.update(overrides)
+    return BackfillService(database_service, llm_service,
+                           prepare_document=lambda_function.prepare_bulletin_analysis_data, **options)
+
+
+def test_no_edition_dates_are_not_planned(database_service):
+    """Fines de semana y feriados (Carnaval) no se descargan"""
+    llm_service = FakeLLMService()
+    summary = _backfill(database_service, llm_service).run('2025-02-28', '2025-03-05')
+    assert summary['planificadas'] == 2
+    assert sorted(llm_service.fetched) == ['2025-02-28', '2025-03-05']
+
+
+def test_backfill_skips_analysed_dates_and_saves_in_bulk(database_service):
+    """Las fechas ya analizadas no se descargan y el resto se guarda con bulk upserts"""
+    database_service.save_analysis(lambda_function.prepare_bulletin_analysis_data('2025-03-11', dict(ANALISIS)))
+    llm_service = FakeLLMService()
+
+    summary = _backfill(database_service, llm_service).run('2025-03-10', '2025-03-16')
+
+    assert summary['ya_analizadas'] == 1
+    assert summary['analizadas'] == ['2025-03-10', '2025-03-12', '2025-03-13', '2025-03-14']
+    assert summary['completo'] is True
+    assert '2025-03-11' not in llm_service.fetched
+    assert database_service.get_existing_dates(edition_dates('2025-03-10', '2025-03-14')) == {
+        '2025-03-10', '2025-03-11', '2025-03-12', '2025-03-13', '2025-03-14'
+    }
+
+
+def test_backfill_records_failures_and_resumes(database_service):
+    """Una fecha fallida queda en el checkpoint y se reintenta hasta agotar los intentos"""
+    llm_service = FakeLLMService(failing={'2025-03-12'})
+    backfill = _backfill(database_service, llm_service)
+
+    first = backfill.run('2025-03-10', '2025-03-14', run_id='marzo')
+    assert first['fallidas'] == {'2025-03-12': {'intentos': 1, 'error': 'respuesta vacía'}}
+    assert first['pendientes'] == ['2025-03-12']
+    assert first['completo'] is False
+
+    llm_service.fetched.clear()
+    second = backfill.run('2025-03-10', '2025-03-14', run_id='marzo')
+    assert llm_service.fetched == ['2025-03-12']
+    assert second['fallidas']['2025-03-12']['intentos'] == 2
+    assert second['pendientes'] == []
+
+    # Con los intentos agotados la fecha ya no se vuelve a pedir
+    llm_service.fetched.clear()
+    third = backfill.run('2025-03-10', '2025-03-14', run_id='marzo')
+    assert llm_service.fetched == []
+    assert third['completo'] is True
+
+
+def test_unlisted_holiday_found_while_downloading_is_not_retried(database_service):
+    """Si el sitio no tiene la edición al descargar, la fecha no se reintenta ni cuenta como error de descarga"""
+    llm_service = FakeLLMService(without_edition={'2025-03-12'})
+    backfill = _backfill(database_service, llm_service)
+
+    first = backfill.run('2025-03-10', '2025-03-14', run_id='feriado')
+    assert first['fallidas'] == {'2025-03-12': {'intentos': 2, 'error': 'sin_edicion'}}
+    assert '2025-03-12' not in llm_service.analysed
+    assert first['completo'] is True
+
+    llm_service.fetched.clear()
+    backfill.run('2025-03-10', '2025-03-14', run_id='feriado')
+    assert llm_service.fetched == []
+
+
+def test_backfill_stops_and_leaves_remaining_dates_pending(database_service):
+    """Cuando se pide detener, lo ya descargado se guarda y el resto queda pendiente"""
+    llm_service = FakeLLMService()
+
+    summary = _backfill(database_service, llm_service, fetch_concurrency=1, analysis_concurrency=1).run(
+        '2025-03-10', '2025-03-14', should_stop=lambda: len(llm_service.analysed) >= 2)
+
+    assert summary['analizadas'] == ['2025-03-10', '2025-03-11']
+    assert summary['pendientes'] == ['2025-03-12', '2025-03-13', '2025-03-14']
+    assert summary['completo'] is False
+    assert database_service.get_existing_dates(['2025-03-10', '2025-03-11', '2025-03-12']) == {
+        '2025-03-10', '2025-03-11'
+    }
+
+
+def test_pdfs_queued_before_the_stop_are_not_analysed(database_service):
+    """Los PDFs ya descargados cuando se pide detener quedan pendientes; lo analizado se guarda enseguida"""
+    all_fetched = threading.Event()
+
+    class QueueFillingLLMService(FakeLLMService):
+        def fetch_pdf_part(self, fecha):
+            part = super().fetch_pdf_part(fecha)
+            if len(self.fetched) == 5:
+                all_fetched.set()
+            return part
+
+        def analyze_normativa(self, fecha, call_log=None, pdf_part=None):
+            # El primer análisis termina cuando las demás fechas ya se descargaron (en la cola o esperando lugar)
+            assert all_fetched.wait(timeout=5)
+            return super().analyze_normativa(fecha, call_log=call_log, pdf_part=pdf_part)
+
+    llm_service = QueueFillingLLMService()
+    saves = []
+    original_bulk_save = database_service.bulk_save_analyses
+    database_service.bulk_save_analyses = lambda documents: saves.append(len(documents)) or original_bulk_save(documents)
+
+    summary = _backfill(database_service, llm_service, fetch_concurrency=4, analysis_concurrency=1,
+                        batch_size=10).run('2025-03-10', '2025-03-14',
+                                           should_stop=lambda: len(llm_service.analysed) >= 1)
+
+    assert sorted(llm_service.fetched) == edition_dates('2025-03-10', '2025-03-14')
+    assert llm_service.analysed == ['2025-03-10']
+    assert summary['analizadas'] == ['2025-03-10']
+    assert summary['pendientes'] == ['2025-03-11', '2025-03-12', '2025-03-13', '2025-03-14']
+    assert saves == [1]
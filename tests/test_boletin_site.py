@@ -0,0 +1,23 @@
+"""
+Tests de la descarga del PDF contra el sitio falso del Boletín Oficial
+"""
+
+import base64
+
+import pytest
+
+from services.llm_service_direct import EditionNotAvailableError
+from tests.fakes import FakeBoletinServer
+
+
+def test_pdf_downloaded_through_the_session(llm_service):
+    """La sesión fija la edición con una cookie y download_section devuelve su PDF"""
+    with FakeBoletinServer(pdf_bytes=b'%PDF-1.7 edicion', missing_dates={'2025-03-24'}) as site:
+        llm_service.boletin_base_url = site.url
+        llm_service.boletin_session_delay = 0
+
+        assert base64.b64decode(llm_service.crear_sesion_pdf_fecha('2025-03-10')) == b'%PDF-1.7 edicion'
+        with pytest.raises(EditionNotAvailableError):
+            llm_service.crear_sesion_pdf_fecha('2025-03-24')
+
+    assert site.requests == {'seccion': 2, 'edicion': 2, 'pdf': 1}
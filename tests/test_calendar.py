@@ -0,0 +1,96 @@
+"""
+Tests del calendario de disponibilidad (bitsets por mes)
+"""
+
+import logging
+from unittest.mock import Mock
+
+import lambda_function
+from services.calendar_index import bits_to_dates, calendar_update, no_edition_bits
+
+
+ANALISIS = {
+    'resumen': 'Resumen',
+    'cambios_principales': [],
+    'impacto_estimado': {},
+    'areas_afectadas': []
+}
+
+
+def test_calendar_update_sets_and_clears_day_bits():
+    """Guardar prende el bit del día; borrar las opiniones lo apaga"""
+    query, update = calendar_update('2025-03-10', analizada=True, con_opiniones=False)
+    assert query == {'_id': '2025-03'}
+    assert update['$bit'] == {'analizadas': {'or': 1 << 9}, 'con_opiniones': {'and': ~(1 << 9)}}
+
+
+def test_no_edition_bits_include_weekends_and_holidays():
+    """Marzo 2025: fines de semana, Carnaval (3 y 4) y el 24"""
+    dates = bits_to_dates('2025-03', no_edition_bits('2025-03'))
+    assert dates[:4] == ['2025-03-01', '2025-03-02', '2025-03-03', '2025-03-04']
+    assert '2025-03-24' in dates and '2025-03-10' not in dates
+
+
+def test_missing_month_is_rebuilt_from_fecha_index(database_service):
+    """Un mes sin documento se reconstruye desde las fechas guardadas y queda persistido"""
+    for fecha in ('2025-03-10', '2025-03-11'):
+        database_service.save_analysis(lambda_function.prepare_bulletin_analysis_data(fecha, dict(ANALISIS)))
+    database_service.update_analysis_expert_opinions('2025-03-11', [{'fuente': 'Infobae', 'opinion': 'Bien'}])
+
+    calendar = database_service.get_calendar(['2025-03', '2025-04'])
+
+    assert bits_to_dates('2025-03', calendar['2025-03']['analizadas']) == ['2025-03-10', '2025-03-11']
+    assert bits_to_dates('2025-03', calendar['2025-03']['con_opiniones']) == ['2025-03-11']
+    assert calendar['2025-04'] == {'analizadas': 0, 'con_opiniones': 0}
+    stored = database_service.get_collection('calendario').find_one({'_id': '2025-03'})
+    assert stored['analizadas'] == calendar['2025-03']['analizadas']
+
+
+def test_days_marked_before_the_first_read_keep_older_analyses(database_service, caplog):
+    """Guardar en un mes sin documento no lo crea con un solo día: la primera lectura lo arma completo"""
+    database_service.get_collection('analisis').insert_one(
+        lambda_function.prepare_bulletin_analysis_data('2025-03-05', dict(ANALISIS)))
+
+    with caplog.at_level(logging.WARNING, logger='utils.error_handler'):
+        database_service.save_analysis(lambda_function.prepare_bulletin_analysis_data('2025-03-10', dict(ANALISIS)))
+        database_service.update_analysis_expert_opinions('2025-03-10', [{'fuente': 'Infobae', 'opinion': 'Bien'}])
+        calendar = database_service.get_calendar(['2025-03'])
+
+    assert bits_to_dates('2025-03', calendar['2025-03']['analizadas']) == ['2025-03-05', '2025-03-10']
+    assert bits_to_dates('2025-03', calendar['2025-03']['con_opiniones']) == ['2025-03-10']
+    assert 'calendar_update_failed' not in caplog.text
+
+
+def test_save_marks_the_day_incrementally(database_service, monkeypatch):
+    """Cada guardado actualiza el documento del mes con $bit en lugar de recalcularlo"""
+    calendar_collection = Mock()
+    get_collection = database_service.get_collection
+    monkeypatch.setattr(database_service, 'get_collection',
+                        lambda name: calendar_collection if name == 'calendario' else get_collection(name))
+
+    database_service.save_analysis(lambda_function.prepare_bulletin_analysis_data('2025-03-12', dict(ANALISIS)))
+
+    query, update = calendar_collection.update_one.call_args[0]
+    assert query == {'_id': '2025-03'}
+    assert update['$bit']['analizadas'] == {'or': 1 << 11}
+    assert calendar_collection.update_one.call_args[1] == {}
+
+
+def test_get_calendar_action(monkeypatch):
+    """La acción devuelve los meses pedidos, del más viejo al más nuevo, sin leer análisis"""
+    db = Mock()
+    db.get_calendar.side_effect = lambda months: {m: {'analizadas': 1 << 9, 'con_opiniones': 0} for m in months}
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'negative_cache', None)
+
+    params = lambda_function.validate_request_parameters({
+        'method': 'POST',
+        'body': {'action': 'get_calendar', 'mes': '2025-03', 'meses': 2}
+    })
+    result = lambda_function.process_analysis_request(params, None)
+
+    assert [m['mes'] for m in result['meses']] == ['2025-02', '2025-03']
+    marzo = result['meses'][1]
+    assert marzo['dias'] == 31 and marzo['analizadas'] == 1 << 9
+    assert marzo['sin_edicion'] == no_edition_bits('2025-03')
+    db.get_collection.assert_not_called()
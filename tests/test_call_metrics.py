@@ -0,0 +1,69 @@
+"""
+Tests de las métricas por llamada a Gemini
+"""
+
+import json
+from types import SimpleNamespace
+
+from lambda_function import prepare_bulletin_analysis_data
+from services.database_service import AnalysisDocumentValidator
+from tests.fakes import FakeGenaiClient
+
+VALID_ANALYSIS = json.dumps({
+    'resumen': 'Resumen',
+    'cambios_principales': [],
+    'impacto_estimado': 'Bajo',
+    'areas_afectadas': ['laboral']
+})
+USAGE = SimpleNamespace(prompt_token_count=1200, candidates_token_count=300, thoughts_token_count=800,
+                        cached_content_token_count=0, total_token_count=2300)
+
+
+def test_stream_records_timing_chunks_and_tokens(llm_service):
+    """Cada llamada registra primer chunk, tiempo total, chunks y tokens de usage_metadata"""
+    llm_service.client = FakeGenaiClient('x' * 50, chunk_size=20, latency_sampler=lambda: (0.05, 0.01),
+                                         usage_metadata=USAGE)
+    call_log = []
+
+    llm_service._stream_generate([], None, operation='opiniones', call_log=call_log, attempt=2)
+
+    [call] = call_log
+    assert call['operacion'] == 'opiniones'
+    assert call['intento'] == 2
+    assert call['chunks'] == 3
+    assert call['caracteres'] == 50
+    assert 0.05 <= call['tiempo_primer_chunk_s'] <= call['tiempo_total_s']
+    assert (call['tokens_prompt'], call['tokens_respuesta'], call['tokens_thinking']) == (1200, 300, 800)
+    assert call['error'] is None
+
+
+def test_retries_are_recorded_with_their_index(llm_service, monkeypatch):
+    """Un reintento por respuesta inválida queda como una segunda llamada con intento 2"""
+    monkeypatch.setenv('MAX_RETRY_ATTEMPTS', '3')
+    monkeypatch.setattr(llm_service, '_create_analysis_contents', lambda fecha: [])
+    llm_service.client = FakeGenaiClient(['no es json', VALID_ANALYSIS], usage_metadata=USAGE)
+    call_log = []
+
+    llm_service.analyze_normativa('2025-01-15', call_log=call_log)
+
+    assert [call['intento'] for call in call_log] == [1, 2]
+
+
+def test_call_metrics_are_persisted_in_metadatos():
+    """Las métricas y sus totales llegan al documento guardado"""
+    call_log = [
+        {'tiempo_total_s': 10.0, 'tokens_prompt': 1000, 'tokens_respuesta': 200, 'tokens_thinking': 500,
+         'tokens_cache': 0, 'tokens_total': 1700},
+        {'tiempo_total_s': 5.5, 'tokens_prompt': 300, 'tokens_respuesta': 100, 'tokens_thinking': 0,
+         'tokens_cache': 0, 'tokens_total': 400},
+    ]
+
+    data = prepare_bulletin_analysis_data('2025-01-15', {'resumen': 'R', 'cambios_principales': []}, call_log)
+    document = AnalysisDocumentValidator()._prepare_analysis_document(data)
+
+    assert document['metadatos']['llamadas_llm'] == call_log
+    assert document['metadatos']['uso_llm'] == {
+        'llamadas': 2, 'tiempo_llm_s': 15.5, 'tokens_prompt': 1300, 'tokens_respuesta': 300,
+        'tokens_thinking': 500, 'tokens_cache': 0, 'tokens_total': 2100
+    }
+    assert document['metadatos']['metodo_analisis'] == 'url_directa'
@@ -0,0 +1,79 @@
+"""
+Tests de la grabación y reproducción de cassettes de Gemini y del sitio del Boletín
+"""
+
+import base64
+import json
+import time
+
+import pytest
+
+from tests.cassettes import Cassette, record, replay
+from tests.fakes import FakeGenaiClient
+
+ANALYSIS = json.dumps({
+    'resumen': 'Resumen grabado',
+    'cambios_principales': [{'tipo': 'decreto', 'numero': '1/2025'}],
+    'impacto_estimado': 'Bajo',
+    'areas_afectadas': ['laboral']
+})
+OPINIONS = json.dumps([{'medio': 'Infobae', 'titulo': 'Nota', 'relevancia': 'alta'}])
+PDF_BASE64 = base64.b64encode(b'%PDF-1.7\n<< /Type /Page >>\n').decode()
+
+
+@pytest.fixture
+def recorded(llm_service, monkeypatch, tmp_path):
+    """Cassette grabada sobre el cliente falso: análisis y opiniones de una fecha"""
+    monkeypatch.setattr(llm_service, 'crear_sesion_pdf_fecha', lambda fecha: PDF_BASE64)
+    llm_service.client = FakeGenaiClient([ANALYSIS, OPINIONS], chunk_size=20,
+                                         latency_sampler=lambda: (0.05, 0.002))
+    cassette = Cassette(metadata={'fecha': '2025-03-10'})
+    record(llm_service, cassette)
+
+    analysis = llm_service.analyze_normativa('2025-03-10')
+    opinions = llm_service.get_expert_opinions(analysis['resumen'], analysis['cambios_principales'], '2025-03-10')
+
+    path = str(tmp_path / '2025-03-10.json.gz')
+    cassette.save(path)
+    return path, analysis, opinions
+
+
+def test_replay_reproduces_the_recorded_results(recorded, llm_service):
+    """La reproducción da el mismo análisis y opiniones, chunk por chunk y sin red"""
+    path, analysis, opinions = recorded
+    cassette = Cassette.load(path)
+    assert [call['tipo'] for call in cassette.calls] == ['analisis', 'opiniones']
+    assert cassette.pdfs == {'2025-03-10': PDF_BASE64}
+    assert len(cassette.calls[0]['chunks']) == -(-len(ANALYSIS) // 20)
+
+    client = replay(llm_service, cassette, speed=0)
+
+    assert llm_service.analyze_normativa('2025-03-10') == analysis
+    assert llm_service.get_expert_opinions('resumen', [], '2025-03-10') == opinions
+    assert client.calls == 2
+
+
+def test_replay_keeps_or_scales_recorded_timing(recorded, llm_service):
+    """A velocidad 1 se respetan los tiempos grabados; a velocidad 10 se reducen"""
+    path, _, _ = recorded
+    cassette = Cassette.load(path)
+
+    timings = {}
+    for speed in (1, 10):
+        replay(llm_service, cassette, speed=speed)
+        start = time.monotonic()
+        llm_service.analyze_normativa('2025-03-10')
+        timings[speed] = time.monotonic() - start
+
+    assert timings[1] >= cassette.calls[0]['chunks'][-1]['t']
+    assert timings[10] < timings[1]
+
+
+def test_exhausted_cassette_is_reported(recorded, llm_service):
+    """Una llamada que no está en la cassette falla en lugar de ir a la red"""
+    path, _, _ = recorded
+    client = replay(llm_service, Cassette.load(path), speed=0)
+    client.models.generate_content_stream('modelo', [], config=None)
+
+    with pytest.raises(LookupError):
+        client.models.generate_content_stream('modelo', [], config=None)
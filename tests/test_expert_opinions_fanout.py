@@ -0,0 +1,79 @@
+"""
+Tests del modo fan-out de búsqueda de opiniones de expertos
+"""
+
+import threading
+import time
+
+
+def _opinion(titulo, url='', relevancia='media', medio='Medio'):
+    return {'medio': medio, 'url': url, 'autor': 'No especificado', 'titulo': titulo,
+            'opinion_resumen': '...', 'fecha_publicacion': 'No especificada', 'relevancia': relevancia}
+
+
+def test_merge_deduplicates_by_url_and_title(llm_service):
+    """Deduplica por URL normalizada y por título, y conserva la versión más relevante"""
+    merged = llm_service._merge_expert_opinions([
+        [_opinion('Nuevo régimen laboral', 'https://www.infobae.com/nota/?utm_source=x', 'media')],
+        [_opinion('Otro título', 'http://infobae.com/nota', 'alta')],
+        [_opinion('NUEVO  régimen laboral!', '', 'baja')],
+    ])
+    assert len(merged) == 1
+    assert merged[0]['relevancia'] == 'alta'
+
+
+def test_merge_ranks_by_relevance_then_coverage_and_caps(llm_service):
+    """Ordena por relevancia y cobertura y limita a 10 opiniones"""
+    repetida = _opinion('Repetida', 'https://clarin.com/a', 'media')
+    lists = [[repetida], [dict(repetida)], [_opinion('Única', 'https://ambito.com/b', 'media')],
+             [_opinion('Clave', 'https://cronista.com/c', 'alta')]]
+    lists.append([_opinion(f'Extra {i}', f'https://x.com/{i}', 'baja') for i in range(12)])
+    
+    merged = llm_service._merge_expert_opinions(lists)
+    
+    assert [o['titulo'] for o in merged[:3]] == ['Clave', 'Repetida', 'Única']
+    assert len(merged) == 10
+
+
+def test_fanout_searches_per_high_impact_change_and_outlet_group(llm_service, monkeypatch):
+    """Lanza una búsqueda por cambio de impacto alto y por grupo de medios, con límite de concurrencia"""
+    monkeypatch.setenv('EXPERT_OPINIONS_MODE', 'fanout')
+    monkeypatch.setenv('EXPERT_OPINIONS_MAX_CONCURRENCY', '2')
+    lock = threading.Lock()
+    state = {'running': 0, 'max': 0, 'calls': 0}
+    
+    def fake_search(contents, call_log=None):
+        with lock:
+            state['calls'] += 1
+            state['running'] += 1
+            state['max'] = max(state['max'], state['running'])
+            n = state['calls']
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        return [_opinion(f'Nota {n}', f'https://medio.com/{n}')]
+    
+    monkeypatch.setattr(llm_service, '_search_expert_opinions', fake_search)
+    cambios = [
+        {'tipo': 'decreto', 'numero': '1/2025', 'impacto': 'alto'},
+        {'tipo': 'resolución', 'numero': '2/2025', 'impacto': 'bajo'},
+    ]
+    
+    opinions = llm_service.get_expert_opinions('Resumen', cambios, '2025-08-01')
+    
+    # 1 cambio de impacto alto + 3 grupos de medios
+    assert state['calls'] == 4
+    assert state['max'] <= 2
+    assert len(opinions) == 4
+
+
+def test_focused_prompt_mentions_change_and_outlets(llm_service):
+    """El prompt de una búsqueda enfocada incluye el instrumento y sólo los medios del grupo"""
+    contents = llm_service._create_expert_opinions_contents(
+        '2025-08-01', 'Resumen', [], medios=['Infobae (infobae.com)'],
+        cambio_foco={'tipo': 'decreto', 'numero': '1/2025', 'titulo': 'Régimen'}
+    )
+    text = contents[0].parts[0].text
+    assert 'decreto 1/2025' in text
+    assert 'Infobae (infobae.com)' in text
+    assert 'Clarín' not in text
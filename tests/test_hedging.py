@@ -0,0 +1,182 @@
+"""
+Tests del hedging de llamadas a Gemini
+"""
+
+import threading
+
+from services.hedging import HedgingPolicy, LatencyTracker
+from tests.fakes import FakeGenaiClient
+
+
+class FakeClock:
+    """Reloj monotónico que sólo avanza cuando el test lo indica"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+def _is_backup():
+    """Si el intento en curso es la llamada de cobertura (los threads se nombran hedge-<operación>-<rol>)"""
+    return threading.current_thread().name.endswith('cobertura')
+
+
+def _join_attempts():
+    for thread in threading.enumerate():
+        if thread.name.startswith('hedge-'):
+            thread.join(timeout=5)
+
+
+def _policy(**overrides):
+    options = dict(enabled=True, percentile=95, ttft_delay=0.1, total_delay=5,
+                   max_ratio=1.0, min_samples=5, clock=FakeClock())
+    options.update(overrides)
+    return HedgingPolicy(**options)
+
+
+def test_percentile_needs_min_samples():
+    """Sin muestras suficientes se usa el retardo configurado"""
+    tracker = LatencyTracker()
+    for value in (1, 2, 3):
+        tracker.record('analisis:total', value)
+    assert tracker.percentile('analisis:total', 95, min_samples=5) is None
+
+    for value in range(4, 21):
+        tracker.record('analisis:total', value)
+    assert tracker.percentile('analisis:total', 95, min_samples=5) == 19
+    assert tracker.percentile('analisis:total', 50, min_samples=5) == 10
+
+
+def test_slow_primary_is_hedged_and_backup_wins(llm_service):
+    """La primera llamada no entrega chunks a tiempo: gana la de cobertura y se cancela la original"""
+    clock = FakeClock()
+    release = threading.Event()
+
+    def respond(model, contents, config):
+        if not _is_backup():
+            # Pasa ttft_delay sin primer chunk y sigue colgada hasta que el test la libera
+            clock.advance(1.0)
+            release.wait(timeout=5)
+        return '{"ok": true}'
+
+    llm_service.client = FakeGenaiClient(respond, chunk_size=4)
+    llm_service.hedging = _policy(clock=clock)
+    call_log = []
+
+    text = llm_service._stream_generate([], None, operation='analisis', call_log=call_log)
+
+    assert text == '{"ok": true}'
+    assert llm_service.client.calls == 2
+    assert llm_service.hedging.stats['hedge_wins'] == 1
+
+    # La llamada primaria se corta en su primer chunk
+    release.set()
+    _join_attempts()
+    assert llm_service.client.closed_streams == 2
+    # Las métricas distinguen la llamada de cobertura de la primaria
+    [cancelled] = [call for call in call_log if call['cancelada']]
+    [winner] = [call for call in call_log if not call['cancelada']]
+    assert cancelled['chunks'] == 0 and cancelled['hedge'] is False
+    assert winner['hedge'] is True
+
+
+def test_fast_call_is_not_hedged(llm_service):
+    """Una llamada dentro del percentil no genera llamadas extra"""
+    llm_service.client = FakeGenaiClient('{"ok": true}')
+    llm_service.hedging = _policy()
+
+    assert llm_service._stream_generate([], None, operation='analisis') == '{"ok": true}'
+    assert llm_service.client.calls == 1
+    assert llm_service.hedging.stats['hedged'] == 0
+
+
+def test_hedge_delay_follows_the_observed_percentile():
+    """Con muestras suficientes se cubre la llamada que supera el percentil, no el retardo configurado"""
+    clock = FakeClock()
+    policy = _policy(clock=clock, ttft_delay=10)
+    for value in (0.1, 0.2, 0.2, 0.3, 0.3):
+        policy.latencies.record('analisis:ttft', value)
+    assert policy.delays('analisis') == (0.3, 5)
+
+    def attempt_taking(seconds):
+        def attempt(cancel, first_chunk, is_hedge):
+            if is_hedge:
+                return 'cobertura'
+            clock.advance(seconds)
+            cancel.wait(timeout=5)
+            return 'primaria'
+        return attempt
+
+    assert policy.run('analisis', lambda cancel, first_chunk, is_hedge: clock.advance(0.2) or 'primaria') == 'primaria'
+    assert policy.stats['hedged'] == 0
+
+    assert policy.run('analisis', attempt_taking(0.4)) == 'cobertura'
+    assert policy.stats['hedged'] == 1
+    _join_attempts()
+
+
+def test_budget_caps_extra_calls():
+    """Con el presupuesto agotado las llamadas lentas no se duplican"""
+    clock = FakeClock()
+    policy = _policy(clock=clock, max_ratio=0.0)
+    decided = threading.Event()
+    try_spend = policy._try_spend
+
+    def spend_and_signal():
+        try:
+            return try_spend()
+        finally:
+            decided.set()
+
+    policy._try_spend = spend_and_signal
+
+    def attempt(cancel, first_chunk, is_hedge):
+        if is_hedge:
+            return 'cobertura'
+        # La primaria termina recién cuando la política decidió si la cubre
+        clock.advance(1.0)
+        decided.wait(timeout=5)
+        return 'primaria'
+
+    for _ in range(3):
+        decided.clear()
+        policy.run('analisis', attempt)
+        _join_attempts()
+
+    assert policy.stats['calls'] == 3
+    assert policy.stats['hedged'] == 1
+    assert policy.stats['budget_denied'] == 2
+
+
+def test_summary_watcher_fires_once_with_two_streams(llm_service):
+    """Con dos streams en paralelo el callback de resumen se dispara una sola vez"""
+    response = '{"resumen": "R", "cambios_principales": ["a"], "impacto_estimado": {}}'
+    clock = FakeClock()
+    backup_started = threading.Event()
+
+    def respond(model, contents, config):
+        if _is_backup():
+            backup_started.set()
+        else:
+            # La primaria se demora hasta que arranca la cobertura y ambas entregan el mismo stream
+            clock.advance(1.0)
+            backup_started.wait(timeout=5)
+        return response
+
+    llm_service.client = FakeGenaiClient(respond, chunk_size=10, latency_sampler=lambda: (0.0, 0.01))
+    llm_service.hedging = _policy(clock=clock)
+    calls = []
+
+    llm_service._stream_generate([], None, on_chunk=llm_service._make_summary_watcher(
+        lambda resumen, cambios: calls.append(resumen)), operation='analisis')
+
+    assert calls == ['R']
+    assert llm_service.client.calls == 2
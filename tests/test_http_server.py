@@ -0,0 +1,111 @@
+"""
+Tests del adaptador HTTP (ASGI) de lambda_handler para despliegue en contenedores
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import lambda_function
+from http_server import LambdaHttpApp, build_event
+from utils import memory
+
+
+async def request(app, method='POST', path='/analyze', body=None, headers=None):
+    """Ejecuta un request contra la app ASGI y devuelve (status, headers, body)"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': [(b'content-type', b'application/json')] + [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ],
+        'client': ('127.0.0.1', 50000),
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+def test_http_request_is_served_by_lambda_handler(lambda_with_fakes, caplog):
+    """Un POST HTTP se convierte en evento de API Gateway y el request id viene de X-Request-Id"""
+    app = LambdaHttpApp(max_concurrency=2)
+
+    with caplog.at_level(logging.INFO, logger='utils.error_handler'):
+        status, headers, body = asyncio.run(request(
+            app, body={'action': 'analyze_boletin', 'fecha': '2025-03-10'}, headers={'X-Request-Id': 'req-1'}
+        ))
+
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert int(headers[b'content-length']) == len(body)
+    assert json.loads(body)['data']['analisis']['resumen']
+    [start] = [json.loads(r.getMessage()) for r in caplog.records if 'lambda_request_start' in r.getMessage()]
+    assert start['request_id'] == 'req-1'
+
+
+def test_health_check_and_event_mapping():
+    """El health check no pasa por la Lambda; headers y query string llegan como en API Gateway"""
+    status, _, body = asyncio.run(request(LambdaHttpApp(), method='GET', path='/health'))
+    assert status == 200 and json.loads(body)['status'] == 'ok'
+
+    event = build_event({'method': 'post', 'path': '/analyze', 'query_string': b'fecha=2025-03-10',
+                         'headers': [(b'user-agent', b'curl'), (b'x-debug-profile', b'token')],
+                         'client': ('10.0.0.1', 1234)}, b'{"action": "get_calendar"}')
+    parsed = lambda_function.parse_api_gateway_event(event)
+    assert parsed['method'] == 'POST'
+    assert parsed['user_agent'] == 'curl'
+    assert parsed['query_params'] == {'fecha': '2025-03-10'}
+    assert parsed['source_ip'] == '10.0.0.1'
+    assert parsed['body'] == {'action': 'get_calendar'}
+
+
+def test_concurrency_is_limited_per_worker(monkeypatch):
+    """Nunca corren más de SERVER_MAX_CONCURRENCY requests a la vez; los que esperan demasiado reciben 503"""
+    state = {'running': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    def slow_handler(event, context):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.1)
+        with lock:
+            state['running'] -= 1
+        return {'statusCode': 200, 'headers': {}, 'body': '{}'}
+
+    monkeypatch.setattr(lambda_function, 'lambda_handler', slow_handler)
+
+    async def burst(app, count):
+        return await asyncio.gather(*(request(app, body={}) for _ in range(count)))
+
+    responses = asyncio.run(burst(LambdaHttpApp(max_concurrency=2, queue_timeout=5), 6))
+    assert [status for status, _, _ in responses] == [200] * 6
+    assert state['peak'] == 2
+
+    responses = asyncio.run(burst(LambdaHttpApp(max_concurrency=1, queue_timeout=0.02), 2))
+    assert sorted(status for status, _, _ in responses) == [200, 503]
+
+
+def test_worker_with_concurrency_does_not_reset_the_rss_peak(monkeypatch):
+    """Con varios requests por proceso no se reinicia el pico de RSS (borraría el de los demás)"""
+    monkeypatch.setitem(memory._peak_reset, 'enabled', True)
+    monkeypatch.setattr(lambda_function, 'initialize_services', lambda: None)
+    resets = []
+    monkeypatch.setattr(memory, 'reset_peak', lambda: resets.append(1) or True)
+
+    asyncio.run(LambdaHttpApp(max_concurrency=4).startup())
+    usage = memory.start_invocation()
+    memory.stop_invocation()
+
+    assert resets == []
+    assert usage['pico_por_invocacion'] is False
@@ -0,0 +1,118 @@
+"""
+Tests del cache local en dos niveles (memoria y disco en /tmp)
+"""
+
+import base64
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from unittest.mock import Mock
+
+import lambda_function
+from services.local_cache import DiskCacheTier, MemoryCacheTier, TieredCache, analysis_key, pdf_key
+
+
+def test_disk_tier_evicts_least_recently_used_by_bytes(tmp_path):
+    """Al pasar el límite de bytes se descarta la entrada usada hace más tiempo"""
+    disk = DiskCacheTier(directory=str(tmp_path), max_bytes=10)
+    disk.put('a', b'1234')
+    disk.put('b', b'5678')
+    assert disk.get('a') == b'1234'
+
+    disk.put('c', b'90ab')
+
+    assert disk.get('b') is None
+    assert disk.get('a') == b'1234' and disk.get('c') == b'90ab'
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.bin')]) == 2
+
+
+def test_disk_tier_survives_a_new_container(tmp_path):
+    """Otro proceso que reusa /tmp encuentra el índice; los archivos huérfanos se borran"""
+    DiskCacheTier(directory=str(tmp_path)).put(pdf_key('2025-03-10'), b'%PDF-1.7')
+    (tmp_path / 'huerfano.bin.tmp').write_bytes(b'x')
+
+    disk = DiskCacheTier(directory=str(tmp_path))
+
+    assert disk.get(pdf_key('2025-03-10')) == b'%PDF-1.7'
+    assert not (tmp_path / 'huerfano.bin.tmp').exists()
+
+
+def test_worker_processes_do_not_share_a_disk_directory(tmp_path):
+    """Dos workers con el mismo LOCAL_CACHE_DIR: el segundo usa otro directorio y no borra los archivos del primero"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    worker = subprocess.Popen(
+        [sys.executable, '-c', (
+            'import sys; sys.path.insert(0, sys.argv[1])\n'
+            'from services.local_cache import DiskCacheTier\n'
+            'disk = DiskCacheTier(directory=sys.argv[2])\n'
+            'disk.put("k", b"primero")\n'
+            'print(disk.directory, flush=True)\n'
+            'sys.stdin.read()\n'
+            'print(disk.get("k").decode(), flush=True)\n'
+        ), root, str(tmp_path)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert worker.stdout.readline().strip() == str(tmp_path)
+
+        disk = DiskCacheTier(directory=str(tmp_path))
+        disk.put('k', b'segundo')
+
+        assert disk.directory == f'{tmp_path}-1'
+        assert disk.get('k') == b'segundo'
+        output, _ = worker.communicate('', timeout=30)
+        assert output.strip() == 'primero'
+    finally:
+        worker.kill()
+
+
+def test_disk_hits_are_promoted_to_memory_with_their_expiry(tmp_path, monkeypatch):
+    """Un acierto en disco se copia a memoria sin extender su vencimiento"""
+    memory = MemoryCacheTier()
+    cache = TieredCache([memory, DiskCacheTier(directory=str(tmp_path))])
+    cache.tiers[1].put('k', b'valor', ttl=60)
+
+    assert cache.get('k') == b'valor'
+    assert memory.get('k') == b'valor'
+
+    now = time.time()
+    monkeypatch.setattr('services.local_cache.time.time', lambda: now + 120)
+    assert cache.get('k') is None
+
+
+def test_check_existing_analysis_reads_local_tiers_before_mongo(monkeypatch, tmp_path):
+    """La segunda consulta de una fecha no llega a MongoDB y conserva los tipos de BSON"""
+    stored = {'fecha': '2025-03-10', 'analisis': {'resumen': 'Resumen'},
+              'metadatos': {'fecha_creacion': datetime(2025, 3, 10, 9, 30)}}
+    db = Mock()
+    db.get_analysis_by_date.return_value = stored
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'write_behind', None)
+    monkeypatch.setattr(lambda_function, 'tiered_cache',
+                        TieredCache([MemoryCacheTier(), DiskCacheTier(directory=str(tmp_path))]))
+
+    lambda_function.check_existing_analysis('2025-03-10')
+    cached = lambda_function.check_existing_analysis('2025-03-10')
+
+    assert db.get_analysis_by_date.call_count == 1
+    assert cached == stored and cached is not stored
+
+    lambda_function.update_analysis_with_expert_opinions('2025-03-10', [{'fuente': 'Infobae'}], None)
+    assert lambda_function.tiered_cache.get(analysis_key('2025-03-10')) is None
+
+
+def test_pdf_downloaded_once_per_edition(llm_service, monkeypatch, tmp_path):
+    """El PDF descargado queda en el cache local y no se vuelve a pedir al sitio"""
+    downloads = []
+    pdf = b'%PDF-1.7\n<< /Type /Page >>\n'
+    monkeypatch.setattr(llm_service, 'crear_sesion_pdf_fecha',
+                        lambda fecha: downloads.append(fecha) or base64.b64encode(pdf).decode())
+    llm_service.pdf_cache = TieredCache([MemoryCacheTier(), DiskCacheTier(directory=str(tmp_path))])
+
+    first = llm_service.fetch_pdf_part('2025-03-10')
+    second = llm_service.fetch_pdf_part('2025-03-10')
+
+    assert downloads == ['2025-03-10']
+    assert first.inline_data.data == second.inline_data.data == pdf
@@ -0,0 +1,59 @@
+"""
+Tests del registro de memoria por invocación y del envío adaptativo de PDFs grandes
+"""
+
+import json
+import logging
+
+import lambda_function
+from tests.conftest import MockLambdaContext, api_event
+from utils import memory
+
+
+def analyze(fecha='2025-03-10'):
+    response = lambda_function.lambda_handler(api_event({'action': 'analyze_boletin', 'fecha': fecha}),
+                                              MockLambdaContext())
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])['data']
+
+
+def test_pdf_is_uploaded_when_inline_does_not_fit_in_memory(lambda_with_fakes, llm_service, monkeypatch):
+    """Sin memoria libre para las copias inline el PDF se sube a la Files API aunque la subida esté apagada"""
+    monkeypatch.setenv('MEMORY_LIMIT_MB', '1')
+
+    data = analyze()
+
+    assert len(llm_service.client.files.uploads) == 1
+    assert data['metadatos']['estrategia_pdf'] == 'subida'
+    assert 'degradado' not in data['metadatos']
+
+
+def test_oversized_pdf_degrades_to_the_edition_url(lambda_with_fakes, llm_service, monkeypatch):
+    """Si el PDF no entra inline y la subida falla, se analiza desde la URL de la edición en lugar de fallar"""
+    monkeypatch.setattr(llm_service, 'pdf_inline_max_bytes', 10)
+    monkeypatch.setattr(llm_service.client.files, 'upload', lambda file, config=None: 1 / 0)
+
+    data = analyze()
+
+    assert data['metadatos']['estrategia_pdf'] == 'url'
+    assert data['metadatos']['degradado'] is True
+    assert data['analisis']['resumen']
+    [contents] = llm_service.client.contents_sent
+    assert all(part.inline_data is None for part in contents[0].parts)
+    assert '/seccion/primera/20250310' in contents[0].parts[0].text
+
+
+def test_memory_and_pdf_sizes_are_logged_per_invocation(lambda_with_fakes, caplog):
+    """request_stage_timings lleva el pico de RSS y los PDFs de la invocación; fuera de ella no se acumula nada"""
+    with caplog.at_level(logging.INFO, logger='utils.error_handler'):
+        analyze()
+
+    [record] = [json.loads(r.getMessage()) for r in caplog.records if 'request_stage_timings' in r.getMessage()]
+    memoria = record['memoria']
+    assert memoria['rss_pico_mb'] >= memoria['rss_inicio_mb'] > 0
+    assert memoria['pdfs'] == [{'fecha': '2025-03-10', 'bytes': memoria['pdfs'][0]['bytes'], 'estrategia': 'inline'}]
+    assert memoria['pdfs'][0]['bytes'] > 0
+
+    memory.record_pdf('2025-03-10', 100, 'inline')
+    assert memory.invocation_usage() is None
+    assert memory.pdf_strategy('2025-03-10') is None
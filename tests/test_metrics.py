@@ -0,0 +1,72 @@
+"""
+Tests de las métricas EMF por invocación (contadores, latencias y sink local)
+"""
+
+import json
+
+import lambda_function
+from services.local_cache import MemoryCacheTier, TieredCache, analysis_key
+from tests.conftest import MockLambdaContext, api_event
+from utils import metrics
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_one_emf_record_per_invocation(lambda_with_fakes, monkeypatch, tmp_path):
+    """Un análisis nuevo deja un único registro EMF con latencias de Gemini, tokens y tamaño del PDF"""
+    sink = tmp_path / 'metrics.jsonl'
+    monkeypatch.setenv('METRICS_ENABLED', 'true')
+    monkeypatch.setenv('METRICS_SINK', str(sink))
+
+    lambda_function.lambda_handler(api_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                   MockLambdaContext())
+
+    [record] = read_records(sink)
+    [directive] = record['_aws']['CloudWatchMetrics']
+    assert directive['Namespace'] == 'BoletinOficial'
+    assert directive['Dimensions'] == [['Action']]
+    assert record['Action'] == 'analyze_boletin'
+    units = {metric['Name']: metric['Unit'] for metric in directive['Metrics']}
+    assert units['GeminiLatency'] == 'Milliseconds'
+    assert units['PdfBytes'] == 'Bytes'
+    assert record['GeminiCalls'] == 1
+    assert record['GeminiTimeToFirstChunk'] >= 50
+    assert record['ResponsesComputed'] == 1
+    assert record['PdfBytes'] > 0
+    assert record['request_id'] == 'test-request-id'
+    assert 'gemini_analisis_total' in record['tiempos_ms']
+
+
+def test_cache_hits_and_misses_are_counted_per_tier(monkeypatch):
+    """Los aciertos se cuentan en total y por nivel; distintos valores de un timer quedan como lista"""
+    monkeypatch.setenv('METRICS_ENABLED', 'true')
+    monkeypatch.setenv('METRICS_SINK', 'none')
+    cache = TieredCache([MemoryCacheTier()])
+    cache.put(analysis_key('2025-03-10'), b'{}', ttl=60)
+
+    metrics.start_metrics()
+    cache.get(analysis_key('2025-03-10'))
+    cache.get(analysis_key('2025-03-11'))
+    metrics.observe('GeminiLatency', 120.0)
+    metrics.observe('GeminiLatency', 80.0)
+    record = metrics.flush_metrics({'Action': 'analyze_boletin'})
+
+    assert record['CacheHits'] == 1
+    assert record['CacheHits.memoria'] == 1
+    assert record['CacheMisses'] == 1
+    assert record['GeminiLatency'] == [120.0, 80.0]
+
+
+def test_metrics_are_off_by_default(lambda_with_fakes, monkeypatch, capsys):
+    """Sin METRICS_ENABLED no se escribe nada ni se acumula fuera de una invocación"""
+    monkeypatch.delenv('METRICS_ENABLED', raising=False)
+
+    lambda_function.lambda_handler(api_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                   MockLambdaContext())
+    metrics.increment('CacheHits')
+
+    assert '_aws' not in capsys.readouterr().out
+    assert metrics.flush_metrics({'Action': 'analyze_boletin'}) is None
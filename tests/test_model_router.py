@@ -0,0 +1,94 @@
+"""
+Tests del router de niveles de modelo para el análisis
+"""
+
+import json
+import zlib
+
+from google.genai import types
+
+from services.model_router import ModelRouter
+from tests.fakes import FakeGenaiClient
+from utils.pdf_utils import count_instruments, count_pdf_pages
+
+VALID_ANALYSIS = json.dumps({
+    'resumen': 'Resumen',
+    'cambios_principales': [{'tipo': 'resolución', 'numero': '44/2025'}],
+    'impacto_estimado': 'Bajo',
+    'areas_afectadas': ['Tributario']
+})
+
+
+def _fake_pdf(pages: int, instruments: int) -> bytes:
+    """PDF mínimo: objetos /Page y un stream Flate con los rótulos de los instrumentos"""
+    text = ' '.join(f'(Resolución {n}/2025) Tj' for n in range(1, instruments + 1)).encode('latin-1')
+    body = b''.join(b'<< /Type /Page >>\n' for _ in range(pages))
+    return b'%PDF-1.7\n' + body + b'<< /Length 0 >>\nstream\n' + zlib.compress(text) + b'\nendstream\n'
+
+
+def _contents(pdf_bytes: bytes) -> list:
+    return [types.Content(role='user', parts=[
+        types.Part.from_bytes(mime_type='application/pdf', data=pdf_bytes),
+        types.Part.from_text(text='prompt'),
+    ])]
+
+
+def test_pdf_profile_counts_pages_and_instruments():
+    """Páginas por objetos /Page e instrumentos dentro de streams comprimidos"""
+    pdf = _fake_pdf(pages=5, instruments=3)
+    assert count_pdf_pages(pdf) == 5
+    assert count_instruments(pdf) == 3
+
+
+def test_router_picks_tier_by_size():
+    """Ediciones chicas van al nivel ligero, las grandes al completo"""
+    router = ModelRouter(enabled=True, small_pages=10, large_pages=50, small_instruments=5)
+    assert router.select_tier({'paginas': 4, 'instrumentos_estimados': 2})['name'] == 'ligero'
+    assert router.select_tier({'paginas': 4, 'instrumentos_estimados': 30})['name'] == 'estandar'
+    assert router.select_tier({'paginas': 30, 'instrumentos_estimados': 2})['name'] == 'estandar'
+    assert router.select_tier({'paginas': 120, 'instrumentos_estimados': 2})['name'] == 'completo'
+
+
+def test_disabled_router_keeps_original_configuration(llm_service):
+    """Sin router: un único llamado al modelo configurado con thinking dinámico"""
+    llm_service.client = FakeGenaiClient(VALID_ANALYSIS)
+    llm_service.router = ModelRouter(enabled=False)
+
+    result = llm_service._analyze_with_routing(_contents(_fake_pdf(pages=3, instruments=1)))
+
+    assert result['areas_afectadas'] == ['tributario']
+    assert llm_service.client.models_used == [llm_service.router.tiers[-1]['model']]
+
+
+def test_router_escalates_only_when_validation_fails(llm_service):
+    """Una respuesta inválida del nivel ligero se repite con el siguiente nivel"""
+    llm_service.client = FakeGenaiClient(['no es json', VALID_ANALYSIS])
+    llm_service.router = ModelRouter(enabled=True, small_pages=10, large_pages=50, small_instruments=5)
+
+    result = llm_service._analyze_with_routing(_contents(_fake_pdf(pages=3, instruments=1)))
+
+    assert result['resumen'] == 'Resumen'
+    assert llm_service.client.models_used == [llm_service.router.tiers[0]['model'],
+                                              llm_service.router.tiers[1]['model']]
+    stats = llm_service.router.stats
+    assert stats['ligero']['calls'] == 1 and stats['ligero']['failed_validation'] == 1
+    assert stats['estandar']['calls'] == 1 and stats['estandar']['failed_validation'] == 0
+    assert stats['estandar']['estimated_cost_usd'] > 0
+
+
+def test_edition_is_profiled_once_across_retries(llm_service, monkeypatch):
+    """Los reintentos reutilizan el perfil de la edición en lugar de volver a contar páginas e instrumentos"""
+    monkeypatch.setenv('MAX_RETRY_ATTEMPTS', '3')
+    llm_service.client = FakeGenaiClient(['no es json', 'tampoco', VALID_ANALYSIS])
+    llm_service.router = ModelRouter(enabled=True, small_pages=10, large_pages=50, small_instruments=5)
+    profiles = []
+    original = llm_service._profile_analysis_contents
+    monkeypatch.setattr(llm_service, '_profile_analysis_contents',
+                        lambda contents: profiles.append(1) or original(contents))
+    pdf_part = types.Part.from_bytes(mime_type='application/pdf', data=_fake_pdf(pages=60, instruments=1))
+
+    result = llm_service.analyze_normativa('2025-03-10', pdf_part=pdf_part)
+
+    assert result['resumen'] == 'Resumen'
+    assert llm_service.client.calls == 3
+    assert profiles == [1]
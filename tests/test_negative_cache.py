@@ -0,0 +1,99 @@
+"""
+Tests del cache negativo (fechas sin edición o con análisis fallido) y del calendario de ediciones
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import mongomock
+import pytest
+
+import lambda_function
+from services.llm_service_direct import EditionNotAvailableError
+from services.negative_cache import NegativeResultCache
+from utils.edition_calendar import edition_dates, has_edition
+
+
+@pytest.fixture
+def negative_cache():
+    return NegativeResultCache(mongomock.MongoClient().db.analisis_negativos, no_edition_ttl=3600,
+                               today_ttl=60, failure_ttl=10, failure_max_ttl=25)
+
+
+def test_calendar_skips_weekends_and_holidays():
+    """Sin edición los fines de semana, los feriados fijos y los que dependen de Pascua"""
+    assert has_edition('2025-03-10')
+    assert not has_edition('2025-03-08')       # sábado
+    assert not has_edition('2025-03-24')       # feriado fijo
+    assert not has_edition('2025-04-18')       # Viernes Santo
+    assert edition_dates('2025-02-28', '2025-03-05') == ['2025-02-28', '2025-03-05']  # Carnaval
+
+
+def test_consecutive_failures_back_off(negative_cache):
+    """Cada falla seguida duplica el TTL hasta el máximo"""
+    ttls = []
+    for _ in range(3):
+        record = negative_cache.record_failure('2025-03-10', 'timeout')
+        ttls.append(round((record['expira_en'] - record['actualizado_en']).total_seconds()))
+    assert ttls == [10, 20, 25]
+    assert negative_cache.get('2025-03-10')['intentos'] == 3
+
+
+def test_expired_record_is_ignored(negative_cache):
+    """Un registro vencido no se sirve"""
+    negative_cache.record_no_edition('2025-03-10')
+    negative_cache._collection.update_one({'_id': '2025-03-10'},
+                                          {'$set': {'expira_en': datetime.utcnow() - timedelta(seconds=1)}})
+    assert negative_cache.get('2025-03-10') is None
+
+
+def test_failed_analysis_is_cached_and_served(monkeypatch, lambda_context, negative_cache):
+    """Tras una falla, la siguiente petición responde desde el cache negativo sin llamar a Gemini"""
+    llm = Mock()
+    llm.analyze_normativa.return_value = {'error': True, 'error_message': 'Gemini no respondió'}
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'negative_cache', negative_cache)
+
+    first = lambda_function.process_boletin_analysis('2025-03-10', False, lambda_context)
+    assert first['metadatos']['reintentar_despues'] > datetime.utcnow()
+
+    second = lambda_function.process_boletin_analysis('2025-03-10', False, lambda_context)
+    assert second['error'] and second['sin_edicion'] is False
+    assert second['metadatos']['desde_cache'] is True
+    assert llm.analyze_normativa.call_count == 1
+
+    # forzar_reanalisis ignora el cache negativo
+    lambda_function.process_boletin_analysis('2025-03-10', True, lambda_context)
+    assert llm.analyze_normativa.call_count == 2
+
+
+def test_holiday_is_answered_without_scraping(monkeypatch, lambda_context):
+    """Un feriado conocido se responde sin descargar el PDF"""
+    llm = Mock()
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+
+    result = lambda_function.process_full_analysis('2025-03-24', False, lambda_context)
+
+    assert result['sin_edicion'] is True
+    llm.analyze_normativa.assert_not_called()
+
+
+def test_missing_edition_is_not_retried(llm_service, monkeypatch):
+    """Si el sitio no tiene edición no se reintenta ni se llama a Gemini"""
+    downloads = []
+
+    def no_edition(fecha):
+        downloads.append(fecha)
+        raise EditionNotAvailableError(f'No hay edición del Boletín Oficial para {fecha}')
+
+    monkeypatch.setattr(llm_service, 'crear_sesion_pdf_fecha', no_edition)
+    result = llm_service.analyze_normativa('2025-03-10')
+
+    assert result['sin_edicion'] is True
+    assert downloads == ['2025-03-10']
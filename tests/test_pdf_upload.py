@@ -0,0 +1,119 @@
+"""
+Tests de la subida única del PDF a la Files API de Gemini
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from google.genai import errors
+
+from services.database_service import AnalysisDocumentValidator
+from services.llm_service_direct import is_missing_file_error
+from tests.fakes import FakeGenaiClient
+
+VALID_ANALYSIS = json.dumps({
+    'resumen': 'Resumen',
+    'cambios_principales': [],
+    'impacto_estimado': 'Bajo',
+    'areas_afectadas': ['laboral']
+})
+PDF_BASE64 = base64.b64encode(b'%PDF-1.7\n<< /Type /Page >>\n').decode()
+
+
+def _upload_service(llm_service, monkeypatch, responses):
+    downloads = []
+    monkeypatch.setenv('MAX_RETRY_ATTEMPTS', '3')
+    monkeypatch.setattr(llm_service, 'crear_sesion_pdf_fecha', lambda fecha: downloads.append(fecha) or PDF_BASE64)
+    llm_service.client = FakeGenaiClient(responses)
+    llm_service.pdf_upload_enabled = True
+    return downloads
+
+
+def _file_uris(contents):
+    return [part.file_data.file_uri for part in contents[0].parts if part.file_data is not None]
+
+
+def test_pdf_uploaded_once_and_reused_by_retries(llm_service, monkeypatch):
+    """Un reintento por JSON inválido reutiliza el archivo subido sin volver a descargar"""
+    downloads = _upload_service(llm_service, monkeypatch, ['no es json', VALID_ANALYSIS])
+
+    result = llm_service.analyze_normativa('2025-01-15')
+
+    assert result['resumen'] == 'Resumen'
+    assert downloads == ['2025-01-15']
+    assert len(llm_service.client.files.uploads) == 1
+    first_uris, second_uris = (_file_uris(c) for c in llm_service.client.contents_sent)
+    assert first_uris == second_uris and len(first_uris) == 1
+    assert llm_service.get_pdf_handle('2025-01-15')['paginas'] == 1
+
+
+def test_expired_handle_is_uploaded_again(llm_service, monkeypatch):
+    """Un handle vencido (p. ej. el guardado en MongoDB) no se usa"""
+    downloads = _upload_service(llm_service, monkeypatch, [VALID_ANALYSIS])
+    llm_service.remember_pdf_handle('2025-01-15', {
+        'nombre': 'files/viejo',
+        'uri': 'https://example.invalid/files/viejo',
+        'expira_en': datetime.utcnow() + timedelta(minutes=5)
+    })
+
+    llm_service.analyze_normativa('2025-01-15')
+
+    assert downloads == ['2025-01-15']
+    assert len(llm_service.client.files.uploads) == 1
+    assert llm_service.get_pdf_handle('2025-01-15')['nombre'] == 'files/fake-1'
+
+
+def test_deleted_file_is_uploaded_again_on_retry(llm_service, monkeypatch):
+    """Un 404 de Gemini por el archivo subido descarta el handle y el reintento sube el PDF otra vez"""
+    not_found = errors.ClientError(404, {'error': {'code': 404, 'status': 'NOT_FOUND',
+                                                   'message': 'File files/fake-1 is not found'}})
+
+    def respond(model, contents, config):
+        if llm_service.client.calls == 1:
+            raise not_found
+        return VALID_ANALYSIS
+
+    _upload_service(llm_service, monkeypatch, respond)
+
+    assert llm_service.analyze_normativa('2025-01-15')['resumen'] == 'Resumen'
+    assert len(llm_service.client.files.uploads) == 2
+    assert llm_service.get_pdf_handle('2025-01-15')['nombre'] == 'files/fake-2'
+
+
+def test_missing_file_errors_are_recognised_by_status_not_by_text():
+    """Sólo los ClientError 404/403 cuentan; un 404 dentro del texto de otro error no"""
+    denied = errors.ClientError(403, {'error': {'code': 403, 'status': 'PERMISSION_DENIED', 'message': 'denied'}})
+    quota = errors.ClientError(429, {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED',
+                                               'message': 'Quota exceeded, retry in 404 ms'}})
+    assert is_missing_file_error(denied)
+    assert not is_missing_file_error(quota)
+    assert not is_missing_file_error(Exception('No puedo obtener pdf anterior: 404'))
+
+
+def test_expert_opinions_prompt_attaches_uploaded_pdf(llm_service):
+    """La búsqueda de opiniones recibe el documento si ya está subido"""
+    assert _file_uris(llm_service._create_expert_opinions_contents('2025-01-15', 'Resumen', [])) == []
+
+    llm_service.remember_pdf_handle('2025-01-15', {
+        'nombre': 'files/abc',
+        'uri': 'https://example.invalid/files/abc',
+        'expira_en': datetime.utcnow() + timedelta(hours=40)
+    })
+
+    uris = _file_uris(llm_service._create_expert_opinions_contents('2025-01-15', 'Resumen', []))
+    assert uris == ['https://example.invalid/files/abc']
+
+
+def test_file_handle_is_persisted_with_analysis():
+    """archivo_gemini se guarda con el análisis, sólo con los campos conocidos"""
+    handle = {'nombre': 'files/abc', 'uri': 'https://example.invalid/files/abc',
+              'expira_en': datetime.utcnow() + timedelta(hours=48), 'extra': 'x'}
+
+    document = AnalysisDocumentValidator()._prepare_analysis_document({
+        'fecha': '2025-01-15',
+        'seccion': 'legislacion_avisos_oficiales',
+        'archivo_gemini': handle
+    })
+
+    assert document['archivo_gemini'] == {k: handle[k] for k in ('nombre', 'uri', 'expira_en')}
@@ -0,0 +1,96 @@
+"""
+Tests del pre-calentamiento programado (evento de EventBridge)
+"""
+
+import json
+import os
+from unittest.mock import Mock
+
+import pytest
+
+import lambda_function
+from services.llm_service_direct import EditionNotAvailableError
+from tests.conftest import MockLambdaContext
+
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), 'test_payload_scheduled.json')
+
+ANALISIS = {
+    'resumen': 'Resumen del día',
+    'cambios_principales': [{'tipo': 'decreto', 'numero': '1/2025'}],
+    'impacto_estimado': 'Alto',
+    'areas_afectadas': ['administrativo']
+}
+
+
+@pytest.fixture
+def scheduled_event():
+    with open(PAYLOAD_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def services(monkeypatch):
+    """Servicios falsos: la edición aparece en el segundo sondeo"""
+    monkeypatch.setenv('PREWARM_POLL_INTERVAL_SECONDS', '0')
+    monkeypatch.setattr(lambda_function, 'initialize_services', lambda: None)
+    llm = Mock()
+    llm.fetch_pdf_part.side_effect = [EditionNotAvailableError('todavía no'), 'pdf-part']
+    llm.analyze_normativa.side_effect = lambda fecha, on_summary=None, call_log=None, pdf_part=None: dict(ANALISIS)
+    llm.get_expert_opinions.return_value = [{'fuente': 'Infobae', 'opinion': 'Bien', 'relevancia': 'alta'}]
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    negative_cache = Mock()
+    negative_cache.get.return_value = None
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'negative_cache', negative_cache)
+    return llm, db, negative_cache
+
+
+def test_scheduled_event_polls_then_analyses_with_downloaded_pdf(scheduled_event, services):
+    """Espera la edición, analiza con el PDF ya descargado y guarda análisis y opiniones juntos"""
+    llm, db, negative_cache = services
+
+    # Lo que queda al empezar con el timeout desplegado (lambda_timeout = 360 s en scripts/iac)
+    summary = lambda_function.lambda_handler(scheduled_event, MockLambdaContext(remaining_time_in_millis=360000))
+
+    assert summary['estado'] == 'analizado' and summary['sondeos'] == 2
+    assert llm.analyze_normativa.call_args[1]['pdf_part'] == 'pdf-part'
+    db.save_analysis.assert_called_once()
+    assert db.save_analysis.call_args[0][0]['opiniones_expertos']
+    negative_cache.clear.assert_called_once_with('2025-03-10')
+
+
+def test_scheduled_event_gives_up_when_time_runs_out(scheduled_event, services):
+    """Si la edición no aparece antes del margen de tiempo, la próxima ejecución reintenta"""
+    llm, db, _ = services
+
+    summary = lambda_function.lambda_handler(scheduled_event, MockLambdaContext(remaining_time_in_millis=120000))
+
+    assert summary['estado'] == 'edicion_no_publicada'
+    llm.analyze_normativa.assert_not_called()
+    db.save_analysis.assert_not_called()
+
+
+def test_scheduled_event_skips_cached_and_no_edition_dates(scheduled_event, services):
+    """Con análisis y opiniones guardados, o en feriados, no se llama al sitio"""
+    llm, db, _ = services
+    db.get_analysis_by_date.return_value = {'fecha': '2025-03-10', 'opiniones_expertos': [{'fuente': 'X'}]}
+
+    assert lambda_function.lambda_handler(scheduled_event, MockLambdaContext())['estado'] == 'ya_en_cache'
+
+    scheduled_event['detail']['fecha'] = '2025-03-24'
+    assert lambda_function.lambda_handler(scheduled_event, MockLambdaContext())['estado'] == 'sin_edicion'
+    llm.fetch_pdf_part.assert_not_called()
+
+
+def test_overlapping_scheduled_runs_analyse_once(scheduled_event, services, monkeypatch):
+    """Si otra ejecución tiene el lock compartido del día, esta no vuelve a analizar"""
+    llm, _, _ = services
+    shared_cache = Mock()
+    shared_cache.lock.return_value = None
+    monkeypatch.setattr(lambda_function, 'shared_cache', shared_cache)
+
+    assert lambda_function.lambda_handler(scheduled_event, MockLambdaContext())['estado'] == 'en_curso'
+    llm.fetch_pdf_part.assert_not_called()
@@ -0,0 +1,100 @@
+"""
+Tests de la captura opcional con cProfile y tracemalloc por invocación (list_profiles / get_profile)
+"""
+
+import base64
+import gzip
+import json
+import marshal
+import tracemalloc
+
+import pytest
+
+import lambda_function
+from services.profiler import LocalProfileStore, ProfileCapture
+from tests.conftest import MockLambdaContext, api_event
+
+
+@pytest.fixture
+def profiling(lambda_with_fakes, monkeypatch, tmp_path):
+    """Perfilado habilitado con token y perfiles guardados en un directorio temporal"""
+    monkeypatch.setenv('PROFILING_ENABLED', 'true')
+    monkeypatch.setenv('PROFILING_TOKEN', 'secreto')
+    monkeypatch.setenv('PROFILING_DIR', str(tmp_path))
+    monkeypatch.setattr(lambda_function, 'profile_store', None)
+    return tmp_path
+
+
+def debug_event(body, token='secreto'):
+    event = api_event(body)
+    event['headers'] = {'x-debug-profile': token}
+    return event
+
+
+def test_header_profiles_the_request_and_it_can_be_fetched(profiling):
+    """Con el token la invocación se perfila, se guarda por request id y se recupera con get_profile"""
+    response = lambda_function.lambda_handler(debug_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                              MockLambdaContext())
+
+    assert response['statusCode'] == 200
+    assert response['headers']['X-Profile-Id'] == 'test-request-id'
+
+    listed = lambda_function.lambda_handler(debug_event({'action': 'list_profiles'}), MockLambdaContext())
+    [perfil] = json.loads(listed['body'])['data']['perfiles']
+    assert perfil['motivo'] == 'header'
+    assert perfil['action'] == 'analyze_boletin'
+    assert perfil['fecha'] == '2025-03-10'
+    assert 'funciones' not in perfil
+
+    fetched = lambda_function.lambda_handler(debug_event({'action': 'get_profile', 'request_id': 'test-request-id'}),
+                                             MockLambdaContext())
+    perfil = json.loads(fetched['body'])['data']['perfil']
+    assert any('process_boletin_analysis' in f['funcion'] for f in perfil['funciones'])
+    assert perfil['asignaciones'] and perfil['memoria_pico_kib'] > 0
+    stats = marshal.loads(gzip.decompress(base64.b64decode(perfil['perfil_gzip_base64'])))
+    assert any(func[2] == 'handle_request' for func in stats)
+
+
+def test_profiling_needs_config_and_token(lambda_with_fakes, monkeypatch, tmp_path):
+    """Sin PROFILING_ENABLED el header se ignora, y las acciones de perfiles exigen el token"""
+    monkeypatch.setenv('PROFILING_TOKEN', 'secreto')
+    monkeypatch.setenv('PROFILING_DIR', str(tmp_path))
+    monkeypatch.setattr(lambda_function, 'profile_store', None)
+
+    response = lambda_function.lambda_handler(debug_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                              MockLambdaContext())
+    assert 'X-Profile-Id' not in response['headers']
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.setenv('PROFILING_ENABLED', 'true')
+    denied = lambda_function.lambda_handler(debug_event({'action': 'list_profiles'}, token='otro'),
+                                            MockLambdaContext())
+    assert denied['statusCode'] == 400
+
+
+def test_local_store_keeps_the_newest_profiles(tmp_path):
+    """El directorio local conserva sólo los últimos PROFILING_MAX_PROFILES perfiles"""
+    store = LocalProfileStore(str(tmp_path), max_profiles=2)
+    for request_id in ('r1', 'r2', 'r3'):
+        with ProfileCapture(top_n=5) as capture:
+            sum(range(1000))
+        store.save(capture.summary(request_id), capture.profile_bytes())
+
+    assert {p['request_id'] for p in store.list()} == {'r2', 'r3'}
+    assert store.get('r1') is None
+    assert len(store.get('r3')['funciones']) <= 5
+
+
+def test_overlapping_captures_share_tracemalloc():
+    """Con requests concurrentes, el primero en terminar no apaga tracemalloc para el otro"""
+    first, second = ProfileCapture(top_n=5), ProfileCapture(top_n=5)
+
+    first.__enter__()
+    second.__enter__()
+    datos = [bytes(1000) for _ in range(100)]
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert second.top_allocations() and len(datos) == 100
@@ -0,0 +1,86 @@
+"""
+Tests del limitador de cuota de Gemini (token bucket en proceso + contador compartido en MongoDB)
+"""
+
+from unittest.mock import Mock
+
+import mongomock
+import pytest
+
+from services.rate_limiter import GeminiRateLimiter, MongoWindowCounter, RateLimitExceededError, TokenBucket
+from tests.fakes import FakeGenaiClient
+
+
+def test_token_bucket_reports_wait_when_empty():
+    """El bucket entrega tokens hasta vaciarse y luego informa la espera"""
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+    bucket.refund()
+    assert bucket.try_acquire() == 0
+
+
+def test_mongo_window_counter_is_shared_between_limiters():
+    """Dos 'contenedores' que comparten la colección respetan el mismo límite por minuto"""
+    collection = mongomock.MongoClient().db.gemini_rate_limits
+    counter_a = MongoWindowCounter(collection)
+    counter_b = MongoWindowCounter(collection)
+    
+    assert counter_a.try_acquire(100, rpm=2, tpm=0) == 0
+    assert counter_b.try_acquire(100, rpm=2, tpm=0) == 0
+    assert counter_a.try_acquire(100, rpm=2, tpm=0) > 0
+    
+    window = collection.find_one()
+    assert window['requests'] == 2 and window['tokens'] == 200
+
+
+def test_mongo_window_counter_enforces_tokens_per_minute():
+    """El límite de tokens rechaza aunque haya requests disponibles"""
+    collection = mongomock.MongoClient().db.gemini_rate_limits
+    counter = MongoWindowCounter(collection)
+    assert counter.try_acquire(800, rpm=10, tpm=1000) == 0
+    assert counter.try_acquire(300, rpm=10, tpm=1000) > 0
+
+
+def test_limiter_queues_then_rejects_with_quota_error():
+    """Sin turno dentro de la espera máxima se lanza un error clasificado como cuota"""
+    limiter = GeminiRateLimiter(rpm=1, tpm=0, max_wait_seconds=0.05)
+    assert limiter.acquire(10) == 0
+    with pytest.raises(RateLimitExceededError) as excinfo:
+        limiter.acquire(10)
+    assert 'quota' in str(excinfo.value)
+    assert limiter.stats['rejected'] == 1
+
+
+def test_limiter_records_queue_delay():
+    """Una llamada que espera turno queda registrada en las métricas"""
+    limiter = GeminiRateLimiter(rpm=600, tpm=0, max_wait_seconds=2)
+    limiter._request_bucket = TokenBucket(capacity=1, refill_per_second=20)
+    limiter.acquire()
+    waited = limiter.acquire()
+    assert waited > 0
+    assert limiter.stats['queued'] == 1
+    assert limiter.stats['total_wait_seconds'] == pytest.approx(waited)
+
+
+def test_disabled_limiter_never_waits():
+    """Con GEMINI_RPM=0 el limitador no interviene"""
+    limiter = GeminiRateLimiter(rpm=0, tpm=0)
+    assert not limiter.enabled
+    assert limiter.acquire(10 ** 9) == 0
+
+
+def test_request_tokens_are_estimated_only_with_quota(llm_service, monkeypatch):
+    """Sin limitador no se cuentan las páginas del PDF en cada llamada; con limitador sí"""
+    llm_service.client = FakeGenaiClient('{"ok": true}', chunk_size=20, latency_sampler=lambda: (0.0, 0.0))
+    estimate = Mock(return_value=1000)
+    monkeypatch.setattr(llm_service, '_estimate_request_tokens', estimate)
+
+    llm_service.rate_limiter = GeminiRateLimiter(rpm=0, tpm=0)
+    llm_service._stream_generate([], None)
+    estimate.assert_not_called()
+
+    llm_service.rate_limiter = GeminiRateLimiter(rpm=60, tpm=100000)
+    llm_service._stream_generate([], None)
+    estimate.assert_called_once()
@@ -0,0 +1,88 @@
+"""
+Tests del cache compartido en Redis (con fakeredis, sin servidor)
+"""
+
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+import lambda_function
+from services.local_cache import MemoryCacheTier, TieredCache, analysis_key, pdf_key
+from services.redis_cache import RedisCacheTier, RedisWindowCounter
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def _container_cache(server):
+    """Cache de un contenedor: su propia memoria y el Redis compartido"""
+    shared = RedisCacheTier(fakeredis.FakeRedis(server=server))
+    return TieredCache([MemoryCacheTier(), shared]), shared
+
+
+def test_analysis_read_by_one_container_is_served_to_the_others(monkeypatch, redis_server):
+    """Lo que un contenedor leyó de MongoDB lo sirve Redis a los demás"""
+    stored = {'fecha': '2025-03-10', 'analisis': {'resumen': 'Resumen'},
+              'metadatos': {'fecha_creacion': datetime(2025, 3, 10, 9, 30)}}
+    db = Mock()
+    db.get_analysis_by_date.return_value = stored
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'write_behind', None)
+
+    for _ in range(2):
+        tiered, shared = _container_cache(redis_server)
+        monkeypatch.setattr(lambda_function, 'tiered_cache', tiered)
+        assert lambda_function.check_existing_analysis('2025-03-10') == stored
+
+    assert db.get_analysis_by_date.call_count == 1
+    assert shared.stats == {'hits': 1, 'misses': 0, 'errors': 0}
+    assert tiered.hit_ratio() == 1.0
+
+
+def test_ttl_per_key_type(redis_server):
+    """Los análisis vencen según su tipo; los PDFs no se guardan en Redis"""
+    client = fakeredis.FakeRedis(server=redis_server)
+    shared = RedisCacheTier(client, key_ttls={'analisis': 600, 'pdf': 0})
+
+    shared.put(analysis_key('2025-03-10'), b'{}', ttl=3600)
+    shared.put(pdf_key('2025-03-10'), b'%PDF')
+
+    assert 0 < client.ttl('boletin:analisis:2025-03-10') <= 600
+    assert client.exists('boletin:pdf:2025-03-10') == 0
+    assert shared.lookup(analysis_key('2025-03-10'))[1] is not None
+
+
+def test_redis_outage_falls_through(redis_server):
+    """Sin Redis las lecturas son misses y los errores se cuentan, sin fallar el request"""
+    redis_server.connected = False
+    shared = RedisCacheTier(fakeredis.FakeRedis(server=redis_server))
+
+    shared.put(analysis_key('2025-03-10'), b'{}')
+    assert shared.get(analysis_key('2025-03-10')) is None
+    assert shared.stats['errors'] == 2
+    # Sin Redis el trabajo sigue, sin lock
+    assert shared.lock('prewarm:2025-03-10', 60) is not None
+
+
+def test_locks_and_quota_counters(redis_server):
+    """El lock es exclusivo entre contenedores y el contador respeta el límite por minuto"""
+    pytest.importorskip('lupa')
+    client = fakeredis.FakeRedis(server=redis_server)
+    first, second = RedisCacheTier(client), RedisCacheTier(fakeredis.FakeRedis(server=redis_server))
+
+    token = first.lock('prewarm:2025-03-10', 60)
+    assert token and second.lock('prewarm:2025-03-10', 60) is None
+    second.unlock('prewarm:2025-03-10', 'otro-token')
+    assert second.lock('prewarm:2025-03-10', 60) is None
+    first.unlock('prewarm:2025-03-10', token)
+    assert second.lock('prewarm:2025-03-10', 60)
+
+    counter = RedisWindowCounter(client)
+    assert counter.try_acquire(100, rpm=2, tpm=1000) == 0
+    assert counter.try_acquire(100, rpm=2, tpm=1000) == 0
+    assert counter.try_acquire(100, rpm=2, tpm=1000) > 0
@@ -0,0 +1,53 @@
+"""
+Tests de los tiempos por etapa de cada request (metadatos.tiempos y request_stage_timings)
+"""
+
+import json
+import logging
+
+import lambda_function
+from tests.conftest import MockLambdaContext, api_event
+from utils import timing
+
+
+def test_stage_timings_are_returned_when_enabled(lambda_with_fakes, monkeypatch):
+    """Con RESPONSE_TIMINGS_ENABLED el desglose por etapa llega en metadatos.tiempos"""
+    monkeypatch.setenv('RESPONSE_TIMINGS_ENABLED', 'true')
+
+    response = lambda_function.lambda_handler(api_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                              MockLambdaContext())
+
+    tiempos = json.loads(response['body'])['data']['metadatos']['tiempos']
+    assert list(tiempos) == [
+        'parseo_request', 'validacion', 'inicializacion', 'busqueda_cache', 'obtencion_pdf',
+        'gemini_analisis_primer_chunk', 'gemini_analisis_total', 'parseo_respuesta_llm', 'guardado'
+    ]
+    assert 50 <= tiempos['gemini_analisis_primer_chunk'] <= tiempos['gemini_analisis_total']
+
+
+def test_stage_timings_are_logged_but_not_returned_by_default(lambda_with_fakes, caplog):
+    """Sin la opción la respuesta no cambia, pero siempre se emite un registro request_stage_timings"""
+    with caplog.at_level(logging.INFO, logger='utils.error_handler'):
+        response = lambda_function.lambda_handler(api_event({'action': 'analyze_boletin', 'fecha': '2025-03-10'}),
+                                                  MockLambdaContext())
+
+    assert 'tiempos' not in json.loads(response['body'])['data']['metadatos']
+    [record] = [json.loads(r.getMessage()) for r in caplog.records if 'request_stage_timings' in r.getMessage()]
+    assert record['status_code'] == 200
+    assert record['fecha'] == '2025-03-10'
+    assert 'serializacion' in record['tiempos_ms']
+    assert record['total_ms'] >= record['tiempos_ms']['gemini_analisis_total']
+
+
+def test_spans_outside_an_invocation_are_ignored():
+    """Fuera de un request (backfill, scripts) los spans no fallan ni acumulan nada"""
+    with timing.span('guardado'):
+        pass
+    timing.record('gemini_analisis_total', 1.0)
+    assert timing.current_timer() is None
+
+    timer = timing.start_timer()
+    timing.record('gemini_analisis_total', 0.25)
+    timing.record('gemini_analisis_total', 0.25)
+    timing.stop_timer()
+    assert timer.as_dict() == {'gemini_analisis_total': 500.0}
@@ -0,0 +1,112 @@
+"""
+Tests de la persistencia write-behind (buffer en disco local + escritura en segundo plano)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import Mock
+
+import lambda_function
+from services.write_behind import WriteBehindQueue
+
+
+def _analysis(fecha, resumen='Resumen'):
+    return {
+        'fecha': fecha,
+        'analisis': {'resumen': resumen, 'cambios_principales': [], 'impacto_estimado': '', 'areas_afectadas': []},
+        'opiniones_expertos': [],
+        'metadatos': {'fecha_creacion': datetime(2025, 3, 10, 9, 30)}
+    }
+
+
+def test_only_newest_buffer_of_a_date_is_written(tmp_path):
+    """Se escribe el último documento de cada fecha y los archivos se borran tras guardarse"""
+    saved = []
+    queue = WriteBehindQueue(saved.append, directory=str(tmp_path))
+    queue.enqueue(_analysis('2025-03-10', 'viejo'))
+    queue.enqueue(_analysis('2025-03-10', 'nuevo'))
+    queue.enqueue(_analysis('2025-03-11'))
+
+    assert queue.pending('2025-03-10')['analisis']['resumen'] == 'nuevo'
+    assert queue.pending('2025-03-10')['metadatos']['fecha_creacion'] == datetime(2025, 3, 10, 9, 30)
+
+    counts = queue.flush()
+
+    assert counts == {'written': 2, 'superseded': 1, 'failed': 0}
+    assert [doc['analisis']['resumen'] for doc in saved] == ['nuevo', 'Resumen']
+    assert queue.pending('2025-03-10') is None
+
+
+def test_failed_writes_stay_buffered_and_invalid_ones_are_set_aside(tmp_path):
+    """Un error de conexión se reintenta en el próximo flush; un documento inválido se aparta"""
+    save = Mock(side_effect=[ConnectionError('sin red'), None])
+    queue = WriteBehindQueue(save, directory=str(tmp_path))
+    queue.enqueue(_analysis('2025-03-10'))
+
+    assert queue.flush()['failed'] == 1
+    assert queue.pending('2025-03-10') is not None
+    assert queue.flush()['written'] == 1
+
+    queue.save_fn = Mock(side_effect=ValueError('Invalid date format'))
+    queue.enqueue(_analysis('2025-03-12'))
+    queue.flush()
+    assert queue.pending('2025-03-12') is None
+    assert len(os.listdir(queue.failed_directory)) == 1
+
+
+def test_two_queues_on_one_directory_write_each_buffer_once(tmp_path):
+    """Dos workers comparten el buffer: los flush se turnan y ninguno falla por archivos que borró el otro"""
+    saved = []
+    save_lock = threading.Lock()
+
+    def slow_save(document):
+        with save_lock:
+            saved.append(document['fecha'])
+        time.sleep(0.01)
+
+    first = WriteBehindQueue(slow_save, directory=str(tmp_path))
+    second = WriteBehindQueue(slow_save, directory=str(tmp_path))
+    for day in range(10, 20):
+        first.enqueue(_analysis(f'2025-03-{day}'))
+
+    counts = []
+    threads = [threading.Thread(target=lambda queue=queue: counts.append(queue.flush())) for queue in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(saved) == [f'2025-03-{day}' for day in range(10, 20)]
+    assert sum(c['written'] for c in counts) == 10 and sum(c['failed'] for c in counts) == 0
+    assert first.pending('2025-03-15') is None
+
+
+def test_response_does_not_wait_for_mongo(monkeypatch, lambda_context, tmp_path):
+    """El análisis se devuelve antes de que termine la escritura en Mongo y se sirve desde el buffer"""
+    release = threading.Event()
+    db = Mock()
+    db.get_analysis_by_date.return_value = None
+    db.save_analysis.side_effect = lambda document: release.wait(timeout=5)
+    llm = Mock()
+    llm.analyze_normativa.return_value = _analysis('2025-03-10')['analisis']
+    llm.get_pdf_handle.return_value = None
+    queue = WriteBehindQueue(db.save_analysis, directory=str(tmp_path))
+    monkeypatch.setattr(lambda_function, 'llm_service', llm)
+    monkeypatch.setattr(lambda_function, 'database_service', db)
+    monkeypatch.setattr(lambda_function, 'negative_cache', None)
+    monkeypatch.setattr(lambda_function, 'write_behind', queue)
+
+    result = lambda_function.process_boletin_analysis('2025-03-10', False, lambda_context)
+    assert result['metadatos']['desde_cache'] is False
+
+    # Mongo todavía no respondió: la siguiente consulta sale del buffer
+    cached = lambda_function.process_boletin_analysis('2025-03-10', False, lambda_context)
+    assert cached['metadatos']['desde_cache'] is True
+    assert llm.analyze_normativa.call_count == 1
+
+    release.set()
+    queue.wait(timeout=5)
+    db.save_analysis.assert_called_once()
+    assert queue.pending('2025-03-10') is None
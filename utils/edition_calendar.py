@@ -0,0 +1,70 @@
+"""
+Calendar of the days the Boletín Oficial publishes an edition.
+There is no edition on weekends or on national holidays. The fixed holidays
+(including Carnival and Good Friday, which follow Easter) are computed once
+per year. Movable holidays and bridge days are set by decree each year, so
+they come from BOLETIN_FERIADOS.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List
+
+# (month, day) of the holidays that never move (Law 27.399)
+FIXED_HOLIDAYS = ((1, 1), (3, 24), (4, 2), (5, 1), (5, 25), (6, 20), (7, 9), (12, 8), (12, 25))
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _configured_holidays() -> FrozenSet[date]:
+    """Extra non-publication days from BOLETIN_FERIADOS (comma-separated YYYY-MM-DD)."""
+    raw = os.getenv('BOLETIN_FERIADOS', '')
+    return frozenset(datetime.strptime(value.strip(), '%Y-%m-%d').date()
+                     for value in raw.split(',') if value.strip())
+
+
+@lru_cache(maxsize=32)
+def holidays(year: int) -> FrozenSet[date]:
+    """National holidays of a year on which the bulletin is not published."""
+    easter = _easter_sunday(year)
+    days = {date(year, month, day) for month, day in FIXED_HOLIDAYS}
+    days.update({
+        easter - timedelta(days=48),  # Carnival Monday
+        easter - timedelta(days=47),  # Carnival Tuesday
+        easter - timedelta(days=2),   # Good Friday
+    })
+    days.update(day for day in _configured_holidays() if day.year == year)
+    return frozenset(days)
+
+
+def has_edition(fecha: str) -> bool:
+    """Whether an edition is expected for a date (YYYY-MM-DD)."""
+    day = datetime.strptime(fecha, '%Y-%m-%d').date()
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def edition_dates(fecha_desde: str, fecha_hasta: str) -> List[str]:
+    """Dates of the range (inclusive) on which an edition is expected."""
+    current = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
+    end = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
+    dates = []
+    while current <= end:
+        fecha = current.strftime('%Y-%m-%d')
+        if has_edition(fecha):
+            dates.append(fecha)
+        current += timedelta(days=1)
+    return dates
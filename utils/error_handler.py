@@ -4,10 +4,32 @@ Error handling utilities for the Boletin Oficial application.
 
 import logging
 import json
+import os
+import random
+import re
 from datetime import datetime
 from typing import Dict, Any, Optional
 from enum import Enum
 
+# Keys whose values never reach the logs
+_SECRET_KEY_PATTERN = re.compile(
+    r'(?:^|[_-])(?:api[_-]?key|password|passwd|secret|token|authorization|cookie|connection[_-]?string)(?:$|[_-])',
+    re.IGNORECASE
+)
+# Secrets embedded in free text (error messages, URLs)
+_SECRET_VALUE_PATTERNS = [
+    (re.compile(r'AIza[0-9A-Za-z_\-]{35}'), 'AIza***'),
+    (re.compile(r'(mongodb(?:\+srv)?://[^:/@\s]+:)[^@\s]+@'), r'\1***@'),
+    (re.compile(r'(rediss?://[^:/@\s]*:)[^@\s]+@'), r'\1***@'),
+]
+
+# Chatty info events logged only for a sample of the calls (LOG_SAMPLE_RATES overrides)
+DEFAULT_SAMPLE_RATES = {
+    'cache_check_starting': 0.1,
+    'cache_check_completed': 0.1,
+    'local_cache_hit': 0.1,
+}
+
 
 class ErrorCode(Enum):
     """Standard error codes for the application."""
@@ -128,16 +150,22 @@ class ErrorHandler:
     def __init__(self):
         """Initialize the error handler with structured logging."""
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
         
-        # Configure structured logging format
-        if not self.logger.handlers:
+        # Configure structured logging format (the Lambda runtime already has a root handler:
+        # a second one would ship every record to CloudWatch twice)
+        if not self.logger.handlers and not logging.getLogger().handlers:
             handler = logging.StreamHandler()
             formatter = logging.Formatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             )
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
+        
+        # Size caps per field and sampling of chatty info events
+        self.max_field_chars = int(os.getenv('LOG_MAX_FIELD_CHARS', '2000'))
+        self.max_list_items = int(os.getenv('LOG_MAX_LIST_ITEMS', '50'))
+        self.sample_rates = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES'))
     
     def handle_pdf_error(self, error: Exception, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Handle PDF-related errors."""
@@ -241,8 +269,15 @@ class ErrorHandler:
         
         return error_response
     
+    def _emit(self, level: int, log_data: Dict[str, Any]):
+        """Hand the record to logging; it is sanitized and serialized only if a handler emits it."""
+        self.logger.log(level, StructuredMessage(log_data, self.max_field_chars, self.max_list_items))
+    
     def log_error(self, error_code: ErrorCode, error: Exception, context: Optional[Dict[str, Any]] = None):
         """Log error with structured format."""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        
         log_data = {
             'event': 'error_occurred',
             'error_code': error_code.value,
@@ -255,22 +290,50 @@ class ErrorHandler:
         if context:
             log_data['context'] = context
         
-        self.logger.error(json.dumps(log_data))
+        self._emit(logging.ERROR, log_data)
     
     def log_info(self, event: str, data: Optional[Dict[str, Any]] = None):
-        """Log informational events with structured format."""
+        """Log informational events with structured format (chatty events are sampled)."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
+        rate = self.sample_rates.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+        
         log_data = {
             'event': event,
             'timestamp': datetime.utcnow().isoformat()
         }
+        if rate is not None:
+            # Each logged record stands for 1/rate events
+            log_data['sample_rate'] = rate
         
         if data:
             log_data.update(data)
         
-        self.logger.info(json.dumps(log_data))
+        self._emit(logging.INFO, log_data)
     
     def log_warning(self, event: str, data: Optional[Dict[str, Any]] = None):
         """Log warning events with structured format."""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
+        
+        log_data = {
+            'event': event,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        
+        if data:
+            log_data.update(data)
+        
+        self._emit(logging.WARNING, log_data)
+    
+    def log_debug(self, event: str, data: Optional[Dict[str, Any]] = None):
+        """Log debugging detail (large payloads such as prompts); skipped entirely unless DEBUG is enabled."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        
         log_data = {
             'event': event,
             'timestamp': datetime.utcnow().isoformat()
@@ -279,7 +342,7 @@ class ErrorHandler:
         if data:
             log_data.update(data)
         
-        self.logger.warning(json.dumps(log_data))
+        self._emit(logging.DEBUG, log_data)
     
     def is_retryable_error(self, error_code: ErrorCode) -> bool:
         """Check if an error is retryable."""
@@ -290,5 +353,86 @@ class ErrorHandler:
         return self.ERROR_DEFINITIONS[error_code]['http_status']
 
 
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """'evento=0.1,otro=0' -> {'evento': 0.1, 'otro': 0.0} (None: the defaults)"""
+    if value is None:
+        return dict(DEFAULT_SAMPLE_RATES)
+    rates = {}
+    for item in value.split(','):
+        event, _, rate = item.partition('=')
+        if event.strip() and rate.strip():
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def sanitize_log_value(value: Any, max_chars: int = 2000, max_items: int = 50, depth: int = 0) -> Any:
+    """
+    Copy of a log field that is cheap to serialize and safe to ship
+    
+    Binary data (bytes, inline PDF parts) is replaced by its size, secrets are
+    masked, and long strings and lists are cut at max_chars/max_items.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        for pattern, replacement in _SECRET_VALUE_PATTERNS:
+            value = pattern.sub(replacement, value)
+        if len(value) > max_chars:
+            return f'{value[:max_chars]}...(+{len(value) - max_chars} chars)'
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    if depth >= 6:
+        return f'<{type(value).__name__}>'
+    if isinstance(value, dict):
+        sanitized = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index >= max_items:
+                sanitized['...'] = f'+{len(value) - max_items} keys'
+                break
+            key = str(key)
+            sanitized[key] = '***' if _SECRET_KEY_PATTERN.search(key) and item else \
+                sanitize_log_value(item, max_chars, max_items, depth + 1)
+        return sanitized
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        sanitized = [sanitize_log_value(item, max_chars, max_items, depth + 1) for item in items[:max_items]]
+        if len(items) > max_items:
+            sanitized.append(f'...(+{len(items) - max_items} items)')
+        return sanitized
+    if isinstance(value, datetime):
+        return value.isoformat()
+    
+    # google-genai Content/Part: keep the structure, never the inline bytes
+    inline_data = getattr(value, 'inline_data', None)
+    if inline_data is not None:
+        return f'<{getattr(inline_data, "mime_type", None) or "inline"} {len(inline_data.data or b"")} bytes>'
+    parts = getattr(value, 'parts', None)
+    if parts is not None:
+        return {'role': getattr(value, 'role', None), 'parts': sanitize_log_value(parts, max_chars, max_items, depth + 1)}
+    text = getattr(value, 'text', None)
+    if isinstance(text, str):
+        return sanitize_log_value(text, max_chars, max_items, depth + 1)
+    file_data = getattr(value, 'file_data', None)
+    if file_data is not None:
+        return f'<file {getattr(file_data, "file_uri", "")}>'
+    
+    return sanitize_log_value(str(value), max_chars, max_items, depth + 1)
+
+
+class StructuredMessage:
+    """Log message serialized only when a handler actually emits it."""
+    
+    __slots__ = ('data', 'max_chars', 'max_items')
+    
+    def __init__(self, data: Dict[str, Any], max_chars: int, max_items: int):
+        self.data = data
+        self.max_chars = max_chars
+        self.max_items = max_items
+    
+    def __str__(self) -> str:
+        return json.dumps(sanitize_log_value(self.data, self.max_chars, self.max_items), default=str)
+
+
 # Global error handler instance
 error_handler = ErrorHandler()
\ No newline at end of file
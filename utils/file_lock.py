@@ -0,0 +1,71 @@
+"""
+Advisory file locks for local directories shared by several processes.
+Under http_server every worker process uses the same /tmp paths, so state kept
+on disk (the disk cache index, the write-behind buffer) must either belong to
+one process or be changed under a lock. Locks are fcntl.flock locks, released
+by the kernel when the process dies; where fcntl is not available (Windows)
+they are no-ops, as there is then a single process per directory.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+OWNER_LOCK_FILE = '.owner.lock'
+
+_claimed: Dict[str, str] = {}
+_claimed_files = []
+_claim_lock = threading.Lock()
+
+
+def claim_directory(base: str) -> str:
+    """
+    Directory owned by this process: `base` if no other process holds it, else base-1, base-2, ...
+
+    The claim lasts for the life of the process (a restarted worker reuses a free
+    slot with what the previous one left there); instances in the same process
+    share the claimed directory.
+    """
+    with _claim_lock:
+        if base in _claimed:
+            return _claimed[base]
+        if fcntl is None:
+            os.makedirs(base, exist_ok=True)
+            _claimed[base] = base
+            return base
+
+        slot = 0
+        while True:
+            directory = base if slot == 0 else f'{base}-{slot}'
+            os.makedirs(directory, exist_ok=True)
+            lock_file = open(os.path.join(directory, OWNER_LOCK_FILE), 'a')
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                slot += 1
+                continue
+            # Keep the file open: closing it would release the claim
+            _claimed_files.append(lock_file)
+            _claimed[base] = directory
+            return directory
+
+
+@contextmanager
+def locked(path: str):
+    """Hold an exclusive lock on `path` (created if missing), waiting for other processes."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
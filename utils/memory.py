@@ -0,0 +1,127 @@
+"""
+Per-invocation memory accounting and headroom checks.
+Reads the resident set size (RSS) and its high-water mark from /proc (falling
+back to getrusage elsewhere), resets the mark at the start of each invocation
+when the kernel allows it, and keeps the PDF sizes and handling strategy of
+the invocation so the LLM service can pick a cheaper way to send a large
+edition before it exhausts the Lambda memory.
+"""
+
+import contextvars
+import os
+import resource
+import sys
+from typing import Any, Dict, Optional
+
+_MB = 1024 * 1024
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar('memory_usage', default=None)
+
+# Resetting the high-water mark is only meaningful with one invocation at a time per process
+_peak_reset = {'enabled': True}
+
+
+def _status_kib(field: str) -> Optional[int]:
+    """A kB field of /proc/self/status (VmRSS, VmHWM), None where /proc is not available."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def _maxrss_bytes() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def rss_bytes() -> int:
+    """Current resident set size of the process."""
+    kib = _status_kib('VmRSS')
+    return kib * 1024 if kib is not None else _maxrss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Resident set high-water mark (since reset_peak, or since the process started)."""
+    kib = _status_kib('VmHWM')
+    return kib * 1024 if kib is not None else _maxrss_bytes()
+
+
+def reset_peak() -> bool:
+    """Reset the RSS high-water mark to the current RSS (Linux 4.0+); False if not allowed."""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def memory_limit_bytes() -> Optional[int]:
+    """Memory available to the function (MEMORY_LIMIT_MB, else the Lambda memory size), None if unknown."""
+    limit_mb = os.getenv('MEMORY_LIMIT_MB') or os.getenv('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    return int(limit_mb) * _MB if limit_mb else None
+
+
+def headroom_bytes() -> Optional[int]:
+    """Memory left before the limit, None if the limit is unknown."""
+    limit = memory_limit_bytes()
+    return None if limit is None else limit - rss_bytes()
+
+
+def disable_peak_reset():
+    """
+    Stop resetting the high-water mark per invocation (http_server runs requests concurrently:
+    a reset would wipe the peak of the others); peaks are then reported since the process started.
+    """
+    _peak_reset['enabled'] = False
+
+
+def start_invocation() -> Dict[str, Any]:
+    """Start accounting a new invocation (replaces the one of the previous invocation)."""
+    usage = {
+        'pico_por_invocacion': reset_peak() if _peak_reset['enabled'] else False,
+        'rss_inicio': rss_bytes(),
+        'pdfs': []
+    }
+    _current_usage.set(usage)
+    return usage
+
+
+def stop_invocation():
+    _current_usage.set(None)
+
+
+def record_pdf(fecha: str, size: int, strategy: str):
+    """Note a PDF handled by the current invocation and how it was sent to Gemini."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage['pdfs'].append({'fecha': fecha, 'bytes': size, 'estrategia': strategy})
+
+
+def pdf_strategy(fecha: str) -> Optional[str]:
+    """Last strategy used in the current invocation for the PDF of a date (None if not downloaded)."""
+    usage = _current_usage.get()
+    for pdf in reversed(usage['pdfs'] if usage is not None else []):
+        if pdf['fecha'] == fecha:
+            return pdf['estrategia']
+    return None
+
+
+def invocation_usage() -> Optional[Dict[str, Any]]:
+    """Memory figures of the current invocation in MB (None outside an invocation)."""
+    usage = _current_usage.get()
+    if usage is None:
+        return None
+    limit = memory_limit_bytes()
+    return {
+        'rss_inicio_mb': round(usage['rss_inicio'] / _MB, 1),
+        'rss_pico_mb': round(peak_rss_bytes() / _MB, 1),
+        'pico_por_invocacion': usage['pico_por_invocacion'],
+        'limite_mb': round(limit / _MB) if limit is not None else None,
+        'pdfs': list(usage['pdfs'])
+    }
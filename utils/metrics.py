@@ -0,0 +1,129 @@
+"""
+Per-invocation metrics in CloudWatch Embedded Metric Format (EMF).
+Counters and value distributions (timers, sizes) are buffered while a request
+runs and written as a single EMF record when it ends; CloudWatch extracts the
+metrics from the log line, so latency percentiles and hit-ratio alarms need no
+log queries. METRICS_SINK selects where records go: stdout (the Lambda log) or
+a local file for tests and benchmarks.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_current_metrics: contextvars.ContextVar = contextvars.ContextVar('metrics_buffer', default=None)
+
+# EMF accepts at most 100 metrics per directive and 100 values per metric
+MAX_METRICS = 100
+MAX_VALUES = 100
+
+
+class MetricsBuffer:
+    """Counters (summed) and distributions (every value) of one invocation."""
+
+    def __init__(self):
+        self._counters: Dict[str, List] = {}
+        self._values: Dict[str, List] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, unit: str = 'Count'):
+        with self._lock:
+            entry = self._counters.setdefault(name, [0, unit])
+            entry[0] += value
+
+    def observe(self, name: str, value: float, unit: str = 'Milliseconds'):
+        with self._lock:
+            values = self._values.setdefault(name, [[], unit])[0]
+            if len(values) < MAX_VALUES:
+                values.append(value)
+
+    def to_emf(self, namespace: str, dimensions: Dict[str, str],
+               properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """EMF record with every metric under one dimension set."""
+        with self._lock:
+            metrics = {name: entry for name, entry in self._counters.items()}
+            metrics.update((name, entry) for name, entry in self._values.items() if entry[0])
+        names = list(metrics)[:MAX_METRICS]
+
+        record = dict(properties or {})
+        record['_aws'] = {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': metrics[name][1]} for name in names]
+            }]
+        }
+        record.update(dimensions)
+        for name in names:
+            value = metrics[name][0]
+            record[name] = value[0] if isinstance(value, list) and len(value) == 1 else value
+        return record
+
+
+def metrics_enabled() -> bool:
+    return os.getenv('METRICS_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+
+
+def start_metrics() -> Optional[MetricsBuffer]:
+    """Start buffering the metrics of a new invocation (None when METRICS_ENABLED is off)."""
+    buffer = MetricsBuffer() if metrics_enabled() else None
+    _current_metrics.set(buffer)
+    return buffer
+
+
+def stop_metrics():
+    """Drop the buffer of the current invocation without writing it."""
+    _current_metrics.set(None)
+
+
+def increment(name: str, value: float = 1, unit: str = 'Count'):
+    """Add to a counter of the current invocation (no-op outside an invocation)."""
+    buffer = _current_metrics.get()
+    if buffer is not None and value is not None:
+        buffer.increment(name, value, unit)
+
+
+def observe(name: str, value: Optional[float], unit: str = 'Milliseconds'):
+    """Record one value of a distribution (latency, size) of the current invocation."""
+    buffer = _current_metrics.get()
+    if buffer is not None and value is not None:
+        buffer.observe(name, value, unit)
+
+
+def write_record(record: Dict[str, Any]):
+    """Send an EMF record to METRICS_SINK: 'stdout' (default), a file path, or 'none'."""
+    sink = os.getenv('METRICS_SINK', 'stdout')
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    if sink == 'none':
+        return
+    if sink == 'stdout':
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+        return
+    with open(sink, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+
+def flush_metrics(dimensions: Dict[str, str], properties: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Write the metrics of the current invocation as one EMF record and stop buffering
+
+    Args:
+        dimensions: Dimension values shared by every metric (e.g. {'Action': 'analyze_boletin'})
+        properties: Extra fields of the record, searchable in Logs Insights but not metrics
+
+    Returns:
+        dict or None: The record written (None when metrics are disabled)
+    """
+    buffer = _current_metrics.get()
+    _current_metrics.set(None)
+    if buffer is None:
+        return None
+    record = buffer.to_emf(os.getenv('METRICS_NAMESPACE', 'BoletinOficial'), dimensions, properties)
+    write_record(record)
+    return record
@@ -0,0 +1,49 @@
+"""
+Lightweight PDF inspection helpers (no PDF parser dependency).
+Used to size a bulletin edition before sending it to Gemini.
+"""
+
+import re
+import zlib
+
+_PDF_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![s\w])')
+_PDF_STREAM_PATTERN = re.compile(rb'stream\r?\n(.*?)\r?\nendstream', re.DOTALL)
+_INSTRUMENT_PATTERN = re.compile(
+    rb'(?:Decreto|Resoluci\S{1,3}n|Disposici\S{1,3}n|Decisi\S{1,3}n Administrativa)'
+    rb'\s+(?:Conjunta\s+|Sintetizada\s+)?\d+/\d{4}',
+    re.IGNORECASE
+)
+
+# Gemini counts 258 tokens per PDF page
+TOKENS_PER_PDF_PAGE = 258
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    """Approximate page count (/Type /Page objects, without parsing the document)."""
+    if not pdf_bytes:
+        return 0
+    # Pages inside compressed object streams are not visible: estimate by size
+    return len(_PDF_PAGE_PATTERN.findall(pdf_bytes)) or max(1, len(pdf_bytes) // 60000)
+
+
+def count_instruments(pdf_bytes: bytes, max_streams: int = 2000) -> int:
+    """
+    Best-effort count of legal instruments ("Decreto 123/2025", "Resolución 44/2025", ...).
+
+    Scans the raw bytes and every Flate stream that decompresses. Text drawn with
+    custom font encodings is not readable this way, so 0 means "unknown".
+    """
+    if not pdf_bytes:
+        return 0
+
+    found = set(_INSTRUMENT_PATTERN.findall(pdf_bytes))
+    for index, match in enumerate(_PDF_STREAM_PATTERN.finditer(pdf_bytes)):
+        if index >= max_streams:
+            break
+        try:
+            data = zlib.decompress(match.group(1))
+        except zlib.error:
+            continue
+        found.update(_INSTRUMENT_PATTERN.findall(data))
+
+    return len({re.sub(rb'\s+', b' ', item.lower()) for item in found})
@@ -0,0 +1,82 @@
+"""
+Per-request stage timings (lightweight spans).
+lambda_handler starts a StageTimer for each invocation; code anywhere below it
+records stages with span() or record() without passing the timer around.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+_current_timer: contextvars.ContextVar = contextvars.ContextVar('stage_timer', default=None)
+
+
+class StageTimer:
+    """Accumulated seconds per stage (a stage entered twice, e.g. on retries, adds up)."""
+
+    def __init__(self):
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, float]:
+        """Milliseconds per stage in the order they were first recorded."""
+        with self._lock:
+            return {stage: round(seconds * 1000, 1) for stage, seconds in self._stages.items()}
+
+
+def start_timer() -> StageTimer:
+    """Start timing a new invocation (replaces the timer of the previous one)."""
+    timer = StageTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def stop_timer():
+    """End the current invocation: later spans in this thread are not recorded."""
+    _current_timer.set(None)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as `stage` of the current invocation (no-op outside an invocation)."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.span(stage):
+        yield
+
+
+def record(stage: str, seconds: Optional[float]):
+    """Add an already measured duration to the current invocation."""
+    timer = _current_timer.get()
+    if timer is not None and seconds is not None:
+        timer.record(stage, seconds)
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """Bind `fn` to the caller's context so worker threads record into the same timer."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)